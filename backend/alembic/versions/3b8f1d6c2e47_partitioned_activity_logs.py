@@ -0,0 +1,107 @@
+"""partitioned activity logs
+
+Revision ID: 3b8f1d6c2e47
+Revises: d94b2e6a7f10
+Create Date: 2026-10-18 16:02:37.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8f1d6c2e47'
+down_revision: Union[str, Sequence[str], None] = 'd94b2e6a7f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_activity_logs_timestamp_id': ['timestamp', 'id'],
+    'ix_activity_logs_user_timestamp': ['user_id', 'timestamp'],
+    'ix_activity_logs_action_timestamp': ['action', 'timestamp'],
+}
+
+# Monthly partitions are created from the oldest row through two months ahead;
+# activity_retention.ensure_partitions() keeps adding them from then on.
+CREATE_MONTHLY_PARTITIONS = """
+DO $$
+DECLARE
+    month date := date_trunc('month', COALESCE((SELECT min(timestamp) FROM activity_logs_legacy), now()))::date;
+    last_month date := (date_trunc('month', now()) + interval '2 months')::date;
+BEGIN
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE activity_logs_p%s PARTITION OF activity_logs FOR VALUES FROM (%L) TO (%L)',
+            to_char(month, 'YYYYMM'), month, (month + interval '1 month')::date
+        );
+        month := (month + interval '1 month')::date;
+    END LOOP;
+END $$
+"""
+
+
+def _create_indexes() -> None:
+    for index_name, columns in INDEXES.items():
+        op.create_index(index_name, 'activity_logs', columns, unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        _create_indexes()
+        return
+    # Rebuild activity_logs as a table range-partitioned by month on timestamp.
+    # The partition key has to be part of the primary key, so it becomes
+    # (id, timestamp); ids keep coming from the existing sequence.
+    op.execute('ALTER TABLE activity_logs RENAME TO activity_logs_legacy')
+    op.execute('ALTER INDEX IF EXISTS activity_logs_pkey RENAME TO activity_logs_legacy_pkey')
+    op.execute('ALTER INDEX IF EXISTS ix_activity_logs_id RENAME TO ix_activity_logs_legacy_id')
+    op.execute("""
+        CREATE TABLE activity_logs (
+            id INTEGER NOT NULL DEFAULT nextval('activity_logs_id_seq'),
+            user_id INTEGER REFERENCES users (id),
+            action VARCHAR,
+            details VARCHAR,
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute('ALTER SEQUENCE activity_logs_id_seq OWNED BY activity_logs.id')
+    op.execute(CREATE_MONTHLY_PARTITIONS)
+    op.execute('CREATE TABLE activity_logs_default PARTITION OF activity_logs DEFAULT')
+    op.execute("""
+        INSERT INTO activity_logs (id, user_id, action, details, timestamp)
+        SELECT id, user_id, action, details, COALESCE(timestamp, now() AT TIME ZONE 'utc')
+        FROM activity_logs_legacy
+    """)
+    op.execute('DROP TABLE activity_logs_legacy')
+    op.create_index(op.f('ix_activity_logs_id'), 'activity_logs', ['id'], unique=False)
+    _create_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        for index_name in INDEXES:
+            op.drop_index(index_name, table_name='activity_logs')
+        return
+    op.execute('ALTER TABLE activity_logs RENAME TO activity_logs_partitioned')
+    op.execute("""
+        CREATE TABLE activity_logs (
+            id INTEGER NOT NULL DEFAULT nextval('activity_logs_id_seq'),
+            user_id INTEGER REFERENCES users (id),
+            action VARCHAR,
+            details VARCHAR,
+            timestamp TIMESTAMP WITHOUT TIME ZONE
+        )
+    """)
+    op.execute("""
+        INSERT INTO activity_logs (id, user_id, action, details, timestamp)
+        SELECT id, user_id, action, details, timestamp FROM activity_logs_partitioned
+    """)
+    op.execute('ALTER SEQUENCE activity_logs_id_seq OWNED BY activity_logs.id')
+    op.execute('DROP TABLE activity_logs_partitioned CASCADE')
+    op.create_primary_key('activity_logs_pkey', 'activity_logs', ['id'])
+    op.create_index(op.f('ix_activity_logs_id'), 'activity_logs', ['id'], unique=False)
@@ -0,0 +1,33 @@
+"""added cost_at_sale column
+
+Revision ID: 3b9e51d7a2c4
+Revises: cdf39f920053
+Create Date: 2026-10-18 10:04:17.220931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e51d7a2c4'
+down_revision: Union[str, Sequence[str], None] = 'cdf39f920053'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('sale_items', sa.Column('cost_at_sale', sa.Float(), nullable=True))
+    # Best available cost for existing sales is today's purchase price
+    op.execute(
+        "UPDATE sale_items SET cost_at_sale = "
+        "(SELECT medicines.purchase_price FROM medicines WHERE medicines.id = sale_items.medicine_id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sale_items', 'cost_at_sale')
@@ -0,0 +1,30 @@
+"""added email outbox sealed
+
+Revision ID: 4e7b1a9c3d65
+Revises: 9f3c6b2d8e41
+Create Date: 2026-10-18 21:40:17.602914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e7b1a9c3d65'
+down_revision: Union[str, Sequence[str], None] = '9f3c6b2d8e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('email_outbox', sa.Column('sealed', sa.Boolean(), nullable=True))
+    # Rows given up on kept their body, including credential emails
+    op.execute("UPDATE email_outbox SET body = NULL WHERE status = 'failed'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('email_outbox', 'sealed')
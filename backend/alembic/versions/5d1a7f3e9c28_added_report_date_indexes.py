@@ -0,0 +1,36 @@
+"""added report date indexes
+
+Revision ID: 5d1a7f3e9c28
+Revises: 8e2c5a9d1b73
+Create Date: 2026-10-18 17:21:46.093517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1a7f3e9c28'
+down_revision: Union[str, Sequence[str], None] = '8e2c5a9d1b73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_sales_sale_date_id', 'sales', ['sale_date', 'id'], unique=False)
+    op.create_index(op.f('ix_sale_items_sale_id'), 'sale_items', ['sale_id'], unique=False)
+    op.create_index(op.f('ix_purchases_purchase_date'), 'purchases', ['purchase_date'], unique=False)
+    op.create_index(op.f('ix_expenses_expense_date'), 'expenses', ['expense_date'], unique=False)
+    op.create_index(op.f('ix_employee_bills_payment_date'), 'employee_bills', ['payment_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_employee_bills_payment_date'), table_name='employee_bills')
+    op.drop_index(op.f('ix_expenses_expense_date'), table_name='expenses')
+    op.drop_index(op.f('ix_purchases_purchase_date'), table_name='purchases')
+    op.drop_index(op.f('ix_sale_items_sale_id'), table_name='sale_items')
+    op.drop_index('ix_sales_sale_date_id', table_name='sales')
@@ -0,0 +1,28 @@
+"""added medicine name lower index
+
+Revision ID: 5f2a8c61d0b3
+Revises: e148f2c740cb
+Create Date: 2026-10-18 12:02:39.114528
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2a8c61d0b3'
+down_revision: Union[str, Sequence[str], None] = 'e148f2c740cb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_medicines_name_lower', 'medicines', [sa.text('lower(name)')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_medicines_name_lower', table_name='medicines')
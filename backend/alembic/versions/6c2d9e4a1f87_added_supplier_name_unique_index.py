@@ -0,0 +1,57 @@
+"""added supplier name unique index
+
+Revision ID: 6c2d9e4a1f87
+Revises: 4e7b1a9c3d65
+Create Date: 2026-10-18 22:05:51.734106
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c2d9e4a1f87'
+down_revision: Union[str, Sequence[str], None] = '4e7b1a9c3d65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Merge suppliers whose names differ only in case into the oldest one
+    for table in ('purchases', 'medicine_batches', 'supplier_payments'):
+        op.execute(f"""
+            UPDATE {table} SET supplier_id = (
+                SELECT MIN(k.id) FROM suppliers s JOIN suppliers k ON LOWER(k.name) = LOWER(s.name)
+                WHERE s.id = {table}.supplier_id
+            )
+            WHERE supplier_id IS NOT NULL
+        """)
+    op.execute("""
+        DELETE FROM suppliers
+        WHERE id <> (SELECT MIN(k.id) FROM suppliers k WHERE LOWER(k.name) = LOWER(suppliers.name))
+    """)
+    op.execute("""
+        UPDATE suppliers SET balance = COALESCE((
+            SELECT SUM(CASE
+                WHEN COALESCE(p.payment_status, 'unpaid') <> 'paid'
+                 AND p.total_amount - COALESCE(p.invoice_discount, 0) - COALESCE(p.paid_amount, 0) > 0
+                THEN p.total_amount - COALESCE(p.invoice_discount, 0) - COALESCE(p.paid_amount, 0)
+                ELSE 0 END)
+            FROM purchases p WHERE p.supplier_id = suppliers.id
+        ), 0)
+    """)
+    op.create_index('ix_suppliers_name_lower', 'suppliers', [sa.text('lower(name)')], unique=True)
+
+    # Deleting a supplier keeps its payment history
+    op.drop_constraint('fk_supplier_payments_supplier_id_suppliers', 'supplier_payments', type_='foreignkey')
+    op.create_foreign_key('fk_supplier_payments_supplier_id_suppliers', 'supplier_payments', 'suppliers', ['supplier_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('fk_supplier_payments_supplier_id_suppliers', 'supplier_payments', type_='foreignkey')
+    op.create_foreign_key('fk_supplier_payments_supplier_id_suppliers', 'supplier_payments', 'suppliers', ['supplier_id'], ['id'], ondelete='CASCADE')
+    op.drop_index('ix_suppliers_name_lower', table_name='suppliers')
@@ -0,0 +1,94 @@
+"""added supplier ledger
+
+Revision ID: 7a4f2d9c6e15
+Revises: b6e0c2f84d19
+Create Date: 2026-10-18 19:12:40.218305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4f2d9c6e15'
+down_revision: Union[str, Sequence[str], None] = 'b6e0c2f84d19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('suppliers', sa.Column('balance', sa.Float(), nullable=True))
+    op.create_table('supplier_payments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('supplier_id', sa.Integer(), nullable=True),
+    sa.Column('purchase_id', sa.Integer(), nullable=True),
+    sa.Column('payment_date', sa.Date(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=True),
+    sa.Column('note', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['supplier_id'], ['suppliers.id'], ondelete='CASCADE', name='fk_supplier_payments_supplier_id_suppliers'),
+    sa.ForeignKeyConstraint(['purchase_id'], ['purchases.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_supplier_payments_id'), 'supplier_payments', ['id'], unique=False)
+    op.create_index(op.f('ix_supplier_payments_purchase_id'), 'supplier_payments', ['purchase_id'], unique=False)
+    op.create_index('ix_supplier_payments_supplier_date', 'supplier_payments', ['supplier_id', 'payment_date'], unique=False)
+    op.add_column('purchases', sa.Column('supplier_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_purchases_supplier_id'), 'purchases', ['supplier_id'], unique=False)
+    op.create_foreign_key('fk_purchases_supplier_id_suppliers', 'purchases', 'suppliers', ['supplier_id'], ['id'], ondelete='SET NULL')
+    op.add_column('medicine_batches', sa.Column('supplier_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_medicine_batches_supplier_id'), 'medicine_batches', ['supplier_id'], unique=False)
+    op.create_foreign_key('fk_medicine_batches_supplier_id_suppliers', 'medicine_batches', 'suppliers', ['supplier_id'], ['id'], ondelete='SET NULL')
+
+    # Backfill: every supplier name typed on a purchase becomes a supplier
+    # (matched case-insensitively, as supplier_ledger.get_or_create_supplier does)
+    op.execute("""
+        INSERT INTO suppliers (name, balance, created_at)
+        SELECT MIN(TRIM(p.supplier_name)), 0, CURRENT_TIMESTAMP
+        FROM purchases p
+        WHERE p.supplier_name IS NOT NULL AND TRIM(p.supplier_name) <> ''
+          AND NOT EXISTS (SELECT 1 FROM suppliers s WHERE LOWER(s.name) = LOWER(TRIM(p.supplier_name)))
+        GROUP BY LOWER(TRIM(p.supplier_name))
+    """)
+    for table in ('purchases', 'medicine_batches'):
+        op.execute(f"""
+            UPDATE {table} SET supplier_id = (
+                SELECT MIN(s.id) FROM suppliers s WHERE LOWER(s.name) = LOWER(TRIM({table}.supplier_name))
+            )
+            WHERE supplier_name IS NOT NULL
+        """)
+    # What was paid so far has no dates of its own; it is recorded on the purchase date
+    op.execute("""
+        INSERT INTO supplier_payments (supplier_id, purchase_id, payment_date, amount, note, created_at)
+        SELECT supplier_id, id, purchase_date, paid_amount, 'Paid before payment history', CURRENT_TIMESTAMP
+        FROM purchases
+        WHERE paid_amount > 0
+    """)
+    op.execute("""
+        UPDATE suppliers SET balance = COALESCE((
+            SELECT SUM(CASE
+                WHEN COALESCE(p.payment_status, 'unpaid') <> 'paid'
+                 AND p.total_amount - COALESCE(p.invoice_discount, 0) - COALESCE(p.paid_amount, 0) > 0
+                THEN p.total_amount - COALESCE(p.invoice_discount, 0) - COALESCE(p.paid_amount, 0)
+                ELSE 0 END)
+            FROM purchases p WHERE p.supplier_id = suppliers.id
+        ), 0)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('fk_medicine_batches_supplier_id_suppliers', 'medicine_batches', type_='foreignkey')
+    op.drop_index(op.f('ix_medicine_batches_supplier_id'), table_name='medicine_batches')
+    op.drop_column('medicine_batches', 'supplier_id')
+    op.drop_constraint('fk_purchases_supplier_id_suppliers', 'purchases', type_='foreignkey')
+    op.drop_index(op.f('ix_purchases_supplier_id'), table_name='purchases')
+    op.drop_column('purchases', 'supplier_id')
+    op.drop_index('ix_supplier_payments_supplier_date', table_name='supplier_payments')
+    op.drop_index(op.f('ix_supplier_payments_purchase_id'), table_name='supplier_payments')
+    op.drop_index(op.f('ix_supplier_payments_id'), table_name='supplier_payments')
+    op.drop_table('supplier_payments')
+    op.drop_column('suppliers', 'balance')
@@ -0,0 +1,28 @@
+"""added medicine_batches medicine_id index
+
+Revision ID: 7c3e9b1f4a62
+Revises: a0d4c7e93f15
+Create Date: 2026-10-18 14:02:41.118530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e9b1f4a62'
+down_revision: Union[str, Sequence[str], None] = 'a0d4c7e93f15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_medicine_batches_medicine_id'), 'medicine_batches', ['medicine_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_medicine_batches_medicine_id'), table_name='medicine_batches')
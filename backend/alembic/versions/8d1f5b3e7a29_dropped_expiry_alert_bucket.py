@@ -0,0 +1,42 @@
+"""dropped expiry alert bucket
+
+Revision ID: 8d1f5b3e7a29
+Revises: 6c2d9e4a1f87
+Create Date: 2026-10-18 23:12:40.518263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d1f5b3e7a29'
+down_revision: Union[str, Sequence[str], None] = '6c2d9e4a1f87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Buckets are derived from expiry_date at read time (see app/expiry.py)
+    op.drop_index('ix_expiry_alerts_bucket_expiry', table_name='expiry_alerts')
+    op.drop_column('expiry_alerts', 'bucket')
+    op.create_index('ix_expiry_alerts_expiry_batch', 'expiry_alerts', ['expiry_date', 'batch_id'], unique=False)
+    op.drop_table('expiry_sweep')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('expiry_sweep',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('swept_on', sa.Date(), nullable=True),
+    sa.Column('swept_at', sa.DateTime(), nullable=True),
+    sa.Column('alert_count', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.drop_index('ix_expiry_alerts_expiry_batch', table_name='expiry_alerts')
+    op.add_column('expiry_alerts', sa.Column('bucket', sa.String(), nullable=True))
+    # Filled in again by the sweep the previous code runs at startup
+    op.create_index('ix_expiry_alerts_bucket_expiry', 'expiry_alerts', ['bucket', 'expiry_date'], unique=False)
@@ -0,0 +1,40 @@
+"""added summary deltas
+
+Revision ID: 9f3c6b2d8e41
+Revises: c3f8a1e6d052
+Create Date: 2026-10-18 21:12:40.318527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f3c6b2d8e41'
+down_revision: Union[str, Sequence[str], None] = 'c3f8a1e6d052'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('summary_deltas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('summary_date', sa.Date(), nullable=True),
+    sa.Column('total_medicines', sa.Integer(), nullable=True),
+    sa.Column('low_stock_count', sa.Integer(), nullable=True),
+    sa.Column('total_due', sa.Float(), nullable=True),
+    sa.Column('total_supplier_due', sa.Float(), nullable=True),
+    sa.Column('total_sales', sa.Float(), nullable=True),
+    sa.Column('sale_count', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_summary_deltas_summary_date'), 'summary_deltas', ['summary_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_summary_deltas_summary_date'), table_name='summary_deltas')
+    op.drop_table('summary_deltas')
@@ -0,0 +1,45 @@
+"""added medicine search indexes
+
+Revision ID: a0d4c7e93f15
+Revises: 5f2a8c61d0b3
+Create Date: 2026-10-18 13:18:05.402276
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a0d4c7e93f15'
+down_revision: Union[str, Sequence[str], None] = '5f2a8c61d0b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRGM_INDEXES = {
+    'ix_medicines_name_trgm': 'name',
+    'ix_medicines_generic_name_trgm': 'generic_name',
+    'ix_medicines_manufacturer_trgm': 'manufacturer',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Trigram indexes are PostgreSQL only; SQLite gets its FTS5 table at app startup
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, column in TRGM_INDEXES.items():
+        op.create_index(
+            index_name, 'medicines', [column], unique=False,
+            postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for index_name in TRGM_INDEXES:
+        op.drop_index(index_name, table_name='medicines')
@@ -0,0 +1,67 @@
+"""added customer ledger tables
+
+Revision ID: b6e0c2f84d19
+Revises: 5d1a7f3e9c28
+Create Date: 2026-10-18 18:05:13.772640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e0c2f84d19'
+down_revision: Union[str, Sequence[str], None] = '5d1a7f3e9c28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('customers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('mobile', sa.String(), nullable=True),
+    sa.Column('address', sa.String(), nullable=True),
+    sa.Column('balance', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_customers_id'), 'customers', ['id'], unique=False)
+    op.create_index(op.f('ix_customers_mobile'), 'customers', ['mobile'], unique=True)
+    op.create_table('customer_ledger_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=True),
+    sa.Column('sale_id', sa.Integer(), nullable=True),
+    sa.Column('entry_date', sa.Date(), nullable=True),
+    sa.Column('kind', sa.String(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=True),
+    sa.Column('balance_after', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_customer_ledger_entries_id'), 'customer_ledger_entries', ['id'], unique=False)
+    op.create_index(op.f('ix_customer_ledger_entries_sale_id'), 'customer_ledger_entries', ['sale_id'], unique=False)
+    op.create_index('ix_customer_ledger_entries_customer_id_id', 'customer_ledger_entries', ['customer_id', 'id'], unique=False)
+    op.add_column('sales', sa.Column('customer_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_sales_customer_id'), 'sales', ['customer_id'], unique=False)
+    op.create_foreign_key('fk_sales_customer_id_customers', 'sales', 'customers', ['customer_id'], ['id'])
+    # Existing sales are linked and charged by POST /customers/rebuild/ (customers.rebuild_ledger),
+    # which normalizes mobile numbers the same way the write paths do
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('fk_sales_customer_id_customers', 'sales', type_='foreignkey')
+    op.drop_index(op.f('ix_sales_customer_id'), table_name='sales')
+    op.drop_column('sales', 'customer_id')
+    op.drop_index('ix_customer_ledger_entries_customer_id_id', table_name='customer_ledger_entries')
+    op.drop_index(op.f('ix_customer_ledger_entries_sale_id'), table_name='customer_ledger_entries')
+    op.drop_index(op.f('ix_customer_ledger_entries_id'), table_name='customer_ledger_entries')
+    op.drop_table('customer_ledger_entries')
+    op.drop_index(op.f('ix_customers_mobile'), table_name='customers')
+    op.drop_index(op.f('ix_customers_id'), table_name='customers')
+    op.drop_table('customers')
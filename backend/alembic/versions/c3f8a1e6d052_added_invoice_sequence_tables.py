@@ -0,0 +1,45 @@
+"""added invoice sequence tables
+
+Revision ID: c3f8a1e6d052
+Revises: 7a4f2d9c6e15
+Create Date: 2026-10-18 19:48:02.506193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8a1e6d052'
+down_revision: Union[str, Sequence[str], None] = '7a4f2d9c6e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Counters are seeded lazily from existing invoice numbers the first time a prefix is used
+    op.create_table('invoice_sequences',
+    sa.Column('prefix', sa.String(), nullable=False),
+    sa.Column('next_value', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('prefix')
+    )
+    op.create_table('invoice_reservations',
+    sa.Column('invoice_number', sa.String(), nullable=False),
+    sa.Column('prefix', sa.String(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('invoice_number')
+    )
+    op.create_index('ix_invoice_reservations_prefix_expires', 'invoice_reservations', ['prefix', 'expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_invoice_reservations_prefix_expires', table_name='invoice_reservations')
+    op.drop_table('invoice_reservations')
+    op.drop_table('invoice_sequences')
@@ -0,0 +1,46 @@
+"""added dashboard summary tables
+
+Revision ID: cdf39f920053
+Revises: 18662e2907f7
+Create Date: 2026-10-18 09:12:41.503117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cdf39f920053'
+down_revision: Union[str, Sequence[str], None] = '18662e2907f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('dashboard_summary',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('total_medicines', sa.Integer(), nullable=True),
+    sa.Column('low_stock_count', sa.Integer(), nullable=True),
+    sa.Column('total_due', sa.Float(), nullable=True),
+    sa.Column('total_supplier_due', sa.Float(), nullable=True),
+    sa.Column('rebuilt_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('daily_sales_summary',
+    sa.Column('summary_date', sa.Date(), nullable=False),
+    sa.Column('total_sales', sa.Float(), nullable=True),
+    sa.Column('sale_count', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('summary_date')
+    )
+    op.create_index(op.f('ix_medicines_stock_quantity'), 'medicines', ['stock_quantity'], unique=False)
+    # The counters are filled on first dashboard load (or POST /api/reports/summary/rebuild/)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_medicines_stock_quantity'), table_name='medicines')
+    op.drop_table('daily_sales_summary')
+    op.drop_table('dashboard_summary')
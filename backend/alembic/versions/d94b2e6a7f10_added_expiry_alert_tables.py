@@ -0,0 +1,54 @@
+"""added expiry alert tables
+
+Revision ID: d94b2e6a7f10
+Revises: 7c3e9b1f4a62
+Create Date: 2026-10-18 14:41:09.562817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd94b2e6a7f10'
+down_revision: Union[str, Sequence[str], None] = '7c3e9b1f4a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_medicine_batches_expiry_in_stock', 'medicine_batches', ['expiry_date', 'medicine_id'], unique=False,
+        postgresql_where=sa.text('batch_quantity > 0'), sqlite_where=sa.text('batch_quantity > 0')
+    )
+    op.create_table('expiry_alerts',
+    sa.Column('batch_id', sa.Integer(), nullable=False),
+    sa.Column('medicine_id', sa.Integer(), nullable=True),
+    sa.Column('expiry_date', sa.Date(), nullable=True),
+    sa.Column('bucket', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['batch_id'], ['medicine_batches.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['medicine_id'], ['medicines.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('batch_id')
+    )
+    op.create_index(op.f('ix_expiry_alerts_medicine_id'), 'expiry_alerts', ['medicine_id'], unique=False)
+    op.create_index('ix_expiry_alerts_bucket_expiry', 'expiry_alerts', ['bucket', 'expiry_date'], unique=False)
+    op.create_table('expiry_sweep',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('swept_on', sa.Date(), nullable=True),
+    sa.Column('swept_at', sa.DateTime(), nullable=True),
+    sa.Column('alert_count', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # The first read (or the sweeper at startup) fills expiry_alerts
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('expiry_sweep')
+    op.drop_index('ix_expiry_alerts_bucket_expiry', table_name='expiry_alerts')
+    op.drop_index(op.f('ix_expiry_alerts_medicine_id'), table_name='expiry_alerts')
+    op.drop_table('expiry_alerts')
+    op.drop_index('ix_medicine_batches_expiry_in_stock', table_name='medicine_batches')
@@ -0,0 +1,80 @@
+"""added sale_item_batches table
+
+Revision ID: e148f2c740cb
+Revises: 3b9e51d7a2c4
+Create Date: 2026-10-18 11:26:53.871402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e148f2c740cb'
+down_revision: Union[str, Sequence[str], None] = '3b9e51d7a2c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('medicine_batches', sa.Column('purchase_price', sa.Float(), nullable=True))
+    op.execute(
+        "UPDATE medicine_batches SET purchase_price = "
+        "(SELECT medicines.purchase_price FROM medicines WHERE medicines.id = medicine_batches.medicine_id)"
+    )
+    op.create_index(
+        'ix_medicine_batches_fefo', 'medicine_batches', ['medicine_id', 'expiry_date'], unique=False,
+        postgresql_where=sa.text('batch_quantity > 0'), sqlite_where=sa.text('batch_quantity > 0')
+    )
+    op.create_table('sale_item_batches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sale_item_id', sa.Integer(), nullable=True),
+    sa.Column('batch_id', sa.Integer(), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=True),
+    sa.Column('unit_cost', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['batch_id'], ['medicine_batches.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['sale_item_id'], ['sale_items.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sale_item_batches_id'), 'sale_item_batches', ['id'], unique=False)
+    op.create_index(op.f('ix_sale_item_batches_sale_item_id'), 'sale_item_batches', ['sale_item_id'], unique=False)
+    op.create_index(op.f('ix_sale_item_batches_batch_id'), 'sale_item_batches', ['batch_id'], unique=False)
+
+    # Batches were never decremented on sale before this revision. Trim them
+    # FEFO-style so each medicine's in-stock batches add up to its stock.
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT b.id, b.medicine_id, b.batch_quantity, m.stock_quantity "
+        "FROM medicine_batches b JOIN medicines m ON m.id = b.medicine_id "
+        "WHERE b.batch_quantity > 0 "
+        "ORDER BY b.medicine_id, b.expiry_date, b.id"
+    )).fetchall()
+    totals = {}
+    stock = {}
+    for _, medicine_id, batch_quantity, stock_quantity in rows:
+        totals[medicine_id] = totals.get(medicine_id, 0) + batch_quantity
+        stock[medicine_id] = stock_quantity or 0
+    excess = {medicine_id: total - stock[medicine_id] for medicine_id, total in totals.items()}
+    for batch_id, medicine_id, batch_quantity, _ in rows:
+        over = excess.get(medicine_id, 0)
+        if over <= 0:
+            continue
+        take = min(over, batch_quantity)
+        bind.execute(
+            sa.text("UPDATE medicine_batches SET batch_quantity = batch_quantity - :take WHERE id = :id"),
+            {"take": take, "id": batch_id}
+        )
+        excess[medicine_id] = over - take
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_sale_item_batches_batch_id'), table_name='sale_item_batches')
+    op.drop_index(op.f('ix_sale_item_batches_sale_item_id'), table_name='sale_item_batches')
+    op.drop_index(op.f('ix_sale_item_batches_id'), table_name='sale_item_batches')
+    op.drop_table('sale_item_batches')
+    op.drop_index('ix_medicine_batches_fefo', table_name='medicine_batches')
+    op.drop_column('medicine_batches', 'purchase_price')
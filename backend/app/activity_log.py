@@ -0,0 +1,174 @@
+import datetime
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+# Activity logs are written off the request path. crud.create_activity_log
+# enqueues a row and returns; a writer thread (started and drained by the app
+# lifespan in main.py) inserts queued rows in multi-row batches every
+# ACTIVITY_LOG_FLUSH_MS or as soon as ACTIVITY_LOG_BATCH_SIZE rows are waiting.
+# When the writer is not running (scripts, one-off sessions) rows are written
+# immediately.
+# A row logged while its session still has uncommitted writes is held in
+# session.info and enqueued only when that transaction commits; a rollback
+# drops it, so no entry is written for a change that never happened.
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_MS = int(os.getenv("ACTIVITY_LOG_FLUSH_MS", "200"))
+BATCH_SIZE = int(os.getenv("ACTIVITY_LOG_BATCH_SIZE", "100"))
+MAX_QUEUE = int(os.getenv("ACTIVITY_LOG_MAX_QUEUE", "50000"))
+
+PENDING_KEY = "activity_logs_pending"
+WRITES_KEY = "activity_logs_uncommitted_writes"
+
+
+class ActivityLogWriter:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._queue = deque()  # (enqueued_at monotonic, row)
+        self._thread = None
+        self._stopping = False
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failures = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.max_latency_ms = 0.0  # Longest enqueue-to-commit delay seen
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush everything still queued and stop the writer thread."""
+        if not self.running:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def enqueue(self, user_id: int, action: str, details: str = None):
+        row = {
+            "user_id": user_id,
+            "action": action,
+            "details": details,
+            "timestamp": datetime.datetime.utcnow()
+        }
+        if not self.running:
+            self._write([(time.monotonic(), row)])
+            return
+        with self._cond:
+            if len(self._queue) >= MAX_QUEUE:
+                self.dropped += 1
+                return
+            self._queue.append((time.monotonic(), row))
+            self.enqueued += 1
+            if len(self._queue) >= BATCH_SIZE:
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or len(self._queue) >= BATCH_SIZE,
+                    timeout=FLUSH_INTERVAL_MS / 1000
+                )
+                batch = [self._queue.popleft() for _ in range(min(len(self._queue), BATCH_SIZE))]
+                stopping = self._stopping and not self._queue
+            if batch:
+                self._write(batch)
+            if stopping:
+                return
+
+    def _write(self, batch):
+        start = time.monotonic()
+        db = SessionLocal()
+        try:
+            db.execute(insert(models.ActivityLog.__table__), [row for _, row in batch])
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.failures += 1
+            logger.exception("Dropped %s activity log rows", len(batch))
+            return
+        finally:
+            db.close()
+        done = time.monotonic()
+        self.flushes += 1
+        self.written += len(batch)
+        self.last_flush_ms = (done - start) * 1000
+        self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+        self.max_latency_ms = max(self.max_latency_ms, (done - batch[0][0]) * 1000)
+
+    def stats(self):
+        with self._cond:
+            depth = len(self._queue)
+            oldest_ms = (time.monotonic() - self._queue[0][0]) * 1000 if self._queue else 0.0
+        return {
+            "running": self.running,
+            "queue_depth": depth,
+            "oldest_queued_ms": round(oldest_ms, 1),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "max_latency_ms": round(self.max_latency_ms, 2),
+            "flush_interval_ms": FLUSH_INTERVAL_MS,
+            "batch_size": BATCH_SIZE
+        }
+
+
+activity_writer = ActivityLogWriter()
+
+
+def log_after_commit(session: Session, user_id: int, action: str, details: str = None):
+    """Enqueue a row now, or when ``session`` commits if it has uncommitted writes."""
+    if session.new or session.dirty or session.deleted or session.info.get(WRITES_KEY):
+        session.info.setdefault(PENDING_KEY, []).append((user_id, action, details))
+        return
+    activity_writer.enqueue(user_id, action, details)
+
+
+@event.listens_for(Session, "after_flush")
+def _note_writes(session, flush_context):
+    session.info[WRITES_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_pending(session):
+    if session.in_nested_transaction():
+        return  # A released savepoint; the outer transaction can still roll back
+    session.info.pop(WRITES_KEY, None)
+    for user_id, action, details in session.info.pop(PENDING_KEY, ()):
+        activity_writer.enqueue(user_id, action, details)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session):
+    if session.in_nested_transaction():
+        return
+    session.info.pop(WRITES_KEY, None)
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,170 @@
+import asyncio
+import csv
+import datetime
+import gzip
+import logging
+import os
+import re
+
+from sqlalchemy import delete, func, text
+from sqlalchemy.orm import Session
+
+from . import models
+from .date_ranges import add_months
+from .database import SessionLocal
+
+# Partition upkeep and retention for activity_logs.
+# PostgreSQL: the table is range-partitioned by month on timestamp
+# (activity_logs_pYYYYMM, plus activity_logs_default). ensure_partitions()
+# creates the upcoming months; archive_old_logs() copies every month older
+# than ACTIVITY_LOG_RETENTION_MONTHS to a gzipped CSV and then detaches and
+# drops that partition. SQLite: a plain table, archived month by month
+# with DELETE.
+# run_maintenance() does both at startup and then daily, from the app lifespan.
+# Retention is off unless ACTIVITY_LOG_RETENTION_MONTHS is set, and it refuses
+# to run without an absolute ACTIVITY_LOG_ARCHIVE_DIR (a persistent volume,
+# see docker-compose.yml), since the archive is the only copy left.
+
+logger = logging.getLogger(__name__)
+
+RETENTION_MONTHS = int(os.getenv("ACTIVITY_LOG_RETENTION_MONTHS", "0"))  # 0 keeps everything
+ARCHIVE_DIR = os.getenv("ACTIVITY_LOG_ARCHIVE_DIR", "")
+MONTHS_AHEAD = 2
+MAINTENANCE_INTERVAL_SECONDS = 24 * 60 * 60
+
+COLUMNS = ("id", "user_id", "action", "details", "timestamp")
+PARTITION_NAME = re.compile(r"^activity_logs_p(\d{4})(\d{2})$")
+
+
+def month_start(day) -> datetime.date:
+    return datetime.date(day.year, day.month, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"activity_logs_p{month.year:04d}{month.month:02d}"
+
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(db.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = CAST('activity_logs' AS regclass)"
+    )).first())
+
+
+def create_partition_sql(month: datetime.date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF activity_logs "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def ensure_partitions(db: Session, today: datetime.date = None):
+    """Create monthly partitions from this month through MONTHS_AHEAD months ahead."""
+    if not is_partitioned(db):
+        return []
+    current = month_start(today or datetime.date.today())
+    months = [add_months(current, offset) for offset in range(MONTHS_AHEAD + 1)]
+    for month in months:
+        db.execute(text(create_partition_sql(month)))
+    db.commit()
+    return [partition_name(month) for month in months]
+
+
+def _archive_path(month: datetime.date) -> str:
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    return os.path.join(ARCHIVE_DIR, f"{partition_name(month)}.csv.gz")
+
+
+def _write_archive(db: Session, source, month: datetime.date, where: str = "", params=None) -> int:
+    path = _archive_path(month)
+    rows = 0
+    # yield_per as an execution option streams from a server-side cursor
+    result = db.execute(
+        text(f"SELECT {', '.join(COLUMNS)} FROM {source} {where} ORDER BY id").execution_options(yield_per=5000),
+        params or {}
+    )
+    # Write to a temp name so a crash never leaves a truncated archive behind
+    with gzip.open(path + ".tmp", "wt", newline="") as archive:
+        writer = csv.writer(archive)
+        writer.writerow(COLUMNS)
+        for row in result:
+            writer.writerow(row)
+            rows += 1
+    os.replace(path + ".tmp", path)
+    return rows
+
+
+def archive_old_logs(db: Session, today: datetime.date = None, retention_months: int = None):
+    """Archive and remove every month older than the retention window."""
+    retention_months = RETENTION_MONTHS if retention_months is None else retention_months
+    if retention_months <= 0:
+        return []
+    if not os.path.isabs(ARCHIVE_DIR):
+        raise ValueError("Set ACTIVITY_LOG_ARCHIVE_DIR to an absolute path on persistent storage before archiving activity logs")
+    cutoff = add_months(month_start(today or datetime.date.today()), -retention_months)
+
+    archived = []
+    if is_partitioned(db):
+        partitions = db.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST('activity_logs' AS regclass) ORDER BY c.relname"
+        )).scalars().all()
+        for name in partitions:
+            match = PARTITION_NAME.match(name)
+            if not match:
+                continue  # The default partition is never archived
+            month = datetime.date(int(match.group(1)), int(match.group(2)), 1)
+            if month >= cutoff:
+                continue
+            rows = _write_archive(db, name, month)
+            db.execute(text(f"ALTER TABLE activity_logs DETACH PARTITION {name}"))
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+            archived.append({"month": month.isoformat(), "rows": rows, "file": _archive_path(month)})
+        return archived
+
+    oldest = db.query(func.min(models.ActivityLog.timestamp)).scalar()
+    if oldest is None:
+        return archived
+    month = month_start(oldest)
+    while month < cutoff:
+        next_month = add_months(month, 1)
+        bounds = {"start": datetime.datetime.combine(month, datetime.time.min),
+                  "end": datetime.datetime.combine(next_month, datetime.time.min)}
+        rows = _write_archive(db, "activity_logs", month, "WHERE timestamp >= :start AND timestamp < :end", bounds)
+        if rows:
+            db.execute(delete(models.ActivityLog).where(
+                models.ActivityLog.timestamp >= bounds["start"], models.ActivityLog.timestamp < bounds["end"]
+            ))
+            db.commit()
+            archived.append({"month": month.isoformat(), "rows": rows, "file": _archive_path(month)})
+        else:
+            os.remove(_archive_path(month))
+        month = next_month
+    return archived
+
+
+def _maintain_once():
+    db = SessionLocal()
+    try:
+        ensure_partitions(db)
+        try:
+            archived = archive_old_logs(db)
+        except ValueError as e:
+            logger.warning("Activity log retention skipped: %s", e)
+            return
+        for entry in archived:
+            logger.info("Archived %s activity logs for %s to %s", entry["rows"], entry["month"], entry["file"])
+    finally:
+        db.close()
+
+
+async def run_maintenance():
+    """Partition upkeep and retention at startup and then daily; cancelled at shutdown."""
+    while True:
+        try:
+            await asyncio.to_thread(_maintain_once)
+        except Exception:
+            logger.exception("Activity log maintenance failed")
+        await asyncio.sleep(MAINTENANCE_INTERVAL_SECONDS)
@@ -0,0 +1,112 @@
+from collections import defaultdict
+from datetime import date
+from typing import List, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session, joinedload
+
+from . import models
+
+# First-expiry-first-out allocation of sale lines to medicine batches.
+# plan_fefo() reads every candidate batch for a whole sale in one query (served
+# by ix_medicine_batches_fefo) and splits the lines in memory; the resulting
+# picks are applied to the SaleItems with apply_allocation(). Batches that have
+# expired by the sale date are never picked.
+
+
+def _sellable(sale_date: date):
+    return or_(models.MedicineBatch.expiry_date.is_(None), models.MedicineBatch.expiry_date >= sale_date)
+
+
+def expired_quantities(db: Session, medicine_ids, sale_date: date) -> dict:
+    """Units in batches that have expired by ``sale_date``, per medicine; these
+    are still counted in Medicine.stock_quantity but cannot be sold."""
+    if not medicine_ids:
+        return {}
+    rows = db.query(
+        models.MedicineBatch.medicine_id, func.sum(models.MedicineBatch.batch_quantity)
+    ).filter(
+        models.MedicineBatch.medicine_id.in_(set(medicine_ids)),
+        models.MedicineBatch.batch_quantity > 0,
+        models.MedicineBatch.expiry_date < sale_date
+    ).group_by(models.MedicineBatch.medicine_id).all()
+    return {medicine_id: quantity for medicine_id, quantity in rows}
+
+
+def plan_fefo(db: Session, lines: List[Tuple[int, int]], sale_date: date):
+    """Return, for each (medicine_id, quantity) line, a list of (batch, quantity) picks."""
+    medicine_ids = {medicine_id for medicine_id, _ in lines}
+    if not medicine_ids:
+        return []
+
+    batches = db.query(models.MedicineBatch).filter(
+        models.MedicineBatch.medicine_id.in_(medicine_ids),
+        models.MedicineBatch.batch_quantity > 0,
+        _sellable(sale_date)
+    ).order_by(
+        models.MedicineBatch.medicine_id,
+        models.MedicineBatch.expiry_date.asc(),
+        models.MedicineBatch.id.asc()
+    ).all()
+
+    by_medicine = defaultdict(list)
+    remaining = {}
+    for batch in batches:
+        by_medicine[batch.medicine_id].append(batch)
+        remaining[batch.id] = batch.batch_quantity
+
+    plan = []
+    for medicine_id, quantity in lines:
+        picks = []
+        needed = quantity
+        for batch in by_medicine[medicine_id]:
+            if needed <= 0:
+                break
+            take = min(needed, remaining[batch.id])
+            if take <= 0:
+                continue
+            picks.append((batch, take))
+            remaining[batch.id] -= take
+            needed -= take
+        plan.append(picks)
+    return plan
+
+
+def apply_allocation(db_item: models.SaleItem, picks, fallback_cost: float = None):
+    """Decrement the picked batches and record them against the sale item.
+
+    Stock that was never booked into a batch (e.g. legacy purchases) is sold
+    unallocated at the fallback cost.
+    """
+    allocated = 0
+    total_cost = 0.0
+    for batch, quantity in picks:
+        batch.batch_quantity -= quantity
+        unit_cost = batch.purchase_price if batch.purchase_price is not None else fallback_cost
+        db_item.allocations.append(models.SaleItemBatch(
+            batch_id=batch.id,
+            quantity=quantity,
+            unit_cost=unit_cost
+        ))
+        allocated += quantity
+        total_cost += quantity * (unit_cost or 0)
+
+    unallocated = db_item.quantity - allocated
+    if unallocated > 0:
+        total_cost += unallocated * (fallback_cost or 0)
+    if db_item.quantity:
+        db_item.cost_at_sale = total_cost / db_item.quantity
+
+
+def release_allocations(db: Session, sale_id: int):
+    """Return the batch stock consumed by a sale (used when the sale is deleted)."""
+    allocations = db.query(models.SaleItemBatch).join(
+        models.SaleItem, models.SaleItemBatch.sale_item_id == models.SaleItem.id
+    ).options(
+        joinedload(models.SaleItemBatch.batch)
+    ).filter(models.SaleItem.sale_id == sale_id).all()
+
+    for allocation in allocations:
+        if allocation.batch is not None:
+            allocation.batch.batch_quantity += allocation.quantity
+    return allocations
@@ -0,0 +1,40 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, schemas, summary
+
+# Async versions of the hot crud paths. Each one runs the existing sync
+# implementation through AsyncSession.run_sync, so the business logic and
+# the Session hooks (summary, typeahead, expiry) are shared with the sync
+# API while the I/O goes through the async driver. Results are converted to
+# schemas inside run_sync, where lazy loads are still allowed.
+
+
+def _page(data, schema):
+    data["items"] = [schema.model_validate(item) for item in data["items"]]
+    return data
+
+
+async def get_medicines(db: AsyncSession, **kwargs):
+    def run(session):
+        data = crud.get_medicines(session, **kwargs)
+        data["items"] = [
+            schemas.MedicineListItem.model_validate(item, from_attributes=True).model_dump(exclude_unset=True) for item in data["items"]
+        ]
+        return data
+    return await db.run_sync(run)
+
+
+async def get_sales(db: AsyncSession, **kwargs):
+    return await db.run_sync(lambda session: _page(crud.get_sales(session, **kwargs), schemas.Sale))
+
+
+async def create_sale(db: AsyncSession, sale: schemas.SaleCreate, user_id: int = None, user_role: str = None):
+    return await db.run_sync(
+        lambda session: schemas.Sale.model_validate(
+            crud.create_sale(session, sale=sale, user_id=user_id, user_role=user_role)
+        )
+    )
+
+
+async def get_dashboard_summary(db: AsyncSession):
+    return await db.run_sync(summary.build_dashboard_summary)
@@ -5,10 +5,10 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel
 
 from . import crud, models
+from .principals import principal_cache
 from .database import SessionLocal
 
 SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-here-change-in-production")
@@ -17,7 +17,6 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES",
 REFRESH_SECRET_KEY = os.environ.get("REFRESH_SECRET_KEY", "your-refresh-secret-key-here-change-in-production")
 REFRESH_TOKEN_EXPIRE_MINUTES = int(os.environ.get("REFRESH_TOKEN_EXPIRE_MINUTES", "10080"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
@@ -66,6 +65,17 @@ def get_db():
         db.close()
 
 
+def _load_principal(db, email: str, token_exp, credentials_exception):
+    # Cached principals skip the users query (see principals.py)
+    principal = principal_cache.get(email)
+    if principal is None:
+        user = crud.get_user_by_email(db, email=email)
+        if user is None:
+            raise credentials_exception
+        principal = principal_cache.put(user, token_exp)
+    return principal
+
+
 def get_current_user(
     db: SessionLocal = Depends(get_db), token: str = Depends(oauth2_scheme)
 ):
@@ -82,10 +92,7 @@ def get_current_user(
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
-    user = crud.get_user_by_email(db, email=token_data.email)
-    if user is None:
-        raise credentials_exception
-    return user
+    return _load_principal(db, token_data.email, payload.get("exp"), credentials_exception)
 
 
 def get_current_user_from_refresh_token(
@@ -104,10 +111,7 @@ def get_current_user_from_refresh_token(
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
-    user = crud.get_user_by_email(db, email=token_data.email)
-    if user is None:
-        raise credentials_exception
-    return user
+    return _load_principal(db, token_data.email, payload.get("exp"), credentials_exception)
 
 
 def get_current_active_user(current_user: models.User = Depends(get_current_user)):
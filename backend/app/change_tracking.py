@@ -0,0 +1,46 @@
+from sqlalchemy import event, inspect
+
+from . import models
+
+# Shared by the session hooks that keep running totals in step with the base
+# tables (summary.py for the dashboard, supplier_ledger.py for supplier
+# balances): each needs a row's value from before the flush to take its old
+# contribution back out.
+
+# Columns whose previous value those hooks need
+TRACKED_ATTRIBUTES = {
+    models.Sale: ("due_amount", "total_amount", "sale_date"),
+    models.Purchase: ("total_amount", "invoice_discount", "paid_amount", "payment_status", "supplier_id"),
+    models.Medicine: ("stock_quantity",),
+}
+
+
+def _load_previous_on_set(target, value, oldvalue, initiator):
+    return value
+
+
+# active_history: assigning one of these loads its committed value first when
+# the attribute was expired or never loaded (e.g. after a commit), so the
+# history always carries the value being replaced
+for _cls, _attributes in TRACKED_ATTRIBUTES.items():
+    for _attribute in _attributes:
+        event.listen(getattr(_cls, _attribute), "set", _load_previous_on_set, active_history=True, retval=True)
+
+
+def previous_value(obj, attr):
+    """Value of ``attr`` as it was before the pending changes (the stored value)."""
+    hist = inspect(obj).attrs[attr].history
+    if hist.deleted:
+        return hist.deleted[0]
+    if hist.unchanged:
+        return hist.unchanged[0]
+    if hist.added:
+        return None  # Loaded as NULL (active_history) and then set
+    return getattr(obj, attr)  # Not loaded and not modified: the stored value
+
+
+def purchase_due(total_amount, invoice_discount, paid_amount, payment_status):
+    """What is still owed on a purchase with these values."""
+    if payment_status == "paid":
+        return 0.0
+    return max(0, (total_amount or 0) - (invoice_discount or 0) - (paid_amount or 0))
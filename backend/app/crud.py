@@ -1,21 +1,12 @@
 import datetime
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 from typing import Optional
-from . import models, schemas
-from passlib.context import CryptContext
+from . import allocation, customers, date_ranges, expiry, invoice_sequence, mail, models, pagination, schemas, summary, supplier_ledger, typeahead  # expiry/summary/supplier_ledger/typeahead register session hooks
+from .activity_log import log_after_commit
+from .passwords import get_password_hash
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, select
 
 # ==================== Medicine CRUD ====================
 
@@ -29,8 +20,41 @@ def get_medicine_by_name(db: Session, name: str):
     return db.query(models.Medicine).filter(func.lower(models.Medicine.name) == name.lower()).first()
 
 
-def get_medicines(db: Session, skip: int = 0, limit: int = 100, search: str = None, stock_status: str = None, manufacturer: str = None):
-    query = db.query(models.Medicine)
+MEDICINE_LIST_FIELDS = (
+    "id", "name", "generic_name", "manufacturer", "strength", "medicine_type",
+    "purchase_price", "selling_price", "stock_quantity", "batch_count", "next_expiry"
+)
+
+
+def _medicine_list_columns():
+    columns = {field: getattr(models.Medicine, field) for field in MEDICINE_LIST_FIELDS[:9]}
+    # Batch stats are correlated per medicine row, so they only run for the page
+    columns["batch_count"] = select(func.count(models.MedicineBatch.id)).where(
+        models.MedicineBatch.medicine_id == models.Medicine.id
+    ).scalar_subquery().label("batch_count")
+    columns["next_expiry"] = select(func.min(models.MedicineBatch.expiry_date)).where(
+        models.MedicineBatch.medicine_id == models.Medicine.id,
+        models.MedicineBatch.batch_quantity > 0
+    ).scalar_subquery().label("next_expiry")
+    return columns
+
+
+def get_medicines(db: Session, skip: int = 0, limit: int = 100, search: str = None, stock_status: str = None, manufacturer: str = None, after: str = None, count: str = None, fields: list = None, include_batches: bool = False):
+    """List medicines as slim rows (columns plus batch stats), not ORM objects.
+
+    ``fields`` limits the selected columns (id is always returned) and
+    ``include_batches`` attaches each medicine's batches with one extra query.
+    """
+    columns = _medicine_list_columns()
+    if fields:
+        unknown = [field for field in fields if field not in columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        selected = ["id"] + [field for field in MEDICINE_LIST_FIELDS if field in fields and field != "id"]
+    else:
+        selected = list(MEDICINE_LIST_FIELDS)
+
+    query = db.query(*[columns[field] for field in selected])
     if search:
         search_fmt = f"%{search}%"
         query = query.filter(
@@ -44,14 +68,26 @@ def get_medicines(db: Session, skip: int = 0, limit: int = 100, search: str = No
         m_fmt = f"%{manufacturer}%"
         query = query.filter(models.Medicine.manufacturer.ilike(m_fmt))
     
-    total = query.count()
-    items = query.options(
-        joinedload(models.Medicine.batches)
-    ).offset(skip).limit(limit).all()
-    return {"items": items, "total": total}
-
-
-def create_medicine(db: Session, medicine: schemas.MedicineCreate, user_id: int = None):
+    data = pagination.paginate(query, models.Medicine.id, skip=skip, limit=limit, after=after, count=count)
+    items = [dict(row._mapping) for row in data["items"]]
+
+    if include_batches and items:
+        batches = db.query(models.MedicineBatch).options(
+            joinedload(models.MedicineBatch.unit)
+        ).filter(
+            models.MedicineBatch.medicine_id.in_([item["id"] for item in items])
+        ).order_by(models.MedicineBatch.expiry_date, models.MedicineBatch.id).all()
+        by_medicine = {item["id"]: [] for item in items}
+        for batch in batches:
+            by_medicine[batch.medicine_id].append(batch)
+        for item in items:
+            item["batches"] = by_medicine[item["id"]]
+
+    data["items"] = items
+    return data
+
+
+def create_medicine(db: Session, medicine: schemas.MedicineCreate, user_id: int = None, user_role: str = None):
     db_medicine = models.Medicine(
         name=medicine.name,
         generic_name=medicine.generic_name,
@@ -67,7 +103,7 @@ def create_medicine(db: Session, medicine: schemas.MedicineCreate, user_id: int
     db.refresh(db_medicine)
     
     if user_id:
-        create_activity_log(db, user_id, "Created Medicine", f"Created medicine: {medicine.name}")
+        create_activity_log(db, user_id, "Created Medicine", f"Created medicine: {medicine.name}", role=user_role)
         
     return db_medicine
 
@@ -96,13 +132,14 @@ def get_medicine_batch(db: Session, batch_id: int):
     return db.query(models.MedicineBatch).filter(models.MedicineBatch.id == batch_id).first()
 
 
-def get_medicine_batches(db: Session, medicine_id: Optional[int] = None, skip: int = 0, limit: int = 100):
+def get_medicine_batches(db: Session, medicine_id: Optional[int] = None, skip: int = 0, limit: int = 100, after: str = None, count: str = None):
     query = db.query(models.MedicineBatch)
     if medicine_id:
         query = query.filter(models.MedicineBatch.medicine_id == medicine_id)
-    total = query.count()
-    items = query.order_by(models.MedicineBatch.expiry_date.asc()).offset(skip).limit(limit).all()
-    return {"items": items, "total": total}
+    return pagination.paginate(
+        query, models.MedicineBatch.id, sort_column=models.MedicineBatch.expiry_date,
+        skip=skip, limit=limit, after=after, count=count
+    )
 
 
 def create_medicine_batch(db: Session, batch: schemas.MedicineBatchCreate):
@@ -150,8 +187,8 @@ def delete_medicine_batch(db: Session, batch_id: int):
 
 # ==================== Purchase CRUD ====================
 
-def get_purchases(db: Session, skip: int = 0, limit: int = 100, search: str = None, payment_status: str = None):
-    query = db.query(models.Purchase)
+def get_purchases(db: Session, skip: int = 0, limit: int = 100, search: str = None, payment_status: str = None, after: str = None, count: str = None, start: datetime.date = None, end: datetime.date = None):
+    query = db.query(models.Purchase).filter(*date_ranges.predicates(models.Purchase.purchase_date, start, end))
     if search:
         search_fmt = f"%{search}%"
         query = query.filter(
@@ -163,16 +200,15 @@ def get_purchases(db: Session, skip: int = 0, limit: int = 100, search: str = No
     if payment_status and payment_status != 'all':
         query = query.filter(models.Purchase.payment_status == payment_status)
 
-    total = query.count()
-    items = query.options(
-        joinedload(models.Purchase.items).joinedload(models.PurchaseItem.medicine)
-    ).offset(skip).limit(limit).all()
-    return {"items": items, "total": total}
+    # selectinload keeps LIMIT on the purchases themselves instead of a subquery
+    query = query.options(selectinload(models.Purchase.items).joinedload(models.PurchaseItem.medicine))
+    return pagination.paginate(query, models.Purchase.id, skip=skip, limit=limit, after=after, count=count)
 
 
-def create_purchase(db: Session, purchase: schemas.PurchaseCreate, user_id: int = None):
+def create_purchase(db: Session, purchase: schemas.PurchaseCreate, user_id: int = None, user_role: str = None):
     db_purchase = models.Purchase(
         supplier_name=purchase.supplier_name,
+        supplier=supplier_ledger.get_or_create_supplier(db, purchase.supplier_name),
         purchase_date=purchase.purchase_date,
         total_amount=0
     )
@@ -195,15 +231,147 @@ def create_purchase(db: Session, purchase: schemas.PurchaseCreate, user_id: int
     db.refresh(db_purchase)
     
     if user_id:
-        create_activity_log(db, user_id, "Created Purchase", f"Invoice: {purchase.invoice_number}, Supplier: {purchase.supplier_name}")
+        create_activity_log(db, user_id, "Created Purchase", f"Invoice: {purchase.invoice_number}, Supplier: {purchase.supplier_name}", role=user_role)
         
     return db_purchase
 
 
+def get_medicines_by_names(db: Session, names):
+    """Resolve many medicine names in one query (served by ix_medicines_name_lower)."""
+    lowered = {name.lower() for name in names if name}
+    if not lowered:
+        return {}
+    medicines = db.query(models.Medicine).filter(
+        func.lower(models.Medicine.name).in_(lowered)
+    ).order_by(models.Medicine.id).all()
+    by_name = {}
+    for medicine in medicines:
+        by_name.setdefault(medicine.name.lower(), medicine)
+    return by_name
+
+
+def create_purchase_invoice(db: Session, invoice: schemas.PurchaseInvoiceCreate, user_id: int = None):
+    """Ingest a supplier invoice: resolve medicines, add batches and purchase items, commit once."""
+    db_purchase = db.query(models.Purchase).filter(
+        models.Purchase.invoice_number == invoice.invoice_number
+    ).first()
+    if not db_purchase:
+        try:
+            invoice_sequence.check_reservation(db, invoice.invoice_number, user_id)
+        except ValueError:
+            db.rollback()
+            raise
+
+    supplier = supplier_ledger.get_or_create_supplier(db, invoice.supplier_name)
+    if not db_purchase:
+        db_purchase = models.Purchase(
+            supplier_name=invoice.supplier_name,
+            supplier=supplier,
+            invoice_number=invoice.invoice_number,
+            purchase_date=invoice.purchase_date,
+            total_amount=0,
+            invoice_discount=invoice.invoice_discount,
+            discount_type=invoice.discount_type,
+            paid_amount=0,
+            payment_status="unpaid"
+        )
+        db.add(db_purchase)
+    else:
+        db_purchase.invoice_discount = invoice.invoice_discount
+        db_purchase.discount_type = invoice.discount_type
+    # paid_amount on the invoice is the total paid so far; the difference is a dated payment
+    supplier_ledger.record_payment(
+        db, db_purchase, invoice.paid_amount - (db_purchase.paid_amount or 0), invoice.purchase_date, note="Paid on invoice"
+    )
+
+    # Resolve every medicine on the invoice with two queries
+    by_name = get_medicines_by_names(db, [item.medicine_name for item in invoice.items])
+    ids = {item.medicine_id for item in invoice.items if not item.medicine_name and item.medicine_id}
+    by_id = {}
+    if ids:
+        by_id = {m.id: m for m in db.query(models.Medicine).filter(models.Medicine.id.in_(ids)).all()}
+    missing = ids - by_id.keys()
+    if missing:
+        db.rollback()
+        raise ValueError(f"Medicine not found: {', '.join(str(i) for i in sorted(missing))}")
+    # Stock is incremented below; lock the rows (and reload them) so a
+    # concurrent sale or invoice cannot overwrite the new quantity
+    lock_medicines(db, [medicine.id for medicine in by_name.values()] + list(by_id))
+
+    total_invoice_amount = db_purchase.total_amount or 0
+    for item in invoice.items:
+        if item.medicine_name:
+            medicine = by_name.get(item.medicine_name.lower())
+            if medicine:
+                medicine.generic_name = item.generic_name
+                medicine.manufacturer = item.manufacturer
+                medicine.strength = item.strength
+                medicine.medicine_type = item.medicine_type
+            else:
+                medicine = models.Medicine(
+                    name=item.medicine_name,
+                    generic_name=item.generic_name,
+                    manufacturer=item.manufacturer,
+                    strength=item.strength,
+                    medicine_type=item.medicine_type,
+                    stock_quantity=0
+                )
+                db.add(medicine)
+                by_name[item.medicine_name.lower()] = medicine
+        elif item.medicine_id:
+            medicine = by_id[item.medicine_id]
+            # Update existing medicine details if provided
+            if item.generic_name: medicine.generic_name = item.generic_name
+            if item.manufacturer: medicine.manufacturer = item.manufacturer
+            if item.strength: medicine.strength = item.strength
+            if item.medicine_type: medicine.medicine_type = item.medicine_type
+        else:
+            db.rollback()
+            raise ValueError("Each invoice line needs a medicine_name or medicine_id")
+
+        medicine.purchase_price = item.medicine_purchase_price
+        medicine.selling_price = item.medicine_selling_price
+        medicine.stock_quantity = (medicine.stock_quantity or 0) + item.quantity
+
+        db.add(models.MedicineBatch(
+            medicine=medicine,
+            supplier_name=invoice.supplier_name,
+            supplier=supplier,
+            batch_quantity=item.quantity,
+            unit_id=item.unit_id,
+            per_product_discount=item.per_product_discount,
+            discount_type=item.discount_type,
+            invoice_number=invoice.invoice_number,
+            expiry_date=item.expiry_date,
+            purchase_date=invoice.purchase_date,
+            total_batch_discount=item.total_batch_discount,
+            selling_price=item.medicine_selling_price, # Saving selling price to batch
+            purchase_price=item.medicine_purchase_price
+        ))
+        db_purchase.items.append(models.PurchaseItem(
+            medicine=medicine,
+            quantity=item.quantity,
+            price_at_purchase=item.medicine_purchase_price,
+            expiry_date=item.expiry_date,
+            selling_price=item.medicine_selling_price
+        ))
+        total_invoice_amount += (item.quantity * item.medicine_purchase_price)
+
+    # Update totals and payment status
+    db_purchase.total_amount = total_invoice_amount
+    db_purchase.payment_status = supplier_ledger.payment_status(db_purchase)
+    invoice_sequence.release(db, invoice.invoice_number)
+
+    db.commit()
+    db.refresh(db_purchase)
+    return db_purchase
+
+
 # ==================== Sale CRUD ====================
 
-def get_sales(db: Session, skip: int = 0, limit: int = 100, filter_type: str = None, date_filter: str = None):
-    query = db.query(models.Sale)
+def get_sales(db: Session, skip: int = 0, limit: int = 100, filter_type: str = None, date_filter: str = None, after: str = None, count: str = None, start: datetime.date = None, end: datetime.date = None):
+    # start/end is a half-open range from date_ranges.resolve
+    query = db.query(models.Sale).filter(*date_ranges.predicates(models.Sale.sale_date, start, end))
     
     if filter_type == 'due':
         query = query.filter(models.Sale.due_amount > 0)
@@ -216,12 +384,48 @@ def get_sales(db: Session, skip: int = 0, limit: int = 100, filter_type: str = N
     if date_filter:
         query = query.filter(models.Sale.sale_date == date_filter)
 
-    total = query.count()
-    items = query.order_by(models.Sale.sale_date.desc()).offset(skip).limit(limit).all()
-    return {"items": items, "total": total}
+    query = query.options(selectinload(models.Sale.items).joinedload(models.SaleItem.medicine))
+    return pagination.paginate(
+        query, models.Sale.id, sort_column=models.Sale.sale_date, descending=True,
+        skip=skip, limit=limit, after=after, count=count
+    )
+
+
+def lock_medicines(db: Session, medicine_ids):
+    """Load and row-lock medicines in id order, so concurrent checkouts cannot deadlock.
+
+    populate_existing refreshes rows already in the session with the values read under the lock.
+    """
+    medicines = db.query(models.Medicine).filter(
+        models.Medicine.id.in_(sorted(set(medicine_ids)))
+    ).order_by(models.Medicine.id).with_for_update().populate_existing().all()
+    return {medicine.id: medicine for medicine in medicines}
+
+
+def create_sale(db: Session, sale: schemas.SaleCreate, user_id: int = None, user_role: str = None):
+    # Lock every medicine on the bill up front; stock is checked and
+    # decremented under these locks and the sale is committed once.
+    medicines = lock_medicines(db, [item.medicine_id for item in sale.items])
 
+    requested = {}
+    for item_data in sale.items:
+        requested[item_data.medicine_id] = requested.get(item_data.medicine_id, 0) + item_data.quantity
+
+    # Units in expired batches are still in stock_quantity but cannot be sold
+    expired = allocation.expired_quantities(db, requested, sale.sale_date)
+    shortfalls = []
+    for medicine_id, quantity in requested.items():
+        medicine = medicines.get(medicine_id)
+        if not medicine:
+            shortfalls.append(f"medicine {medicine_id} not found")
+            continue
+        available = (medicine.stock_quantity or 0) - expired.get(medicine_id, 0)
+        if available < quantity:
+            shortfalls.append(f"{medicine.name} (requested {quantity}, available {max(available, 0)})")
+    if shortfalls:
+        db.rollback()
+        raise ValueError("Not enough stock: " + "; ".join(shortfalls))
 
-def create_sale(db: Session, sale: schemas.SaleCreate, user_id: int = None):
     db_sale = models.Sale(
         sale_date=sale.sale_date,
         buyer_name=sale.buyer_name,
@@ -233,18 +437,13 @@ def create_sale(db: Session, sale: schemas.SaleCreate, user_id: int = None):
         total_amount=0,
         due_amount=0
     )
-    db.add(db_sale)
-    db.commit()
-    db.refresh(db_sale)
 
-    subtotal_after_item_discounts = 0
-    for item_data in sale.items:
-        medicine = get_medicine(db, item_data.medicine_id)
-        if not medicine or medicine.stock_quantity < item_data.quantity:
-            db.delete(db_sale)
-            db.commit()
-            raise ValueError(f"Not enough stock for medicine {item_data.medicine_id}")
+    # Split every line across unexpired batches, earliest expiry first
+    plan = allocation.plan_fefo(db, [(item.medicine_id, item.quantity) for item in sale.items], sale.sale_date)
 
+    subtotal_after_item_discounts = 0
+    for item_data, picks in zip(sale.items, plan):
+        medicine = medicines[item_data.medicine_id]
         price_at_sale = medicine.selling_price
         
         # Calculate Item Discount
@@ -259,10 +458,10 @@ def create_sale(db: Session, sale: schemas.SaleCreate, user_id: int = None):
 
         db_item = models.SaleItem(
             **item_data.dict(),
-            sale_id=db_sale.id,
             price_at_sale=price_at_sale
         )
-        db.add(db_item)
+        allocation.apply_allocation(db_item, picks, fallback_cost=medicine.purchase_price)
+        db_sale.items.append(db_item)
         medicine.stock_quantity -= item_data.quantity
 
     # Calculate Global Discount on the remaining subtotal
@@ -274,21 +473,26 @@ def create_sale(db: Session, sale: schemas.SaleCreate, user_id: int = None):
     final_total = max(0, subtotal_after_item_discounts - global_discount_val)
     db_sale.total_amount = final_total
     db_sale.due_amount = max(0, final_total - sale.amount_paid)
+    db.add(db_sale)  # Sale, items and batch allocations are inserted in one flush
+    customers.record_sale(db, db_sale)
     db.commit()
     db.refresh(db_sale)
     
     if user_id:
-        create_activity_log(db, user_id, "Created Sale", f"Sale ID: {db_sale.id}, Final Total: {final_total}")
+        create_activity_log(db, user_id, "Created Sale", f"Sale ID: {db_sale.id}, Final Total: {final_total}", role=user_role)
         
     return db_sale
 
 
 def update_sale_payment(db: Session, sale_id: int, sale_update: schemas.SaleUpdate):
-    db_sale = db.query(models.Sale).filter(models.Sale.id == sale_id).first()
+    # Locked so that two payments on one sale cannot both start from the same due
+    db_sale = db.query(models.Sale).filter(models.Sale.id == sale_id).with_for_update().populate_existing().first()
     if db_sale:
+        previous_due = db_sale.due_amount
         # ADD the new payment to the previously paid amount
         db_sale.amount_paid += sale_update.amount_paid
         db_sale.due_amount = max(0, db_sale.total_amount - db_sale.amount_paid)
+        customers.record_payment(db, db_sale, previous_due)
         db.commit()
         db.refresh(db_sale)
     return db_sale
@@ -297,8 +501,10 @@ def update_sale_payment(db: Session, sale_id: int, sale_update: schemas.SaleUpda
 def delete_sale(db: Session, sale_id: int):
     db_sale = db.query(models.Sale).filter(models.Sale.id == sale_id).first()
     if db_sale:
+        allocation.release_allocations(db, sale_id)
+        customers.record_deletion(db, db_sale)
         for item in db_sale.items:
-            medicine = db.query(models.Medicine).filter(models.Medicine.id == item.medicine_id).first()
+            medicine = item.medicine
             if medicine:
                 medicine.stock_quantity += item.quantity
         db.delete(db_sale)
@@ -308,13 +514,11 @@ def delete_sale(db: Session, sale_id: int):
 
 # ==================== Employee CRUD ====================
 
-def get_employees(db: Session, skip: int = 0, limit: int = 100, search: str = None):
+def get_employees(db: Session, skip: int = 0, limit: int = 100, search: str = None, after: str = None, count: str = None):
     query = db.query(models.Employee)
     if search:
         query = query.filter(models.Employee.name.ilike(f"%{search}%"))
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
-    return {"items": items, "total": total}
+    return pagination.paginate(query, models.Employee.id, skip=skip, limit=limit, after=after, count=count)
 
 
 def create_employee(db: Session, employee: schemas.EmployeeCreate):
@@ -345,11 +549,9 @@ def delete_employee(db: Session, employee_id: int):
 
 # ==================== Employee Bill CRUD ====================
 
-def get_employee_bills(db: Session, skip: int = 0, limit: int = 100):
+def get_employee_bills(db: Session, skip: int = 0, limit: int = 100, after: str = None, count: str = None):
     query = db.query(models.EmployeeBill)
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
-    return {"items": items, "total": total}
+    return pagination.paginate(query, models.EmployeeBill.id, skip=skip, limit=limit, after=after, count=count)
 
 
 def create_employee_bill(db: Session, bill: schemas.EmployeeBillCreate):
@@ -363,13 +565,11 @@ def create_employee_bill(db: Session, bill: schemas.EmployeeBillCreate):
 
 # ==================== Shareholder CRUD ====================
 
-def get_shareholders(db: Session, skip: int = 0, limit: int = 100, search: str = None):
+def get_shareholders(db: Session, skip: int = 0, limit: int = 100, search: str = None, after: str = None, count: str = None):
     query = db.query(models.Shareholder)
     if search:
         query = query.filter(models.Shareholder.name.ilike(f"%{search}%"))
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
-    return {"items": items, "total": total}
+    return pagination.paginate(query, models.Shareholder.id, skip=skip, limit=limit, after=after, count=count)
 
 def get_shareholder(db: Session, shareholder_id: int):
     return db.query(models.Shareholder).filter(models.Shareholder.id == shareholder_id).first()
@@ -383,14 +583,13 @@ def create_shareholder(db: Session, shareholder: schemas.ShareholderCreate):
 
 # ==================== Investment CRUD ====================
 
-def get_investments(db: Session, skip: int = 0, limit: int = 100):
+def get_investments(db: Session, skip: int = 0, limit: int = 100, after: str = None, count: str = None):
     query = db.query(models.Investment)
-    total = query.count()
-    items = query.options(joinedload(models.Investment.shareholder)).offset(skip).limit(limit).all()
-    return {"items": items, "total": total}
+    query = query.options(joinedload(models.Investment.shareholder))
+    return pagination.paginate(query, models.Investment.id, skip=skip, limit=limit, after=after, count=count)
 
 
-def create_investment(db: Session, investment: schemas.InvestmentCreate, user_id: int = None):
+def create_investment(db: Session, investment: schemas.InvestmentCreate, user_id: int = None, user_role: str = None):
     # Logic to handle Shareholder creation from User ID if provided
     final_shareholder_id = investment.shareholder_id
     
@@ -434,13 +633,13 @@ def create_investment(db: Session, investment: schemas.InvestmentCreate, user_id
         elif investment.investor_name:
             shareholder_name = investment.investor_name
             
-        create_activity_log(db, user_id, "Added Investment", f"Amount: {investment.amount}, Investor: {shareholder_name}")
+        create_activity_log(db, user_id, "Added Investment", f"Amount: {investment.amount}, Investor: {shareholder_name}", role=user_role)
         
     return db_investment
 
 # ==================== Profit Distribution CRUD ====================
 
-def create_profit_distribution(db: Session, distribution: schemas.ProfitDistributionCreate, user_id: int = None):
+def create_profit_distribution(db: Session, distribution: schemas.ProfitDistributionCreate, user_id: int = None, user_role: str = None):
     db_dist = models.ProfitDistribution(**distribution.dict())
     db.add(db_dist)
     db.commit()
@@ -449,15 +648,14 @@ def create_profit_distribution(db: Session, distribution: schemas.ProfitDistribu
     if user_id:
         shareholder = get_shareholder(db, distribution.shareholder_id)
         name = shareholder.name if shareholder else "ID: " + str(distribution.shareholder_id)
-        create_activity_log(db, user_id, "Profit Distributed", f"Amount: {distribution.amount}, Shareholder: {name}")
+        create_activity_log(db, user_id, "Profit Distributed", f"Amount: {distribution.amount}, Shareholder: {name}", role=user_role)
         
     return db_dist
 
-def get_profit_distributions(db: Session, skip: int = 0, limit: int = 100):
+def get_profit_distributions(db: Session, skip: int = 0, limit: int = 100, after: str = None, count: str = None):
     query = db.query(models.ProfitDistribution)
-    total = query.count()
-    items = query.options(joinedload(models.ProfitDistribution.shareholder)).offset(skip).limit(limit).all()
-    return {"items": items, "total": total}
+    query = query.options(joinedload(models.ProfitDistribution.shareholder))
+    return pagination.paginate(query, models.ProfitDistribution.id, skip=skip, limit=limit, after=after, count=count)
 
 
 # ==================== User CRUD ====================
@@ -470,17 +668,16 @@ def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100, search: str = None):
+def get_users(db: Session, skip: int = 0, limit: int = 100, search: str = None, after: str = None, count: str = None):
     query = db.query(models.User)
     if search:
         query = query.filter(or_(models.User.username.ilike(f"%{search}%"), models.User.email.ilike(f"%{search}%")))
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
-    return {"items": items, "total": total}
+    return pagination.paginate(query, models.User.id, skip=skip, limit=limit, after=after, count=count)
 
 
-def create_user(db: Session, user: schemas.UserCreate, actor_user_id: int = None):
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: schemas.UserCreate, actor_user_id: int = None, hashed_password: str = None, actor_role: str = None, send_credentials: bool = False):
+    # Async callers hash with passwords.get_password_hash_async and pass the result
+    hashed_password = hashed_password or get_password_hash(user.password)
     db_user = models.User(
         username=user.username,
         email=user.email,
@@ -488,11 +685,14 @@ def create_user(db: Session, user: schemas.UserCreate, actor_user_id: int = None
         role=user.role
     )
     db.add(db_user)
+    if send_credentials:
+        # Committed together with the user; the outbox dispatcher sends it
+        mail.queue_credentials_email(db, user.email, user.password)
     db.commit()
     db.refresh(db_user)
     
     if actor_user_id:
-        create_activity_log(db, actor_user_id, "Created User", f"New user: {user.username}, Role: {user.role}")
+        create_activity_log(db, actor_user_id, "Created User", f"New user: {user.username}, Role: {user.role}", role=actor_role)
         
     return db_user
 
@@ -515,11 +715,9 @@ def get_unit_by_name(db: Session, name: str):
     return db.query(models.Unit).filter(models.Unit.name == name).first()
 
 
-def get_units(db: Session, skip: int = 0, limit: int = 100):
+def get_units(db: Session, skip: int = 0, limit: int = 100, after: str = None, count: str = None):
     query = db.query(models.Unit)
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
-    return {"items": items, "total": total}
+    return pagination.paginate(query, models.Unit.id, skip=skip, limit=limit, after=after, count=count)
 
 
 def create_unit(db: Session, unit: schemas.UnitCreate):
@@ -550,13 +748,11 @@ def delete_unit(db: Session, unit_id: int):
 
 # ==================== Expense CRUD ====================
 
-def get_expenses(db: Session, skip: int = 0, limit: int = 100, search: str = None):
-    query = db.query(models.Expense)
+def get_expenses(db: Session, skip: int = 0, limit: int = 100, search: str = None, after: str = None, count: str = None, start: datetime.date = None, end: datetime.date = None):
+    query = db.query(models.Expense).filter(*date_ranges.predicates(models.Expense.expense_date, start, end))
     if search:
         query = query.filter(or_(models.Expense.description.ilike(f"%{search}%"), models.Expense.category.ilike(f"%{search}%")))
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
-    return {"items": items, "total": total}
+    return pagination.paginate(query, models.Expense.id, skip=skip, limit=limit, after=after, count=count)
 
 
 def create_expense(db: Session, expense: schemas.ExpenseCreate):
@@ -577,20 +773,31 @@ def delete_expense(db: Session, expense_id: int):
 
 # ==================== Activity Log CRUD ====================
 
-def create_activity_log(db: Session, user_id: int, action: str, details: str = None):
-    # Fetch user to check role
-    user = get_user(db, user_id)
-    if user and user.role == "employee":
+def create_activity_log(db: Session, user_id: int, action: str, details: str = None, role: str = None):
+    # Callers pass the role of the already-authenticated user; look it up only if they did not
+    if role is None:
+        user = get_user(db, user_id)
+        role = user.role if user else None
+    if role == "employee":
         return None  # Do not log activity for employees
 
-    db_log = models.ActivityLog(user_id=user_id, action=action, details=details)
-    db.add(db_log)
-    db.commit()
-    db.refresh(db_log)
-    return db_log
-
-def get_activity_logs(db: Session, skip: int = 0, limit: int = 100):
-    query = db.query(models.ActivityLog)
-    total = query.count()
-    items = query.order_by(models.ActivityLog.timestamp.desc()).offset(skip).limit(limit).all()
-    return {"items": items, "total": total}
\ No newline at end of file
+    # Written in batches off the request path, and only once the caller's
+    # transaction has committed (see activity_log.py)
+    log_after_commit(db, user_id, action, details)
+
+def get_activity_logs(db: Session, skip: int = 0, limit: int = 100, after: str = None, count: str = None, user_id: int = None, action: str = None, start: datetime.datetime = None, end: datetime.datetime = None):
+    # Filters are plain equality / range predicates so they can use the
+    # (user_id, timestamp), (action, timestamp) and (timestamp, id) indexes
+    query = db.query(models.ActivityLog).options(joinedload(models.ActivityLog.user))
+    if user_id is not None:
+        query = query.filter(models.ActivityLog.user_id == user_id)
+    if action:
+        query = query.filter(models.ActivityLog.action == action)
+    if start:
+        query = query.filter(models.ActivityLog.timestamp >= start)
+    if end:
+        query = query.filter(models.ActivityLog.timestamp < end)
+    return pagination.paginate(
+        query, models.ActivityLog.id, sort_column=models.ActivityLog.timestamp, descending=True,
+        skip=skip, limit=limit, after=after, count=count
+    )
\ No newline at end of file
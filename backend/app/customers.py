@@ -0,0 +1,200 @@
+import datetime
+import os
+import re
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models, pagination
+
+# Customers are keyed by normalized mobile number. Every sale with a
+# buyer_mobile is linked to its customer, and the customer's dues are kept as
+# a running-balance ledger: a charge for the sale's due when it is made, a
+# payment for every later payment and a reversal when a sale is deleted.
+# customers.balance is the running total, so lookups and statements read one
+# customer row and its entries instead of scanning sales. The caller commits.
+
+NON_DIGITS = re.compile(r"\D")
+# Numbers are reduced to the national number for this country code, so
+# "+880 1711-000111" and "01711000111" are the same customer. Set it to ""
+# to keep every number as typed (digits only). After changing it, run
+# rebuild_ledger (POST /customers/rebuild/) to re-key existing customers.
+COUNTRY_CODE = os.getenv("CUSTOMER_MOBILE_COUNTRY_CODE", "880")
+
+
+def normalize_mobile(mobile: str):
+    """Digits only, without an international 00 prefix; None if nothing is left."""
+    if not mobile:
+        return None
+    digits = NON_DIGITS.sub("", mobile)
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if COUNTRY_CODE:
+        # Reduce to the national number: drop the country code, then the trunk 0
+        if digits.startswith(COUNTRY_CODE) and len(digits) > len(COUNTRY_CODE) + 6:
+            digits = digits[len(COUNTRY_CODE):]
+        digits = digits.lstrip("0")
+    return digits or None
+
+
+def _by_normalized(db: Session, normalized: str, lock: bool = False):
+    query = db.query(models.Customer).filter(models.Customer.mobile == normalized)
+    if lock:
+        query = query.with_for_update()
+    return query.first()
+
+
+def get_by_mobile(db: Session, mobile: str):
+    normalized = normalize_mobile(mobile)
+    return _by_normalized(db, normalized) if normalized else None
+
+
+def get_or_create(db: Session, mobile: str, name: str = None, address: str = None):
+    """Locked customer for ``mobile`` (created if new), or None without a usable number."""
+    normalized = normalize_mobile(mobile)
+    if not normalized:
+        return None
+    customer = _by_normalized(db, normalized, lock=True)
+    if customer is None:
+        try:
+            # Savepoint: a concurrent sale may create the same customer first
+            with db.begin_nested():
+                customer = models.Customer(mobile=normalized, name=name, address=address, balance=0.0)
+                db.add(customer)
+        except IntegrityError:
+            customer = _by_normalized(db, normalized, lock=True)
+    # Keep the latest name and address the counter typed in
+    if name:
+        customer.name = name
+    if address:
+        customer.address = address
+    return customer
+
+
+def record(db: Session, customer: models.Customer, kind: str, amount: float, sale_id: int = None, entry_date: datetime.date = None):
+    """Append a ledger entry and move the running balance. ``customer`` must be locked."""
+    if not amount:
+        return None
+    customer.balance = (customer.balance or 0.0) + amount
+    entry = models.CustomerLedgerEntry(
+        customer=customer,
+        sale_id=sale_id,
+        entry_date=entry_date or datetime.date.today(),
+        kind=kind,
+        amount=amount,
+        balance_after=customer.balance
+    )
+    db.add(entry)
+    return entry
+
+
+def _locked_customer(db: Session, customer_id: int):
+    if customer_id is None:
+        return None
+    return db.query(models.Customer).filter(models.Customer.id == customer_id).with_for_update().first()
+
+
+def record_sale(db: Session, sale: models.Sale):
+    """Link a new sale to its customer and charge its due. Flushes the sale."""
+    customer = get_or_create(db, sale.buyer_mobile, name=sale.buyer_name, address=sale.buyer_address)
+    if customer is None:
+        return None
+    sale.customer = customer
+    db.flush()  # Assigns sale.id for the entry
+    record(db, customer, "charge", sale.due_amount or 0.0, sale_id=sale.id, entry_date=sale.sale_date)
+    return customer
+
+
+def record_payment(db: Session, sale: models.Sale, previous_due: float):
+    customer = _locked_customer(db, sale.customer_id)
+    if customer is not None:
+        record(db, customer, "payment", (sale.due_amount or 0.0) - (previous_due or 0.0), sale_id=sale.id)
+
+
+def record_deletion(db: Session, sale: models.Sale):
+    customer = _locked_customer(db, sale.customer_id)
+    if customer is not None:
+        record(db, customer, "reversal", -(sale.due_amount or 0.0), sale_id=sale.id)
+
+
+def get_customers(db: Session, search: str = None, outstanding: bool = False, skip: int = 0, limit: int = 100, after: str = None, count: str = None):
+    query = db.query(models.Customer)
+    if search:
+        digits = normalize_mobile(search)
+        if digits:
+            query = query.filter(models.Customer.mobile.like(f"{digits}%"))
+        else:
+            query = query.filter(models.Customer.name.ilike(f"%{search}%"))
+    if outstanding:
+        query = query.filter(models.Customer.balance > 0)
+        return pagination.paginate(
+            query, models.Customer.id, sort_column=models.Customer.balance, descending=True,
+            skip=skip, limit=limit, after=after, count=count
+        )
+    return pagination.paginate(query, models.Customer.id, skip=skip, limit=limit, after=after, count=count)
+
+
+def get_statement(db: Session, customer_id: int, skip: int = 0, limit: int = 100, after: str = None, count: str = None):
+    """Ledger entries for one customer, newest first; None if the customer does not exist."""
+    customer = db.query(models.Customer).filter(models.Customer.id == customer_id).first()
+    if customer is None:
+        return None
+    query = db.query(models.CustomerLedgerEntry).filter(models.CustomerLedgerEntry.customer_id == customer_id)
+    page = pagination.paginate(
+        query, models.CustomerLedgerEntry.id, descending=True, skip=skip, limit=limit, after=after, count=count
+    )
+    page["customer"] = customer
+    return page
+
+
+def rebuild_ledger(db: Session):
+    """Recreate customers' links and ledgers from the sales table (one pass over sales)."""
+    db.query(models.CustomerLedgerEntry).delete(synchronize_session=False)
+    db.query(models.Customer).update({models.Customer.balance: 0.0}, synchronize_session=False)
+    db.query(models.Sale).update({models.Sale.customer_id: None}, synchronize_session=False)
+    db.flush()
+
+    # Re-key customers stored under an older normalization; duplicates merge into the oldest
+    customers = {}
+    for customer in db.query(models.Customer).order_by(models.Customer.id):
+        mobile = normalize_mobile(customer.mobile)
+        if mobile is None or mobile in customers:
+            kept = customers.get(mobile)
+            if kept is not None:
+                kept.name = kept.name or customer.name
+                kept.address = kept.address or customer.address
+            db.delete(customer)
+            continue
+        customers[mobile] = customer
+    db.flush()
+    for mobile, customer in customers.items():
+        customer.mobile = mobile
+    db.flush()
+    sales = (
+        db.query(models.Sale)
+        .filter(models.Sale.buyer_mobile != None, models.Sale.buyer_mobile != "")
+        .order_by(models.Sale.sale_date, models.Sale.id)
+    )
+    linked = 0
+    for sale in sales:
+        mobile = normalize_mobile(sale.buyer_mobile)
+        if not mobile:
+            continue
+        customer = customers.get(mobile)
+        if customer is None:
+            customer = models.Customer(mobile=mobile, balance=0.0)
+            db.add(customer)
+            customers[mobile] = customer
+        customer.name = sale.buyer_name or customer.name
+        customer.address = sale.buyer_address or customer.address
+        sale.customer = customer
+        # Past payments are folded in: the ledger starts from each sale's current due
+        record(db, customer, "charge", sale.due_amount or 0.0, sale_id=sale.id, entry_date=sale.sale_date)
+        linked += 1
+    db.commit()
+    return {
+        "customers": len(customers),
+        "linked_sales": linked,
+        "total_outstanding": db.query(func.coalesce(func.sum(models.Customer.balance), 0.0)).scalar()
+    }
@@ -1,14 +1,94 @@
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
 
+from .db_pool import InstrumentedQueuePool, instrument
+
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://user:password@db:5432/pharmacy")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# ASYNC_DB=true also builds an AsyncEngine (asyncpg / aiosqlite) and serves the
+# hot endpoints from it (see routers/async_api.py)
+ASYNC_DB = os.getenv("ASYNC_DB", "false").lower() in ("1", "true", "yes")
+
+# Connection pool settings. Size the pool against the worker threadpool
+# (40 threads by default); GET /api/admin/db-pool/ shows checkout waits.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Seconds; -1 disables
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # PostgreSQL only; 0 disables
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "pharmacy-api")
+
+
+def _is_postgresql(url: str) -> bool:
+    return url.startswith("postgres")
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:")
+
+
+def engine_options(url: str) -> dict:
+    if _is_memory_sqlite(url):
+        return {}  # Single shared connection; pool settings do not apply
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if _is_postgresql(url):
+        pg_options = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}" if DB_STATEMENT_TIMEOUT_MS > 0 else ""
+        options["connect_args"] = {"application_name": DB_APPLICATION_NAME, "options": pg_options}
+    return options
+
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    poolclass=None if _is_memory_sqlite(SQLALCHEMY_DATABASE_URL) else InstrumentedQueuePool,
+    **engine_options(SQLALCHEMY_DATABASE_URL)
+)
+instrument(engine.pool)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
+
+
+def upsert(table, dialect_name: str):
+    """INSERT for ``table`` with on_conflict_do_update / on_conflict_do_nothing (PostgreSQL or SQLite)."""
+    if dialect_name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def async_database_url(url: str) -> str:
+    if url.startswith("postgresql://") or url.startswith("postgres://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return url
+
+
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_options = engine_options(SQLALCHEMY_DATABASE_URL)
+    if _is_postgresql(SQLALCHEMY_DATABASE_URL):
+        # asyncpg takes server settings instead of libpq options
+        server_settings = {"application_name": DB_APPLICATION_NAME}
+        if DB_STATEMENT_TIMEOUT_MS > 0:
+            server_settings["statement_timeout"] = str(DB_STATEMENT_TIMEOUT_MS)
+        async_options["connect_args"] = {"server_settings": server_settings}
+    async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), **async_options)
+    instrument(async_engine.sync_engine.pool)
+    # Results are serialized after the session's work is done, so keep them loaded
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
@@ -0,0 +1,54 @@
+import datetime
+
+# Report and list filters on date columns. Month / quarter / year / custom
+# selections are turned into a half-open range [start, end) and applied as
+# `column >= start AND column < end`, which can use the B-tree indexes on
+# sales.sale_date, purchases.purchase_date, expenses.expense_date and
+# employee_bills.payment_date. Never filter with extract(...) on the column:
+# that hides it from the index and scans the table.
+
+
+def resolve(month: int = None, year: int = None, quarter: int = None,
+            start_date: datetime.date = None, end_date: datetime.date = None):
+    """Return (start, end) with end exclusive; either side is None when open.
+
+    start_date / end_date win over the calendar selections and end_date is
+    inclusive. A month or quarter without a year is ignored, as before.
+    Raises ValueError for out-of-range values.
+    """
+    if start_date or end_date:
+        if start_date and end_date and start_date > end_date:
+            raise ValueError("start_date must be on or before end_date")
+        return start_date, end_date + datetime.timedelta(days=1) if end_date else None
+    if not year:
+        return None, None
+    if month:
+        if not 1 <= month <= 12:
+            raise ValueError("month must be between 1 and 12")
+        return datetime.date(year, month, 1), add_months(datetime.date(year, month, 1), 1)
+    if quarter:
+        if not 1 <= quarter <= 4:
+            raise ValueError("quarter must be between 1 and 4")
+        start = datetime.date(year, (quarter - 1) * 3 + 1, 1)
+        return start, add_months(start, 3)
+    return datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1)
+
+
+def between(start_date: datetime.date, end_date: datetime.date):
+    """Inclusive start_date..end_date as a half-open (start, end) range."""
+    return start_date, end_date + datetime.timedelta(days=1) if end_date else None
+
+
+def predicates(column, start: datetime.date = None, end: datetime.date = None):
+    """Half-open range predicates on ``column`` for use in filter() / where()."""
+    clauses = []
+    if start is not None:
+        clauses.append(column >= start)
+    if end is not None:
+        clauses.append(column < end)
+    return clauses
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
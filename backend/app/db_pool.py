@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+# Connection pool instrumentation. InstrumentedQueuePool times every checkout
+# (the wait for a free connection, plus connecting when the pool grows), and
+# pool events count connects and invalidations. snapshot() adds the live
+# in-use / overflow figures for the admin endpoint.
+
+WAIT_SAMPLES = 2000
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=WAIT_SAMPLES)  # Recent checkout waits, seconds
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.max_in_use = 0
+
+    def record_checkout(self, wait: float, in_use: int):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.max_in_use = max(self.max_in_use, in_use)
+            self._waits.append(wait)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            waits = sorted(self._waits)
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "max_in_use": self.max_in_use,
+                "wait_ms": {
+                    "avg": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                    "p50": _percentile_ms(waits, 50),
+                    "p95": _percentile_ms(waits, 95),
+                    "p99": _percentile_ms(waits, 99),
+                    "max": round(self.max_wait * 1000, 3)
+                }
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0)
+            })
+        return data
+
+
+def _percentile_ms(sorted_waits, pct):
+    if not sorted_waits:
+        return 0.0
+    index = min(len(sorted_waits) - 1, int(len(sorted_waits) * pct / 100))
+    return round(sorted_waits[index] * 1000, 3)
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - start, self.checkedout())
+        return connection
+
+
+def instrument(pool):
+    """Count connects and invalidations on ``pool`` (any pool class)."""
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        pool_metrics.record_connect()
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        pool_metrics.record_invalidation()
+
+    @event.listens_for(pool, "soft_invalidate")
+    def _on_soft_invalidate(dbapi_connection, connection_record, exception):
+        pool_metrics.record_invalidation()
@@ -0,0 +1,231 @@
+import asyncio
+import datetime
+import logging
+import os
+
+from sqlalchemy import and_, case, delete, event, func, insert, select
+from sqlalchemy.orm import Session
+
+from . import models, pagination
+from .database import SessionLocal
+
+# Expiry alerts are precomputed into expiry_alerts: one row per in-stock batch
+# that is expired or expires within 90 days. The sweeper (started from the app
+# lifespan in main.py) rebuilds the table once a day so batches that come
+# within the horizon are picked up. Batch writes in between are applied by an
+# after_flush hook. Buckets are not stored: readers derive each row's bucket
+# from its expiry date and today, so a late or failed sweep cannot show stale
+# buckets. Quantities and names are joined in at read time.
+
+logger = logging.getLogger(__name__)
+
+HORIZON_DAYS = 90
+BUCKETS = ("expired", "30", "60", "90")
+SWEEP_HOUR = int(os.getenv("EXPIRY_SWEEP_HOUR", "0"))  # Local hour of the daily sweep
+RETRY_SECONDS = 300  # After a failed sweep
+
+
+def bucket_for(expiry_date: datetime.date, today: datetime.date):
+    if expiry_date < today:
+        return "expired"
+    days_left = (expiry_date - today).days
+    if days_left <= 30:
+        return "30"
+    if days_left <= 60:
+        return "60"
+    return "90"
+
+
+def _bucket_column(today: datetime.date):
+    expiry_date = models.ExpiryAlert.expiry_date
+    return case(
+        (expiry_date < today, "expired"),
+        (expiry_date <= today + datetime.timedelta(days=30), "30"),
+        (expiry_date <= today + datetime.timedelta(days=60), "60"),
+        else_="90"
+    )
+
+
+def sweep_expiry(db: Session, today: datetime.date = None):
+    """Rebuild expiry_alerts for ``today``."""
+    today = today or datetime.date.today()
+    horizon = today + datetime.timedelta(days=HORIZON_DAYS)
+    alerts_table = models.ExpiryAlert.__table__
+
+    db.execute(delete(alerts_table))
+    source = select(
+        models.MedicineBatch.id,
+        models.MedicineBatch.medicine_id,
+        models.MedicineBatch.expiry_date
+    ).where(
+        models.MedicineBatch.batch_quantity > 0,
+        models.MedicineBatch.expiry_date <= horizon
+    )
+    db.execute(insert(alerts_table).from_select(["batch_id", "medicine_id", "expiry_date"], source))
+    alert_count = db.query(func.count(models.ExpiryAlert.batch_id)).scalar() or 0
+    db.commit()
+    return {"swept_on": today, "alert_count": alert_count}
+
+
+def _bucket_filter(bucket: str, today: datetime.date):
+    """Alerts in ``bucket`` as of ``today`` (the same boundaries as bucket_for)."""
+    expiry_date = models.ExpiryAlert.expiry_date
+    if bucket == "expired":
+        return expiry_date < today
+    days = int(bucket)
+    lower = expiry_date >= today if days == 30 else expiry_date > today + datetime.timedelta(days=days - 30)
+    return and_(lower, expiry_date <= today + datetime.timedelta(days=days))
+
+
+def _alert_query(db: Session, today: datetime.date, bucket: str = None, manufacturer: str = None):
+    query = db.query(
+        models.ExpiryAlert.batch_id,
+        models.ExpiryAlert.expiry_date,
+        models.Medicine.id.label("medicine_id"),
+        models.Medicine.name.label("medicine_name"),
+        models.Medicine.manufacturer,
+        models.MedicineBatch.batch_quantity,
+        models.MedicineBatch.invoice_number
+    ).join(
+        models.MedicineBatch, models.MedicineBatch.id == models.ExpiryAlert.batch_id
+    ).join(
+        models.Medicine, models.Medicine.id == models.ExpiryAlert.medicine_id
+    ).filter(
+        models.MedicineBatch.batch_quantity > 0,
+        models.ExpiryAlert.expiry_date <= today + datetime.timedelta(days=HORIZON_DAYS)
+    )
+
+    if bucket:
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+        query = query.filter(_bucket_filter(bucket, today))
+    if manufacturer:
+        query = query.filter(models.Medicine.manufacturer.ilike(f"%{manufacturer}%"))
+    return query
+
+
+def _alert_item(row, today: datetime.date):
+    item = {
+        "batch_id": row.batch_id,
+        "medicine_id": row.medicine_id,
+        "medicine_name": row.medicine_name,
+        "manufacturer": row.manufacturer,
+        "batch_quantity": row.batch_quantity,
+        "expiry_date": row.expiry_date.isoformat(),
+        "invoice_number": row.invoice_number,
+        "bucket": bucket_for(row.expiry_date, today)
+    }
+    if row.expiry_date < today:
+        item["days_expired"] = (today - row.expiry_date).days
+    else:
+        item["days_left"] = (row.expiry_date - today).days
+    return item
+
+
+def get_expiry_buckets(db: Session):
+    """All current alerts grouped by bucket, as shown on the dashboard."""
+    today = datetime.date.today()
+    buckets = {bucket: [] for bucket in BUCKETS}
+    rows = _alert_query(db, today).order_by(models.ExpiryAlert.expiry_date, models.ExpiryAlert.batch_id).all()
+    for row in rows:
+        item = _alert_item(row, today)
+        buckets[item["bucket"]].append(item)
+    return buckets
+
+
+def list_expiry_alerts(db: Session, bucket: str = None, manufacturer: str = None, skip: int = 0, limit: int = 100, after: str = None, count: str = None):
+    today = datetime.date.today()
+    query = _alert_query(db, today, bucket=bucket, manufacturer=manufacturer)
+    data = pagination.paginate(
+        query, models.ExpiryAlert.batch_id, sort_column=models.ExpiryAlert.expiry_date,
+        skip=skip, limit=limit, after=after, count=count
+    )
+    data["items"] = [_alert_item(row, today) for row in data["items"]]
+    return data
+
+
+def expiry_by_manufacturer(db: Session, bucket: str = None):
+    today = datetime.date.today()
+    manufacturer = func.coalesce(models.Medicine.manufacturer, "Unknown").label("manufacturer")
+    current_bucket = _bucket_column(today)
+    bucket_counts = [
+        func.sum(case((current_bucket == name, 1), else_=0)).label(f"bucket_{name}")
+        for name in BUCKETS
+    ]
+    rows = _alert_query(db, today, bucket=bucket).with_entities(
+        manufacturer,
+        func.count(models.ExpiryAlert.batch_id).label("batch_count"),
+        func.sum(models.MedicineBatch.batch_quantity).label("total_quantity"),
+        *bucket_counts
+    ).group_by(manufacturer).order_by(func.count(models.ExpiryAlert.batch_id).desc(), manufacturer).all()
+    return [
+        {
+            "manufacturer": row.manufacturer,
+            "batch_count": row.batch_count,
+            "total_quantity": row.total_quantity or 0,
+            "expired_count": row.bucket_expired or 0,
+            "expiring_30_days": row.bucket_30 or 0,
+            "expiring_60_days": row.bucket_60 or 0,
+            "expiring_90_days": row.bucket_90 or 0
+        } for row in rows
+    ]
+
+
+@event.listens_for(Session, "after_flush")
+def _track_batch_expiry(session, flush_context):
+    batches = [
+        obj for obj in session.new.union(session.dirty)
+        if isinstance(obj, models.MedicineBatch) and obj.id is not None
+    ]
+    deleted_ids = [obj.id for obj in session.deleted if isinstance(obj, models.MedicineBatch)]
+    if not batches and not deleted_ids:
+        return
+
+    alerts_table = models.ExpiryAlert.__table__
+    conn = session.connection()
+    conn.execute(delete(alerts_table).where(
+        alerts_table.c.batch_id.in_([batch.id for batch in batches] + deleted_ids)
+    ))
+
+    today = datetime.date.today()
+    horizon = today + datetime.timedelta(days=HORIZON_DAYS)
+    rows = [
+        {
+            "batch_id": batch.id,
+            "medicine_id": batch.medicine_id,
+            "expiry_date": batch.expiry_date
+        }
+        for batch in batches
+        if batch not in session.deleted and (batch.batch_quantity or 0) > 0
+        and batch.expiry_date is not None and batch.expiry_date <= horizon
+    ]
+    if rows:
+        conn.execute(insert(alerts_table), rows)
+
+
+def _seconds_until_next_sweep(now: datetime.datetime):
+    next_run = now.replace(hour=SWEEP_HOUR, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += datetime.timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+def _sweep_once():
+    db = SessionLocal()
+    try:
+        result = sweep_expiry(db)
+        logger.info("Expiry sweep for %s: %s alerts", result["swept_on"], result["alert_count"])
+    finally:
+        db.close()
+
+
+async def run_sweeper():
+    """Sweep at startup and then daily at SWEEP_HOUR; cancelled at shutdown."""
+    while True:
+        try:
+            await asyncio.to_thread(_sweep_once)
+        except Exception:
+            logger.exception("Expiry sweep failed")
+            await asyncio.sleep(RETRY_SECONDS)
+            continue
+        await asyncio.sleep(_seconds_until_next_sweep(datetime.datetime.now()))
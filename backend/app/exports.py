@@ -0,0 +1,251 @@
+import csv
+import datetime
+import io
+import os
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+
+from . import date_ranges, models, profit_loss
+from .database import SessionLocal
+
+# Report exports stream straight from a server-side cursor into the response.
+# Each dataset is a column-only SELECT (no ORM objects) executed with
+# yield_per, and rows are written to CSV or XLSX in chunks of CHUNK_ROWS, so
+# memory stays flat however long the date range is. The generator opens its
+# own session because it keeps running after the endpoint has returned.
+# XLSX is written as a minimal single-sheet workbook through zipfile, which
+# streams to a non-seekable sink.
+
+CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))
+FORMATS = ("csv", "xlsx")
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+# ==================== Datasets ====================
+
+def customer_dues_query(start: datetime.date = None, end: datetime.date = None, status: str = "all"):
+    """Sales in [start, end) (see date_ranges.resolve)."""
+    query = select(
+        models.Sale.id,
+        models.Sale.sale_date,
+        func.coalesce(models.Sale.buyer_name, "Cash Customer"),
+        models.Sale.buyer_mobile,
+        models.Sale.total_amount,
+        models.Sale.amount_paid,
+        models.Sale.due_amount,
+    ).where(*date_ranges.predicates(models.Sale.sale_date, start, end))
+    if status == "due":
+        query = query.where(models.Sale.due_amount > 0)
+    elif status == "paid":
+        query = query.where(models.Sale.due_amount == 0)
+    return query.order_by(models.Sale.id)
+
+
+CUSTOMER_DUES_COLUMNS = ("id", "date", "customer_name", "customer_mobile", "total_amount", "paid_amount", "due_amount")
+
+
+def supplier_dues_query(start: datetime.date = None, end: datetime.date = None, status: str = "all"):
+    net_total = models.Purchase.total_amount - func.coalesce(models.Purchase.invoice_discount, 0)
+    query = select(
+        models.Purchase.id,
+        models.Purchase.purchase_date,
+        models.Purchase.invoice_number,
+        models.Purchase.supplier_name,
+        net_total,
+        models.Purchase.paid_amount,
+        net_total - models.Purchase.paid_amount,
+        models.Purchase.payment_status,
+    ).where(*date_ranges.predicates(models.Purchase.purchase_date, start, end))
+    if status == "due":
+        query = query.where(models.Purchase.payment_status != "paid")
+    elif status == "paid":
+        query = query.where(models.Purchase.payment_status == "paid")
+    return query.order_by(models.Purchase.id)
+
+
+SUPPLIER_DUES_COLUMNS = ("id", "date", "invoice_number", "supplier_name", "total_amount", "paid_amount", "due_amount", "status")
+
+
+def supplier_dues_row(row):
+    # Overpaid invoices report no due rather than a negative one
+    values = list(row)
+    values[6] = max(0, values[6] or 0)
+    return values
+
+
+def sale_lines_query(start_date: datetime.date, end_date: datetime.date):
+    return select(
+        models.Sale.id,
+        models.Sale.sale_date,
+        func.coalesce(models.Sale.buyer_name, "Cash Customer"),
+        models.Medicine.name,
+        models.SaleItem.quantity,
+        models.SaleItem.price_at_sale,
+        models.SaleItem.discount_amount,
+        models.SaleItem.cost_at_sale,
+    ).select_from(models.SaleItem).join(
+        models.Sale, models.SaleItem.sale_id == models.Sale.id
+    ).outerjoin(
+        models.Medicine, models.SaleItem.medicine_id == models.Medicine.id
+    ).where(
+        *date_ranges.predicates(models.Sale.sale_date, *date_ranges.between(start_date, end_date))
+    ).order_by(models.Sale.id, models.SaleItem.id)
+
+
+SALE_LINES_COLUMNS = ("sale_id", "date", "customer_name", "medicine", "quantity", "unit_price", "discount_amount", "unit_cost")
+
+PROFIT_LOSS_COLUMNS = ("kind", "date", "category", "amount", "paid", "due")
+
+
+def profit_loss_query(start_date: datetime.date, end_date: datetime.date):
+    statement = profit_loss.profit_loss_statement(start_date, end_date).subquery()
+    return select(statement).order_by(statement.c.day, statement.c.kind, statement.c.category)
+
+
+# ==================== Writers ====================
+
+def _stream_rows(query, row_builder=None):
+    """Yield result rows from a server-side cursor with its own session."""
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(yield_per=CHUNK_ROWS))
+        for row in result:
+            yield row_builder(row) if row_builder else row
+    finally:
+        db.close()
+
+
+def _chunks(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_csv(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in _chunks(rows):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _Sink:
+    """Write-only file object; zipfile writes into it and the generator drains it."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value!r}</v></c>"
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        value = value.isoformat()
+    text = escape(_XML_ILLEGAL.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return "<row>" + "".join(_xlsx_cell(value) for value in values) + "</row>"
+
+
+def write_xlsx(columns, rows, sheet_name="Report"):
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as workbook:
+        workbook.writestr("[Content_Types].xml", XLSX_CONTENT_TYPES)
+        workbook.writestr("_rels/.rels", XLSX_ROOT_RELS)
+        workbook.writestr("xl/workbook.xml", XLSX_WORKBOOK.format(name=escape(sheet_name[:31])))
+        workbook.writestr("xl/_rels/workbook.xml.rels", XLSX_WORKBOOK_RELS)
+        yield sink.drain()
+        with workbook.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(columns).encode("utf-8"))
+            for chunk in _chunks(rows):
+                sheet.write("".join(_xlsx_row(row) for row in chunk).encode("utf-8"))
+                yield sink.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
+
+
+def export_response(name: str, columns, query, export_format: str = "csv", row_builder=None):
+    """StreamingResponse for ``query`` as CSV or XLSX. Raises ValueError for an unknown format."""
+    if export_format not in FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}'; use one of {', '.join(FORMATS)}")
+    rows = _stream_rows(query, row_builder)
+    if export_format == "xlsx":
+        body = write_xlsx(columns, rows, sheet_name=name)
+    else:
+        body = write_csv(columns, rows)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+    )
@@ -0,0 +1,120 @@
+import datetime
+import os
+
+from sqlalchemy import exists, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Purchase invoice numbers are "YYYY-MM-NN". The next value for each month's
+# prefix is a row in invoice_sequences, taken with one atomic
+# UPDATE ... RETURNING, so the cost does not grow with the number of
+# purchases and two admins opening the form at once get different numbers.
+# A handed-out number is held in invoice_reservations for LEASE_MINUTES:
+# asking again before it expires returns the same number, saving the invoice
+# releases it, and nobody else can save an invoice under it while it is held.
+# Expired numbers are never handed out again (the admin who held one may
+# still save it late), so an abandoned form leaves a gap in the sequence.
+
+LEASE_MINUTES = int(os.getenv("INVOICE_RESERVATION_MINUTES", "15"))
+
+
+def current_prefix(today: datetime.date = None):
+    today = today or datetime.date.today()
+    return f"{today.year}-{today.month:02d}-"
+
+
+def format_number(prefix: str, value: int):
+    # Padded to at least 2 digits (e.g., 00, 01)
+    return f"{prefix}{value:02d}"
+
+
+def _in_use(db: Session, invoice_number: str):
+    return db.query(exists().where(models.Purchase.invoice_number == invoice_number)).scalar()
+
+
+def _seed(db: Session, prefix: str):
+    """Create the counter for a new prefix, starting after any invoices already typed with it."""
+    # Runs once per prefix; from then on the counter row is authoritative
+    highest = -1
+    numbers = db.query(models.Purchase.invoice_number).filter(models.Purchase.invoice_number.like(f"{prefix}%"))
+    for (invoice_number,) in numbers:
+        part = invoice_number[len(prefix):]
+        if part.isdigit():
+            highest = max(highest, int(part))
+    try:
+        with db.begin_nested():
+            db.add(models.InvoiceSequence(prefix=prefix, next_value=highest + 1))
+    except IntegrityError:
+        pass  # Another request created it first
+    # Unused reservations from earlier months will never be handed out again
+    db.query(models.InvoiceReservation).filter(
+        models.InvoiceReservation.prefix != prefix
+    ).delete(synchronize_session=False)
+
+
+def _take_next(db: Session, prefix: str):
+    sequences = models.InvoiceSequence.__table__
+    statement = (
+        update(sequences)
+        .where(sequences.c.prefix == prefix)
+        .values(next_value=sequences.c.next_value + 1, updated_at=datetime.datetime.utcnow())
+        .returning(sequences.c.next_value)
+    )
+    taken = db.execute(statement).scalar()
+    if taken is None:
+        _seed(db, prefix)
+        taken = db.execute(statement).scalar()
+    return taken - 1
+
+
+def reserve(db: Session, user_id: int = None, today: datetime.date = None):
+    """Reserve the next free invoice number for ``user_id`` and commit; returns (number, expires_at)."""
+    prefix = current_prefix(today)
+    now = datetime.datetime.utcnow()
+    expires_at = now + datetime.timedelta(minutes=LEASE_MINUTES)
+
+    if user_id is not None:
+        held = db.query(models.InvoiceReservation).filter(
+            models.InvoiceReservation.prefix == prefix,
+            models.InvoiceReservation.user_id == user_id,
+            models.InvoiceReservation.expires_at >= now
+        ).order_by(models.InvoiceReservation.value).first()
+        if held is not None and not _in_use(db, held.invoice_number):
+            held.expires_at = expires_at
+            db.commit()
+            return held.invoice_number, expires_at
+
+    db.query(models.InvoiceReservation).filter(
+        models.InvoiceReservation.prefix == prefix,
+        models.InvoiceReservation.expires_at < now
+    ).delete(synchronize_session=False)
+    while True:
+        value = _take_next(db, prefix)
+        invoice_number = format_number(prefix, value)
+        # A number typed by hand may already be taken; skip it (one indexed lookup)
+        if not _in_use(db, invoice_number):
+            break
+    db.add(models.InvoiceReservation(
+        invoice_number=invoice_number, prefix=prefix, value=value, user_id=user_id, expires_at=expires_at
+    ))
+    db.commit()
+    return invoice_number, expires_at
+
+
+def check_reservation(db: Session, invoice_number: str, user_id: int = None):
+    """Raise ValueError if another user holds an unexpired reservation on ``invoice_number``."""
+    held = db.query(models.InvoiceReservation).filter(
+        models.InvoiceReservation.invoice_number == invoice_number,
+        models.InvoiceReservation.expires_at >= datetime.datetime.utcnow()
+    ).with_for_update().first()
+    if held is not None and held.user_id is not None and held.user_id != user_id:
+        raise ValueError(f"Invoice number {invoice_number} is reserved by another user; request a new number")
+
+
+def release(db: Session, invoice_number: str):
+    """Drop the reservation once the invoice is saved. The caller commits."""
+    db.query(models.InvoiceReservation).filter(
+        models.InvoiceReservation.invoice_number == invoice_number
+    ).delete(synchronize_session=False)
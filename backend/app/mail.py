@@ -1,8 +1,31 @@
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+from fastapi_mail.connection import Connection
+from jose import jwe
 from pydantic import EmailStr
+from sqlalchemy import func
+from sqlalchemy.orm import Session
 from typing import List
+import asyncio
+import datetime
+import hashlib
+import logging
 import os
 
+from . import models
+from .database import SessionLocal
+
+# Emails go through a persistent outbox. queue_email() adds a row to
+# email_outbox in the caller's transaction, so the message is committed with
+# the change that triggered it and the request never waits on SMTP. The
+# dispatcher (started from the app lifespan in main.py) claims due rows in
+# batches, sends them over one SMTP connection that stays open while there is
+# work, and retries failures with exponential backoff up to MAIL_MAX_ATTEMPTS.
+# Bodies queued with sealed=True (credential emails) are stored encrypted and
+# only decrypted in memory when sent; every body is cleared once the row is
+# sent or given up on.
+
+logger = logging.getLogger(__name__)
+
 conf = ConnectionConfig(
     MAIL_USERNAME = os.getenv("MAIL_USERNAME", ""),
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD", ""),
@@ -12,16 +35,243 @@ conf = ConnectionConfig(
     MAIL_STARTTLS = os.getenv("MAIL_STARTTLS", "true").lower() == 'true',
     MAIL_SSL_TLS = os.getenv("MAIL_SSL_TLS", "false").lower() == 'true',
     USE_CREDENTIALS = os.getenv("USE_CREDENTIALS", "true").lower() == 'true',
-    VALIDATE_CERTS = os.getenv("VALIDATE_CERTS", "true").lower() == 'true'
+    VALIDATE_CERTS = os.getenv("VALIDATE_CERTS", "true").lower() == 'true',
+    TIMEOUT = int(os.getenv("MAIL_TIMEOUT", "30"))
 )
 
-async def send_email(email: List[EmailStr], password: str):
-    message = MessageSchema(
+fast_mail = FastMail(conf)
+
+BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "50"))
+POLL_SECONDS = float(os.getenv("MAIL_POLL_SECONDS", "5"))
+IDLE_CLOSE_SECONDS = float(os.getenv("MAIL_IDLE_CLOSE_SECONDS", "30"))  # Close the SMTP connection after this long without work
+MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "8"))
+RETRY_BASE_SECONDS = float(os.getenv("MAIL_RETRY_BASE_SECONDS", "30"))
+RETRY_MAX_SECONDS = float(os.getenv("MAIL_RETRY_MAX_SECONDS", "3600"))
+LEASE_SECONDS = 300  # A claimed row is picked up again if its sender dies before recording a result
+# Key for sealed bodies; defaults to one derived from the JWT signing key
+SEAL_KEY = hashlib.sha256(
+    (os.getenv("MAIL_SEAL_KEY") or os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")).encode()
+).digest()
+
+
+def _seal(body: str) -> str:
+    return jwe.encrypt(body, SEAL_KEY, algorithm="dir", encryption="A256GCM").decode()
+
+
+def _unseal(body: str) -> str:
+    return jwe.decrypt(body, SEAL_KEY).decode()
+
+
+def queue_email(db: Session, recipients: List[EmailStr], subject: str, body: str, subtype: str = "html", sealed: bool = False):
+    """Add a message to the outbox; it is committed with the caller's transaction.
+
+    sealed=True stores the body encrypted, for messages that carry secrets.
+    """
+    db.add(models.EmailOutbox(
+        recipients=",".join(recipients),
+        subject=subject,
+        body=_seal(body) if sealed else body,
+        sealed=sealed,
+        subtype=subtype
+    ))
+
+
+def queue_credentials_email(db: Session, email: EmailStr, password: str):
+    queue_email(
+        db, [email],
         subject="Your new account credentials",
-        recipients=email,
         body=f"Your new account has been created. Your password is: {password}",
-        subtype="html"
+        sealed=True
+    )
+
+
+def retry_delay(attempts: int) -> float:
+    return min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS)
+
+
+def _claim_batch():
+    db = SessionLocal()
+    try:
+        now = datetime.datetime.utcnow()
+        rows = (
+            db.query(models.EmailOutbox)
+            .filter(models.EmailOutbox.status.in_(["pending", "sending"]), models.EmailOutbox.next_attempt_at <= now)
+            .order_by(models.EmailOutbox.next_attempt_at, models.EmailOutbox.id)
+            .limit(BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        batch = []
+        for row in rows:
+            row.status = "sending"
+            row.attempts = (row.attempts or 0) + 1
+            row.next_attempt_at = now + datetime.timedelta(seconds=LEASE_SECONDS)
+            body = row.body or ""
+            if row.sealed and body:
+                try:
+                    body = _unseal(body)
+                except Exception:
+                    # Sealed with another key; it can never be sent
+                    row.status = "failed"
+                    row.body = None
+                    row.last_error = "Cannot decrypt the sealed body (MAIL_SEAL_KEY / SECRET_KEY changed?)"
+                    continue
+            batch.append({
+                "id": row.id, "recipients": row.recipients.split(","), "subject": row.subject,
+                "body": body, "subtype": row.subtype or "html", "attempts": row.attempts
+            })
+        db.commit()
+        return batch
+    finally:
+        db.close()
+
+
+def _record_results(sent_ids, failures):
+    """Mark sent rows and reschedule (or give up on) failed ones. failures: {id: (attempts, error)}"""
+    db = SessionLocal()
+    try:
+        now = datetime.datetime.utcnow()
+        if sent_ids:
+            db.query(models.EmailOutbox).filter(models.EmailOutbox.id.in_(sent_ids)).update(
+                {"status": "sent", "sent_at": now, "body": None, "last_error": None}, synchronize_session=False
+            )
+        for outbox_id, (attempts, error) in failures.items():
+            values = {"last_error": error[:500]}
+            if attempts >= MAX_ATTEMPTS:
+                values["status"] = "failed"
+                values["body"] = None
+            else:
+                values["status"] = "pending"
+                values["next_attempt_at"] = now + datetime.timedelta(seconds=retry_delay(attempts))
+            db.query(models.EmailOutbox).filter(models.EmailOutbox.id == outbox_id).update(
+                values, synchronize_session=False
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _describe(error: Exception) -> str:
+    return str(error) or error.__class__.__name__
+
+
+def outbox_counts(db: Session):
+    return dict(
+        db.query(models.EmailOutbox.status, func.count(models.EmailOutbox.id))
+        .group_by(models.EmailOutbox.status)
+        .all()
     )
 
-    fm = FastMail(conf)
-    await fm.send_message(message)
+
+class OutboxDispatcher:
+    def __init__(self):
+        self._wake = None
+        self._connection = None
+        self.sent = 0
+        self.failed_attempts = 0
+        self.connections_opened = 0
+        self.batches = 0
+
+    def wake(self):
+        """Start a dispatch pass now instead of at the next poll. Call from the event loop."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _connect(self):
+        if self._connection is None:
+            connection = Connection(conf)
+            await connection.__aenter__()
+            self._connection = connection
+            self.connections_opened += 1
+        return self._connection
+
+    async def _disconnect(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                await connection.__aexit__(None, None, None)
+            except Exception:
+                pass  # The server may already have dropped us
+
+    async def _send_batch(self, batch):
+        sent_ids, failures = [], {}
+        for index, item in enumerate(batch):
+            try:
+                message = await fast_mail.get_message(MessageSchema(
+                    subject=item["subject"], recipients=item["recipients"], body=item["body"], subtype=item["subtype"]
+                ))
+            except Exception as error:
+                failures[item["id"]] = (MAX_ATTEMPTS, _describe(error))  # A malformed message never succeeds
+                continue
+            try:
+                connection = await self._connect()
+            except Exception as error:
+                # Server unreachable: back off everything left in the batch
+                for rest in batch[index:]:
+                    failures[rest["id"]] = (rest["attempts"], _describe(error))
+                break
+            try:
+                if not conf.SUPPRESS_SEND:
+                    await connection.session.send_message(message)
+                sent_ids.append(item["id"])
+            except Exception as error:
+                # The connection state is unknown after an error; reconnect for the next message
+                await self._disconnect()
+                failures[item["id"]] = (item["attempts"], _describe(error))
+        self.batches += 1
+        self.sent += len(sent_ids)
+        self.failed_attempts += len(failures)
+        await asyncio.to_thread(_record_results, sent_ids, failures)
+        return len(batch)
+
+    async def dispatch_once(self):
+        """Send everything that is due now; returns the number of messages attempted."""
+        attempted = 0
+        while True:
+            batch = await asyncio.to_thread(_claim_batch)
+            if not batch:
+                return attempted
+            attempted += await self._send_batch(batch)
+            if len(batch) < BATCH_SIZE:
+                return attempted
+
+    async def run(self):
+        """Dispatch loop; cancelled at shutdown."""
+        self._wake = asyncio.Event()
+        idle_since = None
+        try:
+            while True:
+                self._wake.clear()
+                try:
+                    attempted = await self.dispatch_once()
+                except Exception:
+                    logger.exception("Email outbox dispatch failed")
+                    attempted = 0
+                loop_time = asyncio.get_running_loop().time()
+                if attempted:
+                    idle_since = None
+                elif idle_since is None:
+                    idle_since = loop_time
+                elif loop_time - idle_since >= IDLE_CLOSE_SECONDS:
+                    await self._disconnect()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._wake = None
+            await self._disconnect()
+
+    def stats(self):
+        return {
+            "connected": self._connection is not None,
+            "connections_opened": self.connections_opened,
+            "batches": self.batches,
+            "sent": self.sent,
+            "failed_attempts": self.failed_attempts,
+            "batch_size": BATCH_SIZE,
+            "max_attempts": MAX_ATTEMPTS
+        }
+
+
+outbox_dispatcher = OutboxDispatcher()
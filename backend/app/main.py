@@ -1,18 +1,43 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import medicines, purchases, sales, employees, investments, reports, users, units, add_purchase, expenses, suppliers, activity_logs, shareholders
-from .database import engine
-from . import models
+from .routers import medicines, purchases, sales, employees, investments, reports, users, units, add_purchase, expenses, suppliers, activity_logs, shareholders, admin, customers
+from .database import ASYNC_DB, engine
+from . import activity_retention, expiry, models, search, summary
+from .activity_log import activity_writer
+from .mail import outbox_dispatcher
 
 from fastapi.staticfiles import StaticFiles
 import os
 
 models.Base.metadata.create_all(bind=engine)
+search.ensure_search_index(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Daily expiry alert sweep (see expiry.py)
+    sweeper = asyncio.create_task(expiry.run_sweeper())
+    # Folds the dashboard summary deltas (see summary.py)
+    summary_compactor = asyncio.create_task(summary.run_compactor())
+    log_maintenance = asyncio.create_task(activity_retention.run_maintenance())
+    mail_dispatcher = asyncio.create_task(outbox_dispatcher.run())
+    activity_writer.start()
+    yield
+    sweeper.cancel()
+    summary_compactor.cancel()
+    log_maintenance.cancel()
+    mail_dispatcher.cancel()
+    # Flush queued activity logs before the worker exits
+    await asyncio.to_thread(activity_writer.stop)
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS Middleware
 app.add_middleware(
@@ -23,6 +48,11 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+if ASYNC_DB:
+    # Async versions of the hot endpoints shadow the sync routes below
+    from .routers import async_api
+    app.include_router(async_api.router, prefix="/api")
+
 app.include_router(medicines.router, prefix="/api")
 app.include_router(purchases.router, prefix="/api")
 app.include_router(sales.router, prefix="/api")
@@ -34,8 +64,10 @@ app.include_router(units.router, prefix="/api")
 app.include_router(add_purchase.router, prefix="/api")
 app.include_router(expenses.router, prefix="/api")
 app.include_router(suppliers.router, prefix="/api")
+app.include_router(customers.router, prefix="/api")
 app.include_router(activity_logs.router, prefix="/api")
 app.include_router(shareholders.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
 
 # Mount frontend static files
 # In Docker, we mounted the sibling 'frontend' dir to '/frontend' inside the container
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, DateTime, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, DateTime, Boolean, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from .database import Base
 import datetime
 
@@ -12,11 +13,14 @@ class Medicine(Base):
     manufacturer = Column(String, index=True)
     strength = Column(String)
     medicine_type = Column(String) # Tablet, Syrup, Capsule, etc.
-    stock_quantity = Column(Integer)
+    stock_quantity = Column(Integer, index=True)
     purchase_price = Column(Float)
     selling_price = Column(Float)
 
-    __table_args__ = (UniqueConstraint('name', 'strength', 'manufacturer', 'medicine_type', name='_name_strength_mfg_uc'),)
+    __table_args__ = (
+        UniqueConstraint('name', 'strength', 'manufacturer', 'medicine_type', name='_name_strength_mfg_uc'),
+        Index('ix_medicines_name_lower', func.lower(name)), # Case-insensitive name lookups
+    )
 
     batches = relationship("MedicineBatch", back_populates="medicine", cascade="all, delete-orphan")
 
@@ -25,8 +29,9 @@ class MedicineBatch(Base):
     __tablename__ = "medicine_batches"
 
     id = Column(Integer, primary_key=True, index=True)
-    medicine_id = Column(Integer, ForeignKey("medicines.id"))
+    medicine_id = Column(Integer, ForeignKey("medicines.id"), index=True)
     supplier_name = Column(String)
+    supplier_id = Column(Integer, ForeignKey("suppliers.id", ondelete="SET NULL"), nullable=True, index=True)
     batch_quantity = Column(Integer)  # Quantity in this specific batch
     unit_id = Column(Integer, ForeignKey("units.id")) # Foreign key to the units table
     per_product_discount = Column(Float)
@@ -36,6 +41,21 @@ class MedicineBatch(Base):
     purchase_date = Column(Date) # Added purchase_date to track when this batch was bought
     total_batch_discount = Column(Float) # Total discount for this batch (e.g., from supplier)
     selling_price = Column(Float) # Added batch-wise selling price
+    purchase_price = Column(Float, nullable=True) # Unit cost of this batch
+    supplier = relationship("Supplier")
+
+    # FEFO lookups: in-stock batches of a medicine, earliest expiry first
+    __table_args__ = (
+        Index(
+            'ix_medicine_batches_fefo', 'medicine_id', 'expiry_date',
+            postgresql_where=(batch_quantity > 0), sqlite_where=(batch_quantity > 0)
+        ),
+        # Expiry alerts: in-stock batches by expiry date
+        Index(
+            'ix_medicine_batches_expiry_in_stock', 'expiry_date', 'medicine_id',
+            postgresql_where=(batch_quantity > 0), sqlite_where=(batch_quantity > 0)
+        ),
+    )
 
     medicine = relationship("Medicine", back_populates="batches")
     unit = relationship("Unit", back_populates="batches")
@@ -47,14 +67,17 @@ class Purchase(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     supplier_name = Column(String)
+    supplier_id = Column(Integer, ForeignKey("suppliers.id", ondelete="SET NULL"), nullable=True, index=True)  # See supplier_ledger.py
     invoice_number = Column(String, unique=True, index=True) # Added invoice_number
-    purchase_date = Column(Date)
+    purchase_date = Column(Date, index=True)
     total_amount = Column(Float)
     invoice_discount = Column(Float, default=0.0) # Added invoice_discount
     discount_type = Column(String, default="fixed") # 'fixed' or 'percentage'
     paid_amount = Column(Float, default=0.0)  # Amount paid for this purchase
     payment_status = Column(String, default="unpaid")  # 'unpaid', 'partial', 'paid'
     items = relationship("PurchaseItem", back_populates="purchase")
+    supplier = relationship("Supplier")
+    payments = relationship("SupplierPayment", back_populates="purchase")
 
 class PurchaseItem(Base):
     __tablename__ = "purchase_items"
@@ -82,21 +105,41 @@ class Sale(Base):
     due_amount = Column(Float, default=0.0)
     discount_amount = Column(Float, default=0.0) # Added discount
     discount_type = Column(String, default="fixed") # Added discount type
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=True, index=True)  # Set from buyer_mobile (see customers.py)
     
     items = relationship("SaleItem", back_populates="sale", cascade="all, delete-orphan")
+    customer = relationship("Customer")
+
+    # Date filters are half-open ranges (see date_ranges.py); the id serves the keyset sort
+    __table_args__ = (
+        Index('ix_sales_sale_date_id', 'sale_date', 'id'),
+    )
 
 class SaleItem(Base):
     __tablename__ = "sale_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey("sales.id"))
+    sale_id = Column(Integer, ForeignKey("sales.id"), index=True)
     medicine_id = Column(Integer, ForeignKey("medicines.id"))
     quantity = Column(Integer)
     price_at_sale = Column(Float)
+    cost_at_sale = Column(Float, nullable=True) # Unit cost of the stock sold, captured at sale time
     discount_amount = Column(Float, default=0.0)
     discount_type = Column(String, default="fixed")
     sale = relationship("Sale", back_populates="items")
     medicine = relationship("Medicine")
+    allocations = relationship("SaleItemBatch", back_populates="sale_item", cascade="all, delete-orphan")
+
+class SaleItemBatch(Base):
+    __tablename__ = "sale_item_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sale_item_id = Column(Integer, ForeignKey("sale_items.id", ondelete="CASCADE"), index=True)
+    batch_id = Column(Integer, ForeignKey("medicine_batches.id", ondelete="SET NULL"), nullable=True, index=True)
+    quantity = Column(Integer)
+    unit_cost = Column(Float, nullable=True)
+    sale_item = relationship("SaleItem", back_populates="allocations")
+    batch = relationship("MedicineBatch")
 
 class Employee(Base):
     __tablename__ = "employees"
@@ -116,7 +159,7 @@ class EmployeeBill(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id"))
-    payment_date = Column(Date)
+    payment_date = Column(Date, index=True)
     base_amount = Column(Float)
     overtime_amount = Column(Float)
     total_amount = Column(Float)
@@ -183,7 +226,7 @@ class Expense(Base):
     id = Column(Integer, primary_key=True, index=True)
     description = Column(String)
     amount = Column(Float)
-    expense_date = Column(Date)
+    expense_date = Column(Date, index=True)
     category = Column(String) # e.g., Electricity, Rent, Personal
 
 
@@ -197,8 +240,64 @@ class Supplier(Base):
     email = Column(String, nullable=True)
     address = Column(String, nullable=True)
     notes = Column(String, nullable=True)
+    balance = Column(Float, default=0.0)  # Outstanding due across purchases, kept by supplier_ledger.py
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_suppliers_name_lower', func.lower(name), unique=True), # One supplier per name, case-insensitive
+    )
+
+
+class SupplierPayment(Base):
+    __tablename__ = "supplier_payments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    supplier_id = Column(Integer, ForeignKey("suppliers.id", ondelete="SET NULL"), nullable=True)  # Payment history outlives the supplier
+    purchase_id = Column(Integer, ForeignKey("purchases.id", ondelete="SET NULL"), nullable=True, index=True)
+    payment_date = Column(Date)
+    amount = Column(Float)
+    note = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    supplier = relationship("Supplier")
+    purchase = relationship("Purchase", back_populates="payments")
+
+    __table_args__ = (
+        Index('ix_supplier_payments_supplier_date', 'supplier_id', 'payment_date'),
+    )
+
+
+class Customer(Base):
+    __tablename__ = "customers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=True)
+    mobile = Column(String, unique=True, index=True)  # Normalized, see customers.normalize_mobile
+    address = Column(String, nullable=True)
+    balance = Column(Float, default=0.0)  # Outstanding due; running total of the ledger
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    entries = relationship("CustomerLedgerEntry", back_populates="customer", cascade="all, delete-orphan")
+
+
+class CustomerLedgerEntry(Base):
+    __tablename__ = "customer_ledger_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    customer_id = Column(Integer, ForeignKey("customers.id", ondelete="CASCADE"))
+    sale_id = Column(Integer, nullable=True, index=True)  # Not a foreign key: reversals outlive the sale
+    entry_date = Column(Date)
+    kind = Column(String)  # charge, payment, reversal
+    amount = Column(Float)  # Signed change to the balance
+    balance_after = Column(Float)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+    customer = relationship("Customer", back_populates="entries")
+
+    __table_args__ = (
+        Index('ix_customer_ledger_entries_customer_id_id', 'customer_id', 'id'),
+    )
+
 
 class ActivityLog(Base):
     __tablename__ = "activity_logs"
@@ -210,3 +309,100 @@ class ActivityLog(Base):
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
 
     user = relationship("User")
+
+    # On PostgreSQL the table is range-partitioned by month on timestamp (see activity_retention.py)
+    __table_args__ = (
+        Index('ix_activity_logs_timestamp_id', 'timestamp', 'id'),
+        Index('ix_activity_logs_user_timestamp', 'user_id', 'timestamp'),
+        Index('ix_activity_logs_action_timestamp', 'action', 'timestamp'),
+    )
+
+
+class DashboardSummary(Base):
+    __tablename__ = "dashboard_summary"
+
+    id = Column(Integer, primary_key=True)  # Single row, id = 1
+    total_medicines = Column(Integer, default=0)
+    low_stock_count = Column(Integer, default=0)
+    total_due = Column(Float, default=0.0)  # Sum of Sale.due_amount
+    total_supplier_due = Column(Float, default=0.0)  # Sum of unpaid purchase balances
+    rebuilt_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class DailySalesSummary(Base):
+    __tablename__ = "daily_sales_summary"
+
+    summary_date = Column(Date, primary_key=True)
+    total_sales = Column(Float, default=0.0)
+    sale_count = Column(Integer, default=0)
+
+
+class SummaryDelta(Base):
+    __tablename__ = "summary_deltas"
+
+    # Appended by every write; summary.compact_summary folds them into the two tables above
+    id = Column(Integer, primary_key=True)
+    summary_date = Column(Date, nullable=True, index=True)  # Day of total_sales / sale_count
+    total_medicines = Column(Integer, default=0)
+    low_stock_count = Column(Integer, default=0)
+    total_due = Column(Float, default=0.0)
+    total_supplier_due = Column(Float, default=0.0)
+    total_sales = Column(Float, default=0.0)
+    sale_count = Column(Integer, default=0)
+
+
+class ExpiryAlert(Base):
+    __tablename__ = "expiry_alerts"
+
+    # One row per in-stock batch that is expired or expires within 90 days
+    batch_id = Column(Integer, ForeignKey("medicine_batches.id", ondelete="CASCADE"), primary_key=True)
+    medicine_id = Column(Integer, ForeignKey("medicines.id", ondelete="CASCADE"), index=True)
+    expiry_date = Column(Date)
+
+    # Readers filter on expiry_date ranges (the bucket is derived from it) and page by (expiry_date, batch_id)
+    __table_args__ = (
+        Index('ix_expiry_alerts_expiry_batch', 'expiry_date', 'batch_id'),
+    )
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipients = Column(String)  # Comma separated
+    subject = Column(String)
+    body = Column(String, nullable=True)  # Cleared once sent or failed
+    sealed = Column(Boolean, default=False)  # body is encrypted (credential emails, see mail.py)
+    subtype = Column(String, default="html")
+    status = Column(String, default="pending")  # pending, sending, sent, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.datetime.utcnow)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+
+class InvoiceSequence(Base):
+    __tablename__ = "invoice_sequences"
+
+    prefix = Column(String, primary_key=True)  # e.g. "2026-10-"
+    next_value = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class InvoiceReservation(Base):
+    __tablename__ = "invoice_reservations"
+
+    invoice_number = Column(String, primary_key=True)
+    prefix = Column(String, nullable=False)
+    value = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=True)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('ix_invoice_reservations_prefix_expires', 'prefix', 'expires_at'),
+    )
@@ -0,0 +1,148 @@
+import base64
+import datetime
+import json
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, text
+from sqlalchemy.orm import Query
+
+# Shared pagination for list endpoints. Every list returns the same envelope
+# (schemas.PaginatedResponse). Callers either page by offset (skip/limit, as
+# the frontend does) or pass the opaque next_cursor back as ``after`` to get
+# keyset pagination on (sort key, id), which costs the same on every page.
+#
+# count: "exact" runs COUNT(*), "estimated" reads pg_class.reltuples on
+# PostgreSQL for unfiltered lists (exact otherwise), "none" skips counting.
+# The default is exact for offset pages and none for cursor pages.
+#
+# NULL sort keys order as the greatest value on every dialect (ascending
+# NULLS LAST, descending NULLS FIRST, PostgreSQL's default, so the
+# (sort key, id) indexes still serve the order) and the keyset predicate has
+# explicit IS NULL branches, so rows with a NULL sort key are neither skipped
+# nor repeated.
+
+COUNT_MODES = ("exact", "estimated", "none")
+
+
+def encode_cursor(values) -> str:
+    payload = [v.isoformat() if isinstance(v, (datetime.date, datetime.datetime)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def _parse(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime.datetime:
+        return datetime.datetime.fromisoformat(value)
+    if python_type is datetime.date:
+        return datetime.date.fromisoformat(value)
+    return python_type(value)
+
+
+def decode_cursor(cursor: str, columns):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(values) != len(columns):
+            raise ValueError("cursor does not match this list")
+        return [_parse(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+def _estimated_count(query: Query, table_name: str):
+    db = query.session
+    if db.get_bind().dialect.name != "postgresql" or query.whereclause is not None:
+        return None
+    # Partitioned tables keep their row estimates on the partitions
+    estimate = db.execute(text(
+        "SELECT sum(c.reltuples) FILTER (WHERE c.reltuples > 0)::bigint FROM pg_class c "
+        "WHERE c.oid = CAST(:table AS regclass) "
+        "OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = CAST(:table AS regclass))"
+    ), {"table": table_name}).scalar()
+    # reltuples is -1 (or 0) for tables that have never been analyzed
+    return estimate if estimate and estimate > 0 else None
+
+
+def _count(query: Query, mode: str, table_name: str) -> Optional[int]:
+    if mode == "none":
+        return None
+    if mode == "estimated":
+        estimate = _estimated_count(query, table_name)
+        if estimate is not None:
+            return estimate
+    return query.order_by(None).count()
+
+
+def _after(sort_column, id_column, value, last_id, descending):
+    """Rows after (value, last_id) in the order built by paginate(), with NULL as the greatest sort key."""
+    next_id = id_column < last_id if descending else id_column > last_id
+    if value is None:
+        if descending:
+            # Descending starts with the NULLs: the rest of them, then every non-NULL key
+            return or_(and_(sort_column.is_(None), next_id), sort_column.isnot(None))
+        return and_(sort_column.is_(None), next_id)
+    if descending:
+        return and_(sort_column.isnot(None), or_(sort_column < value, and_(sort_column == value, next_id)))
+    return or_(sort_column > value, and_(sort_column == value, next_id), sort_column.is_(None))
+
+
+def paginate(
+    query: Query,
+    id_column,
+    sort_column=None,
+    descending: bool = False,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
+):
+    """Return the PaginatedResponse envelope for ``query`` ordered by (sort_column, id_column)."""
+    if count is None:
+        count = "none" if after else "exact"
+    if count not in COUNT_MODES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"count must be one of {', '.join(COUNT_MODES)}")
+
+    columns = [sort_column, id_column] if sort_column is not None else [id_column]
+    total = _count(query, count, id_column.table.name)
+
+    if after:
+        values = decode_cursor(after, columns)
+        if sort_column is None:
+            query = query.filter(id_column < values[0] if descending else id_column > values[0])
+        else:
+            query = query.filter(_after(sort_column, id_column, values[0], values[1], descending))
+        skip = 0
+
+    if sort_column is None:
+        query = query.order_by(id_column.desc() if descending else id_column.asc())
+    elif descending:
+        query = query.order_by(sort_column.desc().nulls_first(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc().nulls_last(), id_column.asc())
+    rows = query.offset(skip).limit(limit + 1).all() if limit > 0 else []
+    items = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+
+    if after:
+        page = None
+    else:
+        page = (skip // limit) + 1 if limit > 0 else 1
+    if total is None:
+        pages = None
+    else:
+        pages = (total + limit - 1) // limit if limit > 0 else 1
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "size": limit,
+        "pages": pages,
+        "next_cursor": next_cursor,
+    }
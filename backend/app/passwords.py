@@ -0,0 +1,37 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+# Password hashing for the whole app. bcrypt costs ~250 ms of CPU at the
+# default cost, so async endpoints must use the *_async helpers: they run the
+# work on a small dedicated pool (bcrypt releases the GIL while hashing) and
+# the event loop keeps serving other requests. PASSWORD_HASH_WORKERS bounds
+# how many hashes run at once; extra logins queue instead of starving the
+# sale endpoints of CPU.
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, get_password_hash, password)
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Cache of verified principals for the auth dependencies, keyed by token
+# subject (email). A cached entry lives for PRINCIPAL_CACHE_TTL_SECONDS but
+# never past the exp of the token that loaded it, so the hot path only
+# decodes the JWT. User rows changed or deleted through any Session (role
+# changes, deactivation, delete_user) are evicted when the transaction
+# commits; other worker processes pick the change up within the TTL.
+
+TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+FIELDS = ("id", "username", "email", "role", "is_active", "created_at")
+
+
+class Principal:
+    """Detached snapshot of a User with the attributes endpoints read."""
+    __slots__ = FIELDS
+
+    def __init__(self, user: models.User):
+        for field in FIELDS:
+            setattr(self, field, getattr(user, field))
+
+
+class PrincipalCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # email -> (principal, expires_at as epoch seconds)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, email: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[email]
+            self.misses += 1
+            return None
+
+    def put(self, user: models.User, token_exp=None):
+        expires_at = time.time() + TTL_SECONDS
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        principal = Principal(user)
+        with self._lock:
+            if len(self._entries) >= MAX_ENTRIES:
+                self._entries.clear()
+            self._entries[user.email] = (principal, expires_at)
+        return principal
+
+    def invalidate(self, email: str):
+        with self._lock:
+            if self._entries.pop(email, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "ttl_seconds": TTL_SECONDS
+            }
+
+
+principal_cache = PrincipalCache()
+
+
+def _emails(user: models.User):
+    # Old and new email, so a changed address evicts the entry it was cached under
+    history = inspect(user).attrs.email.history
+    return {email for email in (user.email, *history.deleted) if email}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_user_changes(session, flush_context):
+    changed = session.info.setdefault("principal_pending", set())
+    for obj in session.dirty.union(session.deleted):
+        if isinstance(obj, models.User):
+            changed.update(_emails(obj))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_user_changes(session):
+    for email in session.info.pop("principal_pending", ()):
+        principal_cache.invalidate(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_changes(session):
+    session.info.pop("principal_pending", None)
@@ -0,0 +1,134 @@
+import datetime
+from collections import defaultdict
+
+from sqlalchemy import Float, String, cast, func, literal, null, select, union_all
+from sqlalchemy.orm import Session
+
+from . import date_ranges, models
+
+# Profit/loss is computed as grouped SQL over sales, sale_items, employee_bills
+# and expenses. All four aggregates are sent as one UNION ALL statement, so a
+# report of any length costs a single round-trip.
+
+
+def _unit_cost():
+    # cost_at_sale is captured when the sale is made; rows recorded before that
+    # column existed fall back to the medicine's current purchase price.
+    return func.coalesce(models.SaleItem.cost_at_sale, models.Medicine.purchase_price, 0)
+
+
+def profit_loss_statement(start_date: datetime.date, end_date: datetime.date):
+    """UNION ALL of the four daily aggregates: (kind, day, category, amount, paid, due)."""
+    start, end = date_ranges.between(start_date, end_date)
+    revenue = select(
+        literal("revenue").label("kind"),
+        models.Sale.sale_date.label("day"),
+        cast(null(), String).label("category"),
+        func.sum(models.Sale.total_amount).label("amount"),
+        func.sum(models.Sale.amount_paid).label("paid"),
+        func.sum(models.Sale.due_amount).label("due"),
+    ).where(*date_ranges.predicates(models.Sale.sale_date, start, end)).group_by(models.Sale.sale_date)
+
+    cogs = select(
+        literal("cogs"),
+        models.Sale.sale_date,
+        cast(null(), String),
+        func.sum(models.SaleItem.quantity * _unit_cost()),
+        cast(null(), Float),
+        cast(null(), Float),
+    ).select_from(models.SaleItem).join(
+        models.Sale, models.SaleItem.sale_id == models.Sale.id
+    ).outerjoin(
+        models.Medicine, models.SaleItem.medicine_id == models.Medicine.id
+    ).where(*date_ranges.predicates(models.Sale.sale_date, start, end)).group_by(models.Sale.sale_date)
+
+    salaries = select(
+        literal("salary"),
+        models.EmployeeBill.payment_date,
+        cast(null(), String),
+        func.sum(models.EmployeeBill.total_amount),
+        cast(null(), Float),
+        cast(null(), Float),
+    ).where(*date_ranges.predicates(models.EmployeeBill.payment_date, start, end)).group_by(models.EmployeeBill.payment_date)
+
+    expenses = select(
+        literal("expense"),
+        models.Expense.expense_date,
+        models.Expense.category,
+        func.sum(models.Expense.amount),
+        cast(null(), Float),
+        cast(null(), Float),
+    ).where(*date_ranges.predicates(models.Expense.expense_date, start, end)).group_by(
+        models.Expense.expense_date, models.Expense.category
+    )
+
+    return union_all(revenue, cogs, salaries, expenses)
+
+
+def _empty_bucket():
+    return {
+        "revenue": 0.0,
+        "sales_cash": 0.0,
+        "sales_due": 0.0,
+        "cogs": 0.0,
+        "employee_costs": 0.0,
+        "other_expenses": 0.0,
+        "profit": 0.0,
+    }
+
+
+def _add_row(bucket, kind, amount, paid, due):
+    if kind == "revenue":
+        bucket["revenue"] += amount
+        bucket["sales_cash"] += paid or 0.0
+        bucket["sales_due"] += due or 0.0
+    elif kind == "cogs":
+        bucket["cogs"] += amount
+    elif kind == "salary":
+        bucket["employee_costs"] += amount
+    elif kind == "expense":
+        bucket["other_expenses"] += amount
+
+
+def _finish(bucket):
+    bucket["profit"] = bucket["revenue"] - bucket["cogs"] - bucket["employee_costs"] - bucket["other_expenses"]
+    return bucket
+
+
+def get_profit_loss(db: Session, start_date: datetime.date, end_date: datetime.date):
+    totals = _empty_bucket()
+    daily = defaultdict(_empty_bucket)
+    monthly = defaultdict(_empty_bucket)
+    categories = defaultdict(float)
+
+    for kind, day, category, amount, paid, due in db.execute(profit_loss_statement(start_date, end_date)):
+        amount = amount or 0.0
+        if isinstance(day, str):
+            day = datetime.date.fromisoformat(day)
+        month = day.strftime("%Y-%m") if day else None
+        for bucket in (totals, daily[day], monthly[month]):
+            _add_row(bucket, kind, amount, paid, due)
+        if kind == "expense":
+            categories[category or "Uncategorized"] += amount
+
+    _finish(totals)
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "total_revenue": totals["revenue"],
+        "total_sales_cash": totals["sales_cash"],
+        "total_sales_due": totals["sales_due"],
+        "total_cogs": totals["cogs"],
+        "total_employee_costs": totals["employee_costs"],
+        "total_other_expenses": totals["other_expenses"],
+        "profit": totals["profit"],
+        "daily": [
+            {"date": day, **_finish(bucket)} for day, bucket in sorted(daily.items(), key=lambda x: x[0] or datetime.date.min)
+        ],
+        "monthly": [
+            {"month": month, **_finish(bucket)} for month, bucket in sorted(monthly.items(), key=lambda x: x[0] or "")
+        ],
+        "expense_categories": [
+            {"category": category, "amount": amount} for category, amount in sorted(categories.items())
+        ],
+    }
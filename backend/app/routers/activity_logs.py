@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
 from .. import crud, models, schemas
 from ..dependencies import get_db
 from ..auth import get_current_active_user
@@ -11,18 +12,20 @@ router = APIRouter()
 def read_activity_logs(
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     if current_user.role != "superadmin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view activity logs")
-    data = crud.get_activity_logs(db, skip=skip, limit=limit)
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = (data["total"] + limit - 1) // limit if limit > 0 else 1
-    return {
-        "items": data["items"],
-        "total": data["total"],
-        "page": page,
-        "size": limit,
-        "pages": total_pages
-    }
+    # end_date is inclusive
+    start = datetime.combine(start_date, time.min) if start_date else None
+    end = datetime.combine(end_date + timedelta(days=1), time.min) if end_date else None
+    return crud.get_activity_logs(
+        db, skip=skip, limit=limit, after=after, count=count, user_id=user_id, action=action, start=start, end=end
+    )
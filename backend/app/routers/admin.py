@@ -0,0 +1,76 @@
+from typing import Optional
+
+from anyio import to_thread
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from .. import activity_retention, database, mail, models
+from ..activity_log import activity_writer
+from ..auth import get_current_active_user
+from ..dependencies import get_db
+from ..db_pool import pool_metrics
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+)
+
+
+@router.get("/db-pool/")
+async def get_db_pool_stats(
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role != "superadmin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view pool stats")
+    stats = {
+        "pool": pool_metrics.snapshot(database.engine.pool),
+        # Sync endpoints run on this threadpool; each holds a connection while it queries
+        "threadpool_size": to_thread.current_default_thread_limiter().total_tokens,
+        "settings": {
+            "pool_size": database.DB_POOL_SIZE,
+            "max_overflow": database.DB_MAX_OVERFLOW,
+            "pool_timeout": database.DB_POOL_TIMEOUT,
+            "pool_recycle": database.DB_POOL_RECYCLE,
+            "pool_pre_ping": database.DB_POOL_PRE_PING,
+            "statement_timeout_ms": database.DB_STATEMENT_TIMEOUT_MS,
+            "application_name": database.DB_APPLICATION_NAME
+        }
+    }
+    if database.async_engine is not None:
+        stats["async_pool"] = {"status": database.async_engine.pool.status()}
+    return stats
+
+
+@router.get("/activity-log-writer/")
+async def get_activity_log_writer_stats(
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role != "superadmin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view activity log writer stats")
+    return activity_writer.stats()
+
+
+@router.get("/email-outbox/")
+def get_email_outbox_stats(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role != "superadmin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view email outbox stats")
+    return {"messages": mail.outbox_counts(db), "dispatcher": mail.outbox_dispatcher.stats()}
+
+
+@router.post("/activity-logs/archive/")
+def archive_activity_logs(
+    retention_months: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role != "superadmin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to archive activity logs")
+    created = activity_retention.ensure_partitions(db)
+    try:
+        archived = activity_retention.archive_old_logs(db, retention_months=retention_months)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"partitions": created, "archived": archived}
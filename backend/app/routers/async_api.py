@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import datetime
+from typing import Optional
+
+from .. import async_crud, date_ranges, schemas, models
+from ..dependencies import get_async_db
+from ..auth import get_current_active_user
+
+# Async twins of the hot endpoints, included ahead of the sync routers when
+# ASYNC_DB is enabled so they take over the same paths.
+
+router = APIRouter()
+
+
+@router.get(
+    "/medicines/",
+    response_model=schemas.PaginatedResponse[schemas.MedicineListItem],
+    response_model_exclude_unset=True
+)
+async def read_medicines(skip: int = 0, limit: int = 1000, after: Optional[str] = None, count: Optional[str] = None, search: str = None, stock_status: str = None, manufacturer: str = None, fields: Optional[str] = None, include: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    includes = {i.strip() for i in include.split(",")} if include else set()
+    try:
+        return await async_crud.get_medicines(
+            db, skip=skip, limit=limit, search=search, stock_status=stock_status, manufacturer=manufacturer,
+            after=after, count=count, fields=field_list, include_batches="batches" in includes
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/sales/", response_model=schemas.Sale)
+async def create_sale(
+    sale: schemas.SaleCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["superadmin", "admin", "employee"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to create sales")
+    try:
+        return await async_crud.create_sale(db, sale=sale, user_id=current_user.id, user_role=current_user.role)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/sales/", response_model=schemas.PaginatedResponse[schemas.Sale])
+async def read_sales(
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
+    filter_type: str = Query(None, alias="filter"),
+    date: str = None,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+    quarter: Optional[int] = None,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    try:
+        start, end = date_ranges.resolve(month=month, year=year, quarter=quarter, start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await async_crud.get_sales(
+        db, skip=skip, limit=limit, filter_type=filter_type, date_filter=date, after=after, count=count, start=start, end=end
+    )
+
+
+@router.get("/reports/summary/")
+async def get_dashboard_summary(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    return await async_crud.get_dashboard_summary(db)
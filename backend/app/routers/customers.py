@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import Optional
+from .. import customers, models, schemas
+from ..dependencies import get_db
+from ..auth import get_current_active_user
+
+router = APIRouter()
+
+
+@router.get("/customers/", response_model=schemas.PaginatedResponse[schemas.Customer])
+def read_customers(
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
+    search: Optional[str] = None,
+    outstanding: bool = False,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    # outstanding=true lists customers who owe money, largest balance first
+    return customers.get_customers(
+        db, search=search, outstanding=outstanding, skip=skip, limit=limit, after=after, count=count
+    )
+
+
+@router.get("/customers/lookup/", response_model=schemas.Customer)
+def lookup_customer(
+    mobile: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """Customer and outstanding balance for a mobile number, as typed at the counter"""
+    db_customer = customers.get_by_mobile(db, mobile)
+    if db_customer is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return db_customer
+
+
+@router.post("/customers/rebuild/")
+def rebuild_customer_ledger(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["superadmin", "admin"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to rebuild the customer ledger")
+    return customers.rebuild_ledger(db)
+
+
+@router.get("/customers/{customer_id}", response_model=schemas.Customer)
+def read_customer(
+    customer_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    db_customer = db.query(models.Customer).filter(models.Customer.id == customer_id).first()
+    if db_customer is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return db_customer
+
+
+@router.get("/customers/{customer_id}/statement/", response_model=schemas.CustomerStatement)
+def read_customer_statement(
+    customer_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    statement = customers.get_statement(db, customer_id, skip=skip, limit=limit, after=after, count=count)
+    if statement is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return statement
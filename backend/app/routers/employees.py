@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from .. import crud, schemas, models
 from ..dependencies import get_db
@@ -22,22 +22,15 @@ def create_employee(
 def read_employees(
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
     search: str = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     if current_user.role not in ["superadmin", "admin"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view employees")
-    data = crud.get_employees(db, skip=skip, limit=limit, search=search)
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = (data["total"] + limit - 1) // limit if limit > 0 else 1
-    return {
-        "items": data["items"],
-        "total": data["total"],
-        "page": page,
-        "size": limit,
-        "pages": total_pages
-    }
+    return crud.get_employees(db, skip=skip, limit=limit, search=search, after=after, count=count)
 
 @router.put("/employees/{employee_id}", response_model=schemas.Employee)
 def update_employee(
@@ -80,18 +73,11 @@ def create_employee_bill(
 def read_employee_bills(
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     if current_user.role not in ["superadmin", "admin"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view employee bills")
-    data = crud.get_employee_bills(db, skip=skip, limit=limit)
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = (data["total"] + limit - 1) // limit if limit > 0 else 1
-    return {
-        "items": data["items"],
-        "total": data["total"],
-        "page": page,
-        "size": limit,
-        "pages": total_pages
-    }
+    return crud.get_employee_bills(db, skip=skip, limit=limit, after=after, count=count)
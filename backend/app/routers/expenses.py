@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import date
+from typing import List, Optional
 
-from .. import crud, schemas, models
+from .. import crud, date_ranges, schemas, models
 from ..dependencies import get_db
 from ..auth import get_current_active_user
 
@@ -22,20 +23,22 @@ def create_expense(
 def read_expenses(
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
     search: str = None,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+    quarter: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    data = crud.get_expenses(db, skip=skip, limit=limit, search=search)
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = (data["total"] + limit - 1) // limit if limit > 0 else 1
-    return {
-        "items": data["items"],
-        "total": data["total"],
-        "page": page,
-        "size": limit,
-        "pages": total_pages
-    }
+    try:
+        start, end = date_ranges.resolve(month=month, year=year, quarter=quarter, start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return crud.get_expenses(db, skip=skip, limit=limit, search=search, after=after, count=count, start=start, end=end)
 
 @router.delete("/expenses/{expense_id}", response_model=schemas.Expense)
 def delete_expense(
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from .. import crud, schemas, models
 from ..dependencies import get_db
@@ -16,17 +16,8 @@ def create_investment(
 ):
     if current_user.role not in ["superadmin", "admin"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
-    return crud.create_investment(db=db, investment=investment, user_id=current_user.id)
+    return crud.create_investment(db=db, investment=investment, user_id=current_user.id, user_role=current_user.role)
 
 @router.get("/investments/", response_model=schemas.PaginatedResponse[schemas.Investment])
-def read_investments(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    data = crud.get_investments(db, skip=skip, limit=limit)
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = (data["total"] + limit - 1) // limit if limit > 0 else 1
-    return {
-        "items": data["items"],
-        "total": data["total"],
-        "page": page,
-        "size": limit,
-        "pages": total_pages
-    }
+def read_investments(skip: int = 0, limit: int = 100, after: Optional[str] = None, count: Optional[str] = None, db: Session = Depends(get_db)):
+    return crud.get_investments(db, skip=skip, limit=limit, after=after, count=count)
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from typing import List
-from .. import crud, models, schemas
+from typing import List, Optional
+from .. import crud, models, schemas, search, typeahead
 from ..dependencies import get_db
 from ..auth import get_current_active_user
 
@@ -17,21 +17,49 @@ def create_medicine(
 ):
     if current_user.role not in ["superadmin", "admin"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to create medicines")
-    return crud.create_medicine(db=db, medicine=medicine, user_id=current_user.id)
-
-
-@router.get("/medicines/", response_model=schemas.PaginatedResponse[schemas.Medicine])
-def read_medicines(skip: int = 0, limit: int = 1000, search: str = None, stock_status: str = None, manufacturer: str = None, db: Session = Depends(get_db)):
-    data = crud.get_medicines(db, skip=skip, limit=limit, search=search, stock_status=stock_status, manufacturer=manufacturer)
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = (data["total"] + limit - 1) // limit if limit > 0 else 1
-    return {
-        "items": data["items"],
-        "total": data["total"],
-        "page": page,
-        "size": limit,
-        "pages": total_pages
-    }
+    return crud.create_medicine(db=db, medicine=medicine, user_id=current_user.id, user_role=current_user.role)
+
+
+@router.get(
+    "/medicines/",
+    response_model=schemas.PaginatedResponse[schemas.MedicineListItem],
+    response_model_exclude_unset=True
+)
+def read_medicines(skip: int = 0, limit: int = 1000, after: Optional[str] = None, count: Optional[str] = None, search: str = None, stock_status: str = None, manufacturer: str = None, fields: Optional[str] = None, include: Optional[str] = None, db: Session = Depends(get_db)):
+    # ?fields=name,stock_quantity trims the row; ?include=batches attaches batches
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    includes = {i.strip() for i in include.split(",")} if include else set()
+    try:
+        return crud.get_medicines(
+            db, skip=skip, limit=limit, search=search, stock_status=stock_status, manufacturer=manufacturer,
+            after=after, count=count, fields=field_list, include_batches="batches" in includes
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/medicines/search/", response_model=List[schemas.MedicineSearchResult])
+def search_medicines(q: str, limit: int = 20, db: Session = Depends(get_db)):
+    results = search.search_medicines(db, q, limit=min(limit, 100))
+    return [
+        schemas.MedicineSearchResult(
+            id=medicine.id,
+            name=medicine.name,
+            generic_name=medicine.generic_name,
+            manufacturer=medicine.manufacturer,
+            strength=medicine.strength,
+            medicine_type=medicine.medicine_type,
+            purchase_price=medicine.purchase_price or 0.0,
+            selling_price=medicine.selling_price or 0.0,
+            stock_quantity=medicine.stock_quantity or 0,
+            score=round(float(score or 0), 4)
+        ) for medicine, score in results
+    ]
+
+
+@router.get("/medicines/autocomplete/", response_model=List[schemas.MedicineSuggestion])
+def autocomplete_medicines(q: str, limit: int = 10, db: Session = Depends(get_db)):
+    return typeahead.suggest(db, q, limit=min(limit, 50))
 
 
 @router.get("/medicines/generic-names", response_model=List[str])
@@ -115,22 +143,15 @@ def read_medicine_batches(
     medicine_id: int,
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     db_medicine = crud.get_medicine(db, medicine_id=medicine_id)
     if db_medicine is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Medicine not found")
-    data = crud.get_medicine_batches(db, medicine_id=medicine_id, skip=skip, limit=limit)
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = (data["total"] + limit - 1) // limit if limit > 0 else 1
-    return {
-        "items": data["items"],
-        "total": data["total"],
-        "page": page,
-        "size": limit,
-        "pages": total_pages
-    }
+    return crud.get_medicine_batches(db, medicine_id=medicine_id, skip=skip, limit=limit, after=after, count=count)
 
 
 @router.get("/medicines/{medicine_id}/batches/{batch_id}", response_model=schemas.MedicineBatch)
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import date
+from typing import List, Optional
 from pydantic import BaseModel
-from .. import crud, schemas, models
+from .. import crud, date_ranges, schemas, models, supplier_ledger
 from ..dependencies import get_db
 from ..auth import get_current_active_user
 
@@ -10,7 +11,9 @@ router = APIRouter()
 
 
 class PaidAmountUpdate(BaseModel):
-    paid_amount: float
+    paid_amount: float  # Amount of this payment, added to what was already paid
+    payment_date: Optional[date] = None  # Defaults to today
+    note: Optional[str] = None
 
 
 @router.post("/purchases/", response_model=schemas.Purchase)
@@ -19,7 +22,7 @@ def create_purchase(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    return crud.create_purchase(db=db, purchase=purchase, user_id=current_user.id)
+    return crud.create_purchase(db=db, purchase=purchase, user_id=current_user.id, user_role=current_user.role)
 
 @router.get("/purchases/", response_model=schemas.PaginatedResponse[schemas.Purchase])
 def read_purchases(
@@ -27,19 +30,23 @@ def read_purchases(
     limit: int = 100, 
     search: str = None,
     payment_status: str = None,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+    quarter: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    data = crud.get_purchases(db, skip=skip, limit=limit, search=search, payment_status=payment_status)
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = (data["total"] + limit - 1) // limit if limit > 0 else 1
-    return {
-        "items": data["items"],
-        "total": data["total"],
-        "page": page,
-        "size": limit,
-        "pages": total_pages
-    }
+    try:
+        start, end = date_ranges.resolve(month=month, year=year, quarter=quarter, start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return crud.get_purchases(
+        db, skip=skip, limit=limit, search=search, payment_status=payment_status, after=after, count=count, start=start, end=end
+    )
 
 @router.get("/purchases/{purchase_id}", response_model=schemas.Purchase)
 def read_purchase(
@@ -66,21 +73,13 @@ def update_paid_amount(
         from fastapi import status
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update payment status")
     
-    db_purchase = db.query(models.Purchase).filter(models.Purchase.id == purchase_id).first()
+    # Locked so that concurrent payments on one purchase all add up
+    db_purchase = db.query(models.Purchase).filter(models.Purchase.id == purchase_id).with_for_update().populate_existing().first()
     if not db_purchase:
         raise HTTPException(status_code=404, detail="Purchase not found")
     
-    # ADD the new payment to existing paid_amount
-    db_purchase.paid_amount += data.paid_amount
-    
-    # Update payment status
-    net_amount = db_purchase.total_amount - (db_purchase.invoice_discount or 0)
-    if db_purchase.paid_amount >= net_amount:
-        db_purchase.payment_status = "paid"
-    elif db_purchase.paid_amount > 0:
-        db_purchase.payment_status = "partial"
-    else:
-        db_purchase.payment_status = "unpaid"
+    # Recorded as a dated supplier payment; paid_amount and payment_status follow
+    supplier_ledger.record_payment(db, db_purchase, data.paid_amount, data.payment_date, data.note)
     
     db.commit()
     db.refresh(db_purchase)
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from starlette.status import HTTP_403_FORBIDDEN  # The dues endpoints take a `status` query parameter
 from sqlalchemy.orm import Session
-from datetime import date, timedelta
-from sqlalchemy import func, and_, extract
-from .. import models
+from datetime import date
+from typing import Optional
+from .. import date_ranges, expiry, exports, models, profit_loss, summary
 from ..dependencies import get_db
 
 from ..auth import get_current_active_user
@@ -17,110 +18,55 @@ def get_dashboard_summary(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    today = date.today()
-    
-    total_medicines = db.query(models.Medicine).count()
-    total_sales_today = db.query(func.sum(models.Sale.total_amount)).filter(models.Sale.sale_date == today).scalar() or 0.0
-    total_due = db.query(func.sum(models.Sale.due_amount)).scalar() or 0.0
-    
-    # Low stock alert (e.g. stock < 10)
-    low_stock_medicines = db.query(models.Medicine).filter(models.Medicine.stock_quantity < 10).all()
-    low_stock_count = len(low_stock_medicines)
-    
-    # Expiry alerts - medicines expiring in 30, 60, 90 days
-    expiry_30_days = today + timedelta(days=30)
-    expiry_60_days = today + timedelta(days=60)
-    expiry_90_days = today + timedelta(days=90)
-    
-    # Get batches expiring soon (within 90 days) that still have quantity
-    expiring_batches = db.query(models.MedicineBatch).join(models.Medicine).filter(
-        and_(
-            models.MedicineBatch.expiry_date <= expiry_90_days,
-            models.MedicineBatch.expiry_date >= today,
-            models.MedicineBatch.batch_quantity > 0
-        )
-    ).all()
-    
-    # Get already expired batches
-    expired_batches = db.query(models.MedicineBatch).join(models.Medicine).filter(
-        and_(
-            models.MedicineBatch.expiry_date < today,
-            models.MedicineBatch.batch_quantity > 0
+    return summary.build_dashboard_summary(db)
+
+@router.post("/summary/rebuild/")
+def rebuild_dashboard_summary(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["superadmin", "admin"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to rebuild the dashboard summary")
+    return summary.rebuild_summary(db)
+
+@router.get("/expiry/")
+def get_expiry_report(
+    bucket: Optional[str] = None,
+    manufacturer: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    # bucket: expired, 30, 60 or 90 (days until expiry)
+    try:
+        return expiry.list_expiry_alerts(
+            db, bucket=bucket, manufacturer=manufacturer, skip=skip, limit=limit, after=after, count=count
         )
-    ).all()
-    
-    # Categorize expiring medicines
-    expiring_soon = []  # Within 30 days
-    expiring_medium = []  # 30-60 days
-    expiring_later = []  # 60-90 days
-    
-    for batch in expiring_batches:
-        item = {
-            "medicine_name": batch.medicine.name,
-            "batch_quantity": batch.batch_quantity,
-            "expiry_date": batch.expiry_date.isoformat(),
-            "days_left": (batch.expiry_date - today).days,
-            "invoice_number": batch.invoice_number
-        }
-        if batch.expiry_date <= expiry_30_days:
-            expiring_soon.append(item)
-        elif batch.expiry_date <= expiry_60_days:
-            expiring_medium.append(item)
-        else:
-            expiring_later.append(item)
-    
-    expired_items = [
-        {
-            "medicine_name": batch.medicine.name,
-            "batch_quantity": batch.batch_quantity,
-            "expiry_date": batch.expiry_date.isoformat(),
-            "days_expired": (today - batch.expiry_date).days,
-            "invoice_number": batch.invoice_number
-        } for batch in expired_batches
-    ]
-    
-    # Recent 5 sales
-    recent_sales = db.query(models.Sale).order_by(models.Sale.id.desc()).limit(5).all()
-    
-    # Supplier dues (unpaid purchases)
-    supplier_dues = db.query(models.Purchase).filter(models.Purchase.payment_status != "paid").all()
-    total_supplier_due = sum(
-        max(0, (p.total_amount - (p.invoice_discount or 0)) - (p.paid_amount or 0)) 
-        for p in supplier_dues
-    )
-    
-    return {
-        "total_medicines": total_medicines,
-        "total_sales_today": total_sales_today,
-        "total_due": total_due,
-        "total_supplier_due": total_supplier_due,
-        "low_stock_count": low_stock_count,
-        "low_stock_medicines": [
-            {
-                "id": med.id,
-                "name": med.name,
-                "stock_quantity": med.stock_quantity,
-                "selling_price": med.selling_price
-            } for med in low_stock_medicines
-        ],
-        "expiry_alerts": {
-            "expired_count": len(expired_items),
-            "expired_items": expired_items,
-            "expiring_30_days": expiring_soon,
-            "expiring_60_days": expiring_medium,
-            "expiring_90_days": expiring_later,
-            "total_expiring_soon": len(expiring_soon) + len(expired_items)
-        },
-        "recent_sales": [
-            {
-                "id": sale.id,
-                "date": sale.sale_date,
-                "buyer": sale.buyer_name or "Cash",
-                "total": sale.total_amount,
-                "due": sale.due_amount
-            } for sale in recent_sales
-        ]
-    }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/expiry/manufacturers/")
+def get_expiry_by_manufacturer(
+    bucket: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    try:
+        return expiry.expiry_by_manufacturer(db, bucket=bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/expiry/sweep/")
+def sweep_expiry_alerts(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["superadmin", "admin"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to run the expiry sweep")
+    return expiry.sweep_expiry(db)
 
 @router.get("/profit-loss/")
 def get_profit_loss(
@@ -132,110 +78,117 @@ def get_profit_loss(
     if current_user.role not in ["superadmin", "admin"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view profit/loss reports")
     
-    sales = db.query(models.Sale).filter(models.Sale.sale_date.between(start_date, end_date)).all()
-    salaries = db.query(models.EmployeeBill).filter(models.EmployeeBill.payment_date.between(start_date, end_date)).all()
-    expenses = db.query(models.Expense).filter(models.Expense.expense_date.between(start_date, end_date)).all()
+    return profit_loss.get_profit_loss(db, start_date, end_date)
 
-    total_revenue = sum(sale.total_amount for sale in sales)
-    total_sales_cash = sum(sale.amount_paid for sale in sales)
-    total_sales_due = sum(sale.due_amount for sale in sales)
-    
-    total_employee_costs = sum(bill.total_amount for bill in salaries)
-    total_other_expenses = sum(exp.amount for exp in expenses)
-    
-    # Calculate Cost of Goods Sold (COGS)
-    total_cogs = 0
-    for sale in sales:
-        for item in sale.items:
-            total_cogs += (item.quantity * item.medicine.purchase_price)
-
-    profit = total_revenue - total_cogs - total_employee_costs - total_other_expenses
-
-    return {
-        "start_date": start_date,
-        "end_date": end_date,
-        "total_revenue": total_revenue,
-        "total_sales_cash": total_sales_cash,
-        "total_sales_due": total_sales_due,
-        "total_cogs": total_cogs,
-        "total_employee_costs": total_employee_costs,
-        "total_other_expenses": total_other_expenses,
-        "profit": profit
-    }
+@router.get("/profit-loss/export/")
+def export_profit_loss(
+    start_date: date,
+    end_date: date,
+    format: str = "csv",
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["superadmin", "admin"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view profit/loss reports")
+    return _export(
+        f"profit-loss-{start_date}-{end_date}", exports.PROFIT_LOSS_COLUMNS,
+        exports.profit_loss_query(start_date, end_date), format
+    )
+
+@router.get("/sales/export/")
+def export_sales(
+    start_date: date,
+    end_date: date,
+    format: str = "csv",
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["superadmin", "admin"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to export sales")
+    return _export(
+        f"sales-{start_date}-{end_date}", exports.SALE_LINES_COLUMNS,
+        exports.sale_lines_query(start_date, end_date), format
+    )
 
 @router.get("/customer-dues/")
 def get_customer_dues(
     month: int = None,
     year: int = None,
+    quarter: int = None,
+    start_date: date = None,
+    end_date: date = None,
     status: str = "all", # all, due, paid
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     if current_user.role not in ["superadmin", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view due reports")
+        raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Not authorized to view due reports")
 
-    query = db.query(models.Sale)
+    start, end = _date_range(month, year, quarter, start_date, end_date)
+    rows = db.execute(exports.customer_dues_query(start, end, status))
+    return [dict(zip(exports.CUSTOMER_DUES_COLUMNS, row)) for row in rows]
 
-    if month and year:
-        query = query.filter(extract('month', models.Sale.sale_date) == month)
-        query = query.filter(extract('year', models.Sale.sale_date) == year)
-    elif year:
-        query = query.filter(extract('year', models.Sale.sale_date) == year)
-
-    if status == "due":
-        query = query.filter(models.Sale.due_amount > 0)
-    elif status == "paid":
-        query = query.filter(models.Sale.due_amount == 0)
-
-    sales = query.all()
-    
-    return [
-        {
-            "id": sale.id,
-            "date": sale.sale_date,
-            "customer_name": sale.buyer_name or "Cash Customer",
-            "customer_mobile": sale.buyer_mobile,
-            "total_amount": sale.total_amount,
-            "paid_amount": sale.amount_paid,
-            "due_amount": sale.due_amount
-        } for sale in sales
-    ]
+@router.get("/customer-dues/export/")
+def export_customer_dues(
+    month: int = None,
+    year: int = None,
+    quarter: int = None,
+    start_date: date = None,
+    end_date: date = None,
+    status: str = "all",
+    format: str = "csv",
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["superadmin", "admin"]:
+        raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Not authorized to view due reports")
+    start, end = _date_range(month, year, quarter, start_date, end_date)
+    return _export(
+        "customer-dues", exports.CUSTOMER_DUES_COLUMNS, exports.customer_dues_query(start, end, status), format
+    )
 
 @router.get("/supplier-dues/")
 def get_supplier_dues(
     month: int = None,
     year: int = None,
+    quarter: int = None,
+    start_date: date = None,
+    end_date: date = None,
     status: str = "all", # all, due, paid
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     if current_user.role not in ["superadmin", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view due reports")
-
-    query = db.query(models.Purchase)
+        raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Not authorized to view due reports")
 
-    if month and year:
-        query = query.filter(extract('month', models.Purchase.purchase_date) == month)
-        query = query.filter(extract('year', models.Purchase.purchase_date) == year)
-    elif year:
-        query = query.filter(extract('year', models.Purchase.purchase_date) == year)
+    start, end = _date_range(month, year, quarter, start_date, end_date)
+    rows = db.execute(exports.supplier_dues_query(start, end, status))
+    return [dict(zip(exports.SUPPLIER_DUES_COLUMNS, exports.supplier_dues_row(row))) for row in rows]
 
-    if status == "due":
-        query = query.filter(models.Purchase.payment_status != "paid")
-    elif status == "paid":
-        query = query.filter(models.Purchase.payment_status == "paid")
+@router.get("/supplier-dues/export/")
+def export_supplier_dues(
+    month: int = None,
+    year: int = None,
+    quarter: int = None,
+    start_date: date = None,
+    end_date: date = None,
+    status: str = "all",
+    format: str = "csv",
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["superadmin", "admin"]:
+        raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Not authorized to view due reports")
+    start, end = _date_range(month, year, quarter, start_date, end_date)
+    return _export(
+        "supplier-dues", exports.SUPPLIER_DUES_COLUMNS, exports.supplier_dues_query(start, end, status), format,
+        row_builder=exports.supplier_dues_row
+    )
 
-    purchases = query.all()
-    
-    return [
-        {
-            "id": purchase.id,
-            "date": purchase.purchase_date,
-            "invoice_number": purchase.invoice_number,
-            "supplier_name": purchase.supplier_name,
-            "total_amount": purchase.total_amount - (purchase.invoice_discount or 0),
-            "paid_amount": purchase.paid_amount,
-            "due_amount": max(0, (purchase.total_amount - (purchase.invoice_discount or 0)) - purchase.paid_amount),
-            "status": purchase.payment_status
-        } for purchase in purchases
-    ]
+def _date_range(month, year, quarter, start_date, end_date):
+    try:
+        return date_ranges.resolve(month=month, year=year, quarter=quarter, start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _export(name, columns, query, export_format, row_builder=None):
+    try:
+        return exports.export_response(name, columns, query, export_format, row_builder=row_builder)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
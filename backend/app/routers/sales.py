@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+import datetime
+from typing import List, Optional
 
-from .. import crud, schemas, models
+from .. import crud, date_ranges, schemas, models
 from ..dependencies import get_db
 from ..auth import get_current_active_user
 
@@ -17,7 +18,7 @@ def create_sale(
     if current_user.role not in ["superadmin", "admin", "employee"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to create sales")
     try:
-        return crud.create_sale(db=db, sale=sale, user_id=current_user.id)
+        return crud.create_sale(db=db, sale=sale, user_id=current_user.id, user_role=current_user.role)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -25,21 +26,25 @@ def create_sale(
 def read_sales(
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
     filter_type: str = Query(None, alias="filter"),
     date: str = None,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+    quarter: Optional[int] = None,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    data = crud.get_sales(db, skip=skip, limit=limit, filter_type=filter_type, date_filter=date)
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = (data["total"] + limit - 1) // limit if limit > 0 else 1
-    return {
-        "items": data["items"],
-        "total": data["total"],
-        "page": page,
-        "size": limit,
-        "pages": total_pages
-    }
+    try:
+        start, end = date_ranges.resolve(month=month, year=year, quarter=quarter, start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return crud.get_sales(
+        db, skip=skip, limit=limit, filter_type=filter_type, date_filter=date, after=after, count=count, start=start, end=end
+    )
 
 @router.get("/sales/{sale_id}", response_model=schemas.Sale)
 def read_sale(
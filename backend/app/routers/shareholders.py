@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
 from .. import crud, models, schemas
 from ..dependencies import get_db
 from ..auth import get_current_active_user
@@ -14,10 +14,12 @@ router = APIRouter()
 def read_shareholders(
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    data = crud.get_shareholders(db, skip=skip, limit=limit)
+    data = crud.get_shareholders(db, skip=skip, limit=limit, after=after, count=count)
     shareholders = data["items"]
     
     # Calculate total system investment
@@ -29,15 +31,7 @@ def read_shareholders(
         sh.total_investment = total_inv
         sh.share_percentage = (total_inv / total_system_inv) * 100
     
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = (data["total"] + limit - 1) // limit if limit > 0 else 1
-    return {
-        "items": shareholders,
-        "total": data["total"],
-        "page": page,
-        "size": limit,
-        "pages": total_pages
-    }
+    return data
 
 @router.post("/profit-distributions/", response_model=schemas.ProfitDistribution)
 def distribute_profit(
@@ -47,22 +41,15 @@ def distribute_profit(
 ):
     if current_user.role != "superadmin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only Superadmin can distribute profits")
-    return crud.create_profit_distribution(db=db, distribution=distribution, user_id=current_user.id)
+    return crud.create_profit_distribution(db=db, distribution=distribution, user_id=current_user.id, user_role=current_user.role)
 
 @router.get("/profit-distributions/", response_model=schemas.PaginatedResponse[schemas.ProfitDistribution])
 def read_profit_distributions(
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    data = crud.get_profit_distributions(db, skip=skip, limit=limit)
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = (data["total"] + limit - 1) // limit if limit > 0 else 1
-    return {
-        "items": data["items"],
-        "total": data["total"],
-        "page": page,
-        "size": limit,
-        "pages": total_pages
-    }
+    return crud.get_profit_distributions(db, skip=skip, limit=limit, after=after, count=count)
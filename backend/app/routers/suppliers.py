@@ -1,13 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
-from .. import models, schemas
+from datetime import date
+from typing import List, Optional
+from .. import models, pagination, schemas, supplier_ledger
 from ..dependencies import get_db
 from ..auth import get_current_active_user
 
 router = APIRouter()
 
 
+def _commit_unique_name(db: Session):
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="A supplier with this name already exists")
+
+
 @router.post("/suppliers/", response_model=schemas.Supplier)
 def create_supplier(
     supplier: schemas.SupplierCreate,
@@ -19,7 +29,7 @@ def create_supplier(
     
     db_supplier = models.Supplier(**supplier.dict())
     db.add(db_supplier)
-    db.commit()
+    _commit_unique_name(db)
     db.refresh(db_supplier)
     return db_supplier
 
@@ -28,23 +38,49 @@ def create_supplier(
 def read_suppliers(
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     query = db.query(models.Supplier)
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
-    
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = (total + limit - 1) // limit if limit > 0 else 1
-    
-    return {
-        "items": items,
-        "total": total,
-        "page": page,
-        "size": limit,
-        "pages": total_pages
-    }
+    return pagination.paginate(query, models.Supplier.id, skip=skip, limit=limit, after=after, count=count)
+
+
+@router.get("/suppliers/aging/")
+def read_supplier_aging(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["superadmin", "admin"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    return supplier_ledger.get_aging(db)
+
+
+@router.post("/suppliers/balances/rebuild/")
+def rebuild_supplier_balances(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["superadmin", "admin"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    return supplier_ledger.rebuild_balances(db)
+
+
+@router.get("/suppliers/{supplier_id}/statement/")
+def read_supplier_statement(
+    supplier_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["superadmin", "admin"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    statement = supplier_ledger.get_statement(db, supplier_id, start_date=start_date, end_date=end_date)
+    if statement is None:
+        raise HTTPException(status_code=404, detail="Supplier not found")
+    return statement
 
 
 @router.get("/suppliers/{supplier_id}", response_model=schemas.Supplier)
@@ -76,7 +112,7 @@ def update_supplier(
     for key, value in supplier.dict().items():
         setattr(db_supplier, key, value)
     
-    db.commit()
+    _commit_unique_name(db)
     db.refresh(db_supplier)
     return db_supplier
 
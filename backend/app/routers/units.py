@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from .. import crud, schemas
 from ..dependencies import get_db
 
@@ -18,17 +18,8 @@ def create_unit(unit: schemas.UnitCreate, db: Session = Depends(get_db)):
     return crud.create_unit(db=db, unit=unit)
 
 @router.get("/", response_model=schemas.PaginatedResponse[schemas.Unit])
-def read_units(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    data = crud.get_units(db, skip=skip, limit=limit)
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = (data["total"] + limit - 1) // limit if limit > 0 else 1
-    return {
-        "items": data["items"],
-        "total": data["total"],
-        "page": page,
-        "size": limit,
-        "pages": total_pages
-    }
+def read_units(skip: int = 0, limit: int = 100, after: Optional[str] = None, count: Optional[str] = None, db: Session = Depends(get_db)):
+    return crud.get_units(db, skip=skip, limit=limit, after=after, count=count)
 
 @router.get("/{unit_id}", response_model=schemas.Unit)
 def read_unit(unit_id: int, db: Session = Depends(get_db)):
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from .. import auth, crud, models, schemas
+from .. import auth, crud, models, passwords, schemas
 from ..dependencies import get_db
-from ..mail import send_email
+from ..mail import outbox_dispatcher
+from ..principals import principal_cache
 
 router = APIRouter()
 
@@ -14,8 +16,9 @@ router = APIRouter()
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
-    user = crud.get_user_by_email(db, email=form_data.username)
-    if not user or not crud.verify_password(form_data.password, user.hashed_password):
+    # DB access and bcrypt both run off the event loop
+    user = await run_in_threadpool(crud.get_user_by_email, db, email=form_data.username)
+    if not user or not await passwords.verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -67,34 +70,40 @@ async def create_user(
     if current_user.role == "superadmin" and user.role not in ["admin", "employee", "customer"]:
         raise HTTPException(status_code=403, detail="Superadmins can only create admins, employees and customers")
 
-    db_user = crud.get_user_by_email(db, email=user.email)
+    db_user = await run_in_threadpool(crud.get_user_by_email, db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    await send_email([user.email], user.password)
-    return crud.create_user(db=db, user=user)
+    hashed_password = await passwords.get_password_hash_async(user.password)
+    db_user = await run_in_threadpool(
+        crud.create_user, db=db, user=user, hashed_password=hashed_password, send_credentials=True
+    )
+    outbox_dispatcher.wake()
+    return db_user
+
+
+@router.get("/users/principal-cache/")
+async def read_principal_cache_stats(
+    current_user: models.User = Depends(auth.get_current_active_user),
+):
+    if current_user.role != "superadmin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view auth cache stats")
+    return principal_cache.stats()
 
 
 @router.get("/users/", response_model=schemas.PaginatedResponse[schemas.User])
 async def get_users(
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    count: Optional[str] = None,
     search: str = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_active_user),
 ):
     if current_user.role not in ["superadmin", "admin"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view users")
-    data = crud.get_users(db, skip=skip, limit=limit, search=search)
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = (data["total"] + limit - 1) // limit if limit > 0 else 1
-    return {
-        "items": data["items"],
-        "total": data["total"],
-        "page": page,
-        "size": limit,
-        "pages": total_pages
-    }
+    return await run_in_threadpool(crud.get_users, db, skip=skip, limit=limit, search=search, after=after, count=count)
 
 
 @router.delete("/users/{user_id}", response_model=schemas.User)
@@ -105,7 +114,7 @@ async def delete_user(
 ):
     if current_user.role != "superadmin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete users")
-    db_user = crud.delete_user(db, user_id=user_id)
+    db_user = await run_in_threadpool(crud.delete_user, db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return db_user
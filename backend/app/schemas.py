@@ -6,10 +6,11 @@ T = TypeVar('T')
 
 class PaginatedResponse(BaseModel, Generic[T]):
     items: List[T]
-    total: int
-    page: int
+    total: Optional[int] = None  # None when counting was skipped (count=none)
+    page: Optional[int] = None  # None for cursor pages
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Pass back as ?after= for the next page
 
 # Unit Schemas
 class UnitBase(BaseModel):
@@ -37,6 +38,7 @@ class MedicineBatchBase(BaseModel):
     purchase_date: Optional[date] = None
     total_batch_discount: float
     selling_price: Optional[float] = 0.0 # Added selling_price
+    purchase_price: Optional[float] = None # Unit cost of this batch
 
 class MedicineBatchCreate(MedicineBatchBase):
     pass
@@ -73,6 +75,47 @@ class Medicine(MedicineBase):
     class Config:
         from_attributes = True
 
+class MedicineSummary(MedicineBase):
+    """Medicine without its batches, as nested in purchase and sale items."""
+    id: int
+    stock_quantity: int
+
+    class Config:
+        from_attributes = True
+
+class MedicineListItem(BaseModel):
+    # Every field but id is optional so ?fields= can trim the row
+    id: int
+    name: Optional[str] = None
+    generic_name: Optional[str] = None
+    manufacturer: Optional[str] = None
+    strength: Optional[str] = None
+    medicine_type: Optional[str] = None
+    purchase_price: Optional[float] = None
+    selling_price: Optional[float] = None
+    stock_quantity: Optional[int] = None
+    batch_count: Optional[int] = None
+    next_expiry: Optional[date] = None
+    batches: Optional[List[MedicineBatch]] = None  # Only with ?include=batches
+
+class MedicineSearchResult(MedicineBase):
+    id: int
+    stock_quantity: int
+    score: float
+
+    class Config:
+        from_attributes = True
+
+class MedicineSuggestion(BaseModel):
+    id: int
+    name: str
+    generic_name: Optional[str] = None
+    strength: Optional[str] = None
+    medicine_type: Optional[str] = None
+    manufacturer: Optional[str] = None
+    stock_quantity: int
+    selling_price: float
+
 # Unified Purchase Schema for Invoice-based entry
 class PurchaseInvoiceItem(BaseModel):
     # For new medicine
@@ -118,7 +161,7 @@ class PurchaseItemCreate(PurchaseItemBase):
 
 class PurchaseItem(PurchaseItemBase):
     id: int
-    medicine: Medicine
+    medicine: MedicineSummary
 
     class Config:
         from_attributes = True
@@ -138,6 +181,7 @@ class PurchaseCreate(PurchaseBase):
 
 class Purchase(PurchaseBase):
     id: int
+    supplier_id: Optional[int] = None
     items: List[PurchaseItem] = []
 
     @validator('total_amount', 'invoice_discount', 'paid_amount', pre=True, always=True)
@@ -168,7 +212,7 @@ class SaleItemCreate(SaleItemBase):
 class SaleItem(SaleItemBase):
     id: int
     price_at_sale: float
-    medicine: Medicine
+    medicine: MedicineSummary
 
     class Config:
         from_attributes = True
@@ -192,11 +236,37 @@ class Sale(SaleBase):
     id: int
     total_amount: float
     due_amount: float
+    customer_id: Optional[int] = None
     items: List[SaleItem] = []
 
     class Config:
         from_attributes = True
 
+# Customer Schemas
+class Customer(BaseModel):
+    id: int
+    name: Optional[str] = None
+    mobile: str
+    address: Optional[str] = None
+    balance: float
+
+    class Config:
+        from_attributes = True
+
+class CustomerLedgerEntry(BaseModel):
+    id: int
+    sale_id: Optional[int] = None
+    entry_date: date
+    kind: str
+    amount: float
+    balance_after: float
+
+    class Config:
+        from_attributes = True
+
+class CustomerStatement(PaginatedResponse[CustomerLedgerEntry]):
+    customer: Customer
+
 # Shareholder Schemas
 class ShareholderBase(BaseModel):
     name: str
@@ -338,6 +408,7 @@ class SupplierCreate(SupplierBase):
 
 class Supplier(SupplierBase):
     id: int
+    balance: Optional[float] = 0.0  # Outstanding due
     created_at: datetime
 
     class Config:
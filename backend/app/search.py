@@ -0,0 +1,142 @@
+import logging
+import re
+
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Ranked medicine search across name, generic name and manufacturer.
+# PostgreSQL: pg_trgm GIN indexes give index-backed substring, prefix and
+# fuzzy (similarity) matching. SQLite (local/test setups): an external-content
+# FTS5 table kept in sync by triggers gives ranked prefix matching.
+
+logger = logging.getLogger(__name__)
+
+TRGM_INDEXES = {
+    "ix_medicines_name_trgm": "name",
+    "ix_medicines_generic_name_trgm": "generic_name",
+    "ix_medicines_manufacturer_trgm": "manufacturer",
+}
+
+SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE medicines_fts USING fts5(
+        name, generic_name, manufacturer,
+        content='medicines', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER medicines_fts_ai AFTER INSERT ON medicines BEGIN
+        INSERT INTO medicines_fts(rowid, name, generic_name, manufacturer)
+        VALUES (new.id, new.name, new.generic_name, new.manufacturer);
+    END""",
+    """CREATE TRIGGER medicines_fts_ad AFTER DELETE ON medicines BEGIN
+        INSERT INTO medicines_fts(medicines_fts, rowid, name, generic_name, manufacturer)
+        VALUES ('delete', old.id, old.name, old.generic_name, old.manufacturer);
+    END""",
+    """CREATE TRIGGER medicines_fts_au AFTER UPDATE OF name, generic_name, manufacturer ON medicines BEGIN
+        INSERT INTO medicines_fts(medicines_fts, rowid, name, generic_name, manufacturer)
+        VALUES ('delete', old.id, old.name, old.generic_name, old.manufacturer);
+        INSERT INTO medicines_fts(rowid, name, generic_name, manufacturer)
+        VALUES (new.id, new.name, new.generic_name, new.manufacturer);
+    END""",
+    "INSERT INTO medicines_fts(medicines_fts) VALUES ('rebuild')",
+]
+
+
+def ensure_search_index(engine):
+    """Create the search indexes for the current dialect if they are missing."""
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if dialect == "postgresql":
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                for index_name, column in TRGM_INDEXES.items():
+                    conn.execute(text(
+                        f"CREATE INDEX IF NOT EXISTS {index_name} ON medicines USING gin ({column} gin_trgm_ops)"
+                    ))
+            elif dialect == "sqlite":
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'medicines_fts'"
+                )).first()
+                if not exists:
+                    for statement in SQLITE_FTS_DDL:
+                        conn.execute(text(statement))
+    except Exception as e:
+        # Search still works without the indexes, just without index support
+        logger.warning("Could not create medicine search index: %s", e)
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _search_postgresql(db: Session, term: str, limit: int):
+    pattern = _escape_like(term)
+    name_similarity = func.similarity(models.Medicine.name, term)
+    generic_similarity = func.similarity(func.coalesce(models.Medicine.generic_name, ""), term)
+    manufacturer_similarity = func.similarity(func.coalesce(models.Medicine.manufacturer, ""), term)
+    score = (
+        case((models.Medicine.name.ilike(f"{pattern}%", escape="\\"), 1.0), else_=0.0)
+        + func.greatest(name_similarity, generic_similarity * 0.8, manufacturer_similarity * 0.5)
+    ).label("score")
+
+    return db.query(models.Medicine, score).filter(
+        or_(
+            models.Medicine.name.ilike(f"%{pattern}%", escape="\\"),
+            models.Medicine.generic_name.ilike(f"%{pattern}%", escape="\\"),
+            models.Medicine.manufacturer.ilike(f"%{pattern}%", escape="\\"),
+            models.Medicine.name.op("%")(term),
+            models.Medicine.generic_name.op("%")(term),
+            models.Medicine.manufacturer.op("%")(term),
+        )
+    ).order_by(score.desc(), models.Medicine.name).limit(limit).all()
+
+
+def _search_sqlite(db: Session, term: str, limit: int):
+    tokens = re.findall(r"\w+", term.lower())
+    if not tokens:
+        return []
+    match = " ".join(f'"{token}"*' for token in tokens)
+    rows = db.execute(text(
+        "SELECT rowid, -bm25(medicines_fts, 10.0, 5.0, 1.0) AS score FROM medicines_fts "
+        "WHERE medicines_fts MATCH :match ORDER BY rank LIMIT :limit"
+    ), {"match": match, "limit": limit}).all()
+    if not rows:
+        return []
+    medicines = {
+        m.id: m for m in db.query(models.Medicine).filter(models.Medicine.id.in_([r[0] for r in rows])).all()
+    }
+    # Same name-prefix bonus as the PostgreSQL ranking
+    results = [
+        (medicines[rowid], score + (1.0 if (medicines[rowid].name or "").lower().startswith(term.lower()) else 0.0))
+        for rowid, score in rows if rowid in medicines
+    ]
+    return sorted(results, key=lambda result: result[1], reverse=True)
+
+
+def _search_fallback(db: Session, term: str, limit: int):
+    pattern = _escape_like(term)
+    score = case((models.Medicine.name.ilike(f"{pattern}%", escape="\\"), 1.0), else_=0.5).label("score")
+    return db.query(models.Medicine, score).filter(
+        or_(
+            models.Medicine.name.ilike(f"%{pattern}%", escape="\\"),
+            models.Medicine.generic_name.ilike(f"%{pattern}%", escape="\\"),
+            models.Medicine.manufacturer.ilike(f"%{pattern}%", escape="\\"),
+        )
+    ).order_by(score.desc(), models.Medicine.name).limit(limit).all()
+
+
+def search_medicines(db: Session, term: str, limit: int = 20):
+    """Return up to ``limit`` (medicine, score) pairs, best match first."""
+    term = (term or "").strip()
+    if not term:
+        return []
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return _search_postgresql(db, term, limit)
+    if dialect == "sqlite":
+        try:
+            return _search_sqlite(db, term, limit)
+        except OperationalError:
+            db.rollback()  # FTS5 table missing or unavailable in this build
+    return _search_fallback(db, term, limit)
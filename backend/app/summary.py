@@ -0,0 +1,310 @@
+import asyncio
+import datetime
+import logging
+import os
+from collections import defaultdict
+
+from sqlalchemy import case, delete, event, func, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from . import expiry, models
+from .change_tracking import previous_value, purchase_due
+from .database import SessionLocal, upsert
+
+logger = logging.getLogger(__name__)
+
+# Dashboard counters are kept in step with the base tables by a before_flush
+# hook, so every write path (crud functions as well as routers that mutate
+# models directly) adjusts them inside its own transaction.
+# The hook only appends a row of deltas to summary_deltas: no write takes a
+# lock on the shared dashboard_summary / daily_sales_summary rows, so
+# concurrent checkouts do not queue behind each other. Readers add the
+# pending deltas to the stored totals in one statement, and compact_summary()
+# folds them in periodically (run_compactor, started at app startup).
+# rebuild_summary() recomputes everything from the base tables.
+
+LOW_STOCK_THRESHOLD = 10
+SUMMARY_ID = 1
+COMPACT_SECONDS = int(os.getenv("SUMMARY_COMPACT_SECONDS", "60"))
+
+COUNTER_FIELDS = ("total_medicines", "low_stock_count", "total_due", "total_supplier_due")
+DAILY_FIELDS = ("total_sales", "sale_count")
+
+
+def _is_low_stock(stock_quantity):
+    return stock_quantity is not None and stock_quantity < LOW_STOCK_THRESHOLD
+
+
+def _contribute(obj, sign, previous, counters, daily):
+    get = previous_value if previous else getattr
+    if isinstance(obj, models.Sale):
+        counters["total_due"] += sign * (get(obj, "due_amount") or 0.0)
+        sale_date = get(obj, "sale_date")
+        if sale_date:
+            daily[sale_date][0] += sign * (get(obj, "total_amount") or 0.0)
+            daily[sale_date][1] += sign
+    elif isinstance(obj, models.Purchase):
+        counters["total_supplier_due"] += sign * purchase_due(
+            get(obj, "total_amount"), get(obj, "invoice_discount"),
+            get(obj, "paid_amount"), get(obj, "payment_status")
+        )
+    elif isinstance(obj, models.Medicine):
+        counters["total_medicines"] += sign
+        if _is_low_stock(get(obj, "stock_quantity")):
+            counters["low_stock_count"] += sign
+
+
+def record_delta(connection, summary_date: datetime.date = None, **deltas):
+    """Append one row of counter deltas (for callers that write without the ORM, e.g. bulk loads)."""
+    if any(deltas.values()):
+        connection.execute(insert(models.SummaryDelta.__table__).values(summary_date=summary_date, **deltas))
+
+
+@event.listens_for(Session, "before_flush")
+def _track_summary(session, flush_context, instances):
+    counters = defaultdict(float)
+    daily = defaultdict(lambda: [0.0, 0])
+
+    for obj in session.new:
+        _contribute(obj, 1, False, counters, daily)
+    for obj in session.deleted:
+        _contribute(obj, -1, True, counters, daily)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            _contribute(obj, -1, True, counters, daily)
+            _contribute(obj, 1, False, counters, daily)
+
+    rows = []
+    if any(counters.values()):
+        rows.append({"summary_date": None, **{key: counters[key] for key in COUNTER_FIELDS}, "total_sales": 0.0, "sale_count": 0})
+    for day, (total, count) in daily.items():
+        if total or count:
+            rows.append({"summary_date": day, **{key: 0 for key in COUNTER_FIELDS}, "total_sales": total, "sale_count": count})
+    if rows:
+        session.connection().execute(insert(models.SummaryDelta.__table__), rows)
+
+
+def _computed_counters(db: Session):
+    purchase_net = (
+        models.Purchase.total_amount
+        - func.coalesce(models.Purchase.invoice_discount, 0)
+        - func.coalesce(models.Purchase.paid_amount, 0)
+    )
+    supplier_due = func.sum(
+        case(((func.coalesce(models.Purchase.payment_status, "unpaid") != "paid") & (purchase_net > 0), purchase_net), else_=0)
+    )
+    return {
+        "total_medicines": db.query(func.count(models.Medicine.id)).scalar() or 0,
+        "low_stock_count": db.query(func.count(models.Medicine.id)).filter(
+            models.Medicine.stock_quantity < LOW_STOCK_THRESHOLD
+        ).scalar() or 0,
+        "total_due": db.query(func.sum(models.Sale.due_amount)).scalar() or 0.0,
+        "total_supplier_due": db.query(supplier_due).scalar() or 0.0,
+    }
+
+
+def _ensure_summary_row(db: Session):
+    summary_table = models.DashboardSummary.__table__
+    db.execute(
+        upsert(summary_table, db.get_bind().dialect.name)
+        .values(id=SUMMARY_ID, **{key: 0 for key in COUNTER_FIELDS})
+        .on_conflict_do_nothing(index_elements=["id"])
+    )
+
+
+def _pending(column, *where):
+    deltas = models.SummaryDelta.__table__
+    return select(func.coalesce(func.sum(deltas.c[column]), 0)).where(*where).scalar_subquery()
+
+
+def _lock_deltas(db: Session):
+    """Keep delta writers and the compactor out until the rebuild commits.
+
+    Otherwise a sale committed between computing the counters and clearing
+    summary_deltas would be in neither, and the counters would drift for good.
+    Writers already past their delta insert are waited for, so their effect is
+    visible to the recount; later ones queue and their deltas survive it.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE summary_deltas IN EXCLUSIVE MODE"))
+    else:
+        # SQLite has one writer at a time; the first write takes the lock
+        _ensure_summary_row(db)
+
+
+def rebuild_summary(db: Session):
+    """Recompute every counter from the base tables and return the drift found."""
+    _lock_deltas(db)
+    computed = _computed_counters(db)
+    stored = read_summary(db)
+
+    drift = {}
+    if stored is not None:
+        for key in COUNTER_FIELDS:
+            value = getattr(stored, key) or 0
+            if round(value - computed[key], 2) != 0:
+                drift[key] = {"stored": value, "actual": computed[key]}
+
+    db.execute(delete(models.SummaryDelta.__table__))
+    _ensure_summary_row(db)
+    summary_table = models.DashboardSummary.__table__
+    rebuilt_at = datetime.datetime.utcnow()
+    db.execute(update(summary_table).where(summary_table.c.id == SUMMARY_ID).values(rebuilt_at=rebuilt_at, **computed))
+
+    daily_table = models.DailySalesSummary.__table__
+    db.execute(delete(daily_table))
+    daily_rows = db.query(
+        models.Sale.sale_date,
+        func.sum(models.Sale.total_amount),
+        func.count(models.Sale.id)
+    ).filter(models.Sale.sale_date != None).group_by(models.Sale.sale_date).all()
+    if daily_rows:
+        db.execute(insert(daily_table), [
+            {"summary_date": day, "total_sales": total or 0.0, "sale_count": count}
+            for day, total, count in daily_rows
+        ])
+
+    db.commit()
+    return {"drift": drift, "rebuilt_at": rebuilt_at}
+
+
+def compact_summary(db: Session):
+    """Fold the pending deltas into the stored totals; returns how many rows were folded."""
+    deltas = models.SummaryDelta.__table__
+    # DELETE ... RETURNING folds exactly the rows it removed, even with writers
+    # (or another worker's compactor) running alongside
+    rows = db.execute(
+        delete(deltas).returning(deltas.c.summary_date, *[deltas.c[key] for key in COUNTER_FIELDS + DAILY_FIELDS])
+    ).all()
+    if not rows:
+        db.rollback()
+        return 0
+
+    counters = defaultdict(float)
+    daily = defaultdict(lambda: [0.0, 0])
+    for row in rows:
+        for key in COUNTER_FIELDS:
+            counters[key] += getattr(row, key) or 0
+        if row.summary_date is not None:
+            daily[row.summary_date][0] += row.total_sales or 0.0
+            daily[row.summary_date][1] += row.sale_count or 0
+
+    _ensure_summary_row(db)
+    summary_table = models.DashboardSummary.__table__
+    values = {key: summary_table.c[key] + delta for key, delta in counters.items() if delta}
+    if values:
+        db.execute(update(summary_table).where(summary_table.c.id == SUMMARY_ID).values(**values))
+
+    daily_table = models.DailySalesSummary.__table__
+    dialect_name = db.get_bind().dialect.name
+    for day, (total, count) in daily.items():
+        statement = upsert(daily_table, dialect_name).values(summary_date=day, total_sales=total, sale_count=count)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["summary_date"],
+            set_={
+                "total_sales": daily_table.c.total_sales + statement.excluded.total_sales,
+                "sale_count": daily_table.c.sale_count + statement.excluded.sale_count,
+            }
+        ))
+    db.commit()
+    return len(rows)
+
+
+def read_summary(db: Session):
+    """Stored counters plus pending deltas, read in one statement; None before the first rebuild."""
+    summary_table = models.DashboardSummary.__table__
+    return db.execute(
+        select(*[(summary_table.c[key] + _pending(key)).label(key) for key in COUNTER_FIELDS])
+        .where(summary_table.c.id == SUMMARY_ID)
+    ).first()
+
+
+def get_summary(db: Session):
+    counters = read_summary(db)
+    if counters is None:
+        rebuild_summary(db)
+        counters = read_summary(db)
+    return counters
+
+
+def get_sales_for_day(db: Session, day: datetime.date):
+    daily_table = models.DailySalesSummary.__table__
+    deltas = models.SummaryDelta.__table__
+    stored = select(daily_table.c.total_sales).where(daily_table.c.summary_date == day).scalar_subquery()
+    return db.execute(
+        select(func.coalesce(stored, 0) + _pending("total_sales", deltas.c.summary_date == day))
+    ).scalar() or 0.0
+
+
+def build_dashboard_summary(db: Session):
+    """Dashboard payload for GET /reports/summary/ (sync and async APIs)."""
+    today = datetime.date.today()
+
+    # Counters are maintained incrementally by the write paths (see above)
+    counters = get_summary(db)
+    total_sales_today = get_sales_for_day(db, today)
+
+    # Low stock alert (e.g. stock < 10)
+    low_stock_medicines = db.query(
+        models.Medicine.id,
+        models.Medicine.name,
+        models.Medicine.stock_quantity,
+        models.Medicine.selling_price
+    ).filter(models.Medicine.stock_quantity < LOW_STOCK_THRESHOLD).all()
+
+    # Expiry alerts are precomputed by the daily sweep (see expiry.py)
+    buckets = expiry.get_expiry_buckets(db)
+
+    # Recent 5 sales
+    recent_sales = db.query(models.Sale).order_by(models.Sale.id.desc()).limit(5).all()
+
+    return {
+        "total_medicines": counters.total_medicines,
+        "total_sales_today": total_sales_today,
+        "total_due": counters.total_due,
+        "total_supplier_due": counters.total_supplier_due,
+        "low_stock_count": counters.low_stock_count,
+        "low_stock_medicines": [
+            {
+                "id": med.id,
+                "name": med.name,
+                "stock_quantity": med.stock_quantity,
+                "selling_price": med.selling_price
+            } for med in low_stock_medicines
+        ],
+        "expiry_alerts": {
+            "expired_count": len(buckets["expired"]),
+            "expired_items": buckets["expired"],
+            "expiring_30_days": buckets["30"],
+            "expiring_60_days": buckets["60"],
+            "expiring_90_days": buckets["90"],
+            "total_expiring_soon": len(buckets["30"]) + len(buckets["expired"])
+        },
+        "recent_sales": [
+            {
+                "id": sale.id,
+                "date": sale.sale_date,
+                "buyer": sale.buyer_name or "Cash",
+                "total": sale.total_amount,
+                "due": sale.due_amount
+            } for sale in recent_sales
+        ]
+    }
+
+
+def _compact_once():
+    db = SessionLocal()
+    try:
+        compact_summary(db)
+    finally:
+        db.close()
+
+
+async def run_compactor():
+    """Fold summary deltas every COMPACT_SECONDS; cancelled at shutdown."""
+    while True:
+        try:
+            await asyncio.to_thread(_compact_once)
+        except Exception:
+            logger.exception("Summary compaction failed")
+        await asyncio.sleep(COMPACT_SECONDS)
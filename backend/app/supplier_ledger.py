@@ -0,0 +1,235 @@
+import datetime
+from collections import defaultdict
+
+from sqlalchemy import String, case, cast, event, func, literal, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import date_ranges, models
+from .change_tracking import previous_value, purchase_due
+
+# Purchases and batches reference suppliers by supplier_id (supplier_name is
+# kept as the printed copy). Payments are dated rows in supplier_payments, and
+# suppliers.balance holds each supplier's outstanding due: an after_flush hook
+# applies the change in every purchase's due to its supplier, the same way
+# summary.py keeps total_supplier_due, so every write path stays in step.
+# rebuild_balances() recomputes the balances from the purchases.
+
+AGING_BUCKETS = ("0_30", "31_60", "61_90", "over_90")
+
+
+def _by_name(db: Session, name: str):
+    return db.query(models.Supplier).filter(func.lower(models.Supplier.name) == name.lower()).first()
+
+
+def get_or_create_supplier(db: Session, name: str):
+    """Supplier with this name (case-insensitive), created if it does not exist yet."""
+    name = (name or "").strip()
+    if not name:
+        return None
+    supplier = _by_name(db, name)
+    if supplier is None:
+        try:
+            # Savepoint: a concurrent invoice may create the same supplier first (ix_suppliers_name_lower)
+            with db.begin_nested():
+                supplier = models.Supplier(name=name, balance=0.0)
+                db.add(supplier)
+        except IntegrityError:
+            supplier = _by_name(db, name)
+    return supplier
+
+
+def payment_status(purchase: models.Purchase):
+    net_amount = (purchase.total_amount or 0) - (purchase.invoice_discount or 0)
+    if (purchase.paid_amount or 0) >= net_amount:
+        return "paid"
+    if (purchase.paid_amount or 0) > 0:
+        return "partial"
+    return "unpaid"
+
+
+def record_payment(db: Session, purchase: models.Purchase, amount: float, payment_date: datetime.date = None, note: str = None):
+    """Add a dated payment against ``purchase`` and update its paid amount and status."""
+    if not amount:
+        return None
+    if purchase.supplier is None and purchase.supplier_name:
+        # Purchases recorded before supplier_id existed are linked on their first payment
+        purchase.supplier = get_or_create_supplier(db, purchase.supplier_name)
+    payment = models.SupplierPayment(
+        purchase=purchase,
+        supplier=purchase.supplier,
+        payment_date=payment_date or datetime.date.today(),
+        amount=amount,
+        note=note
+    )
+    db.add(payment)
+    purchase.paid_amount = (purchase.paid_amount or 0) + amount
+    purchase.payment_status = payment_status(purchase)
+    return payment
+
+
+def _due(obj, previous):
+    get = previous_value if previous else getattr
+    return purchase_due(
+        get(obj, "total_amount"), get(obj, "invoice_discount"), get(obj, "paid_amount"), get(obj, "payment_status")
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _track_supplier_balances(session, flush_context):
+    deltas = defaultdict(float)
+    for obj in session.new:
+        if isinstance(obj, models.Purchase) and obj.supplier_id:
+            deltas[obj.supplier_id] += _due(obj, False)
+    for obj in session.deleted:
+        if isinstance(obj, models.Purchase):
+            supplier_id = previous_value(obj, "supplier_id")
+            if supplier_id:
+                deltas[supplier_id] -= _due(obj, True)
+    for obj in session.dirty:
+        if isinstance(obj, models.Purchase) and session.is_modified(obj):
+            previous_supplier = previous_value(obj, "supplier_id")
+            if previous_supplier:
+                deltas[previous_supplier] -= _due(obj, True)
+            if obj.supplier_id:
+                deltas[obj.supplier_id] += _due(obj, False)
+
+    suppliers = models.Supplier.__table__
+    conn = session.connection()
+    for supplier_id, delta in deltas.items():
+        if delta:
+            conn.execute(
+                update(suppliers)
+                .where(suppliers.c.id == supplier_id)
+                .values(balance=func.coalesce(suppliers.c.balance, 0) + delta)
+            )
+
+
+def _purchase_due_column():
+    net = (
+        models.Purchase.total_amount
+        - func.coalesce(models.Purchase.invoice_discount, 0)
+        - func.coalesce(models.Purchase.paid_amount, 0)
+    )
+    return case(((func.coalesce(models.Purchase.payment_status, "unpaid") != "paid") & (net > 0), net), else_=0)
+
+
+def rebuild_balances(db: Session):
+    """Recompute every supplier's balance from its purchases; returns the suppliers that drifted."""
+    actual = dict(
+        db.query(models.Purchase.supplier_id, func.sum(_purchase_due_column()))
+        .filter(models.Purchase.supplier_id != None)
+        .group_by(models.Purchase.supplier_id)
+        .all()
+    )
+    drift = []
+    for supplier in db.query(models.Supplier):
+        balance = actual.get(supplier.id) or 0.0
+        if round((supplier.balance or 0.0) - balance, 2) != 0:
+            drift.append({"supplier_id": supplier.id, "stored": supplier.balance, "actual": balance})
+        supplier.balance = balance
+    db.commit()
+    return {"drift": drift}
+
+
+def get_aging(db: Session, today: datetime.date = None):
+    """Outstanding supplier dues by invoice age (0-30, 31-60, 61-90, 90+ days) in one grouped query."""
+    today = today or datetime.date.today()
+    due = _purchase_due_column()
+    purchase_date = models.Purchase.purchase_date
+
+    def bucket(newer_than_days, older_than_days=None):
+        condition = purchase_date >= today - datetime.timedelta(days=newer_than_days) if newer_than_days else None
+        if older_than_days is not None:
+            older = purchase_date < today - datetime.timedelta(days=older_than_days)
+            condition = older if condition is None else condition & older
+        return func.sum(case((condition, due), else_=0))
+
+    rows = (
+        db.query(
+            models.Supplier.id,
+            models.Supplier.name,
+            bucket(30),
+            bucket(60, 30),
+            bucket(90, 60),
+            bucket(None, 90),
+            func.sum(due),
+        )
+        .join(models.Purchase, models.Purchase.supplier_id == models.Supplier.id)
+        .filter(func.coalesce(models.Purchase.payment_status, "unpaid") != "paid")
+        .group_by(models.Supplier.id, models.Supplier.name)
+        .having(func.sum(due) > 0)
+        .order_by(func.sum(due).desc())
+        .all()
+    )
+    suppliers = [
+        {"supplier_id": supplier_id, "supplier_name": name, **dict(zip(AGING_BUCKETS, amounts)), "total": total}
+        for supplier_id, name, *amounts, total in rows
+    ]
+    totals = {key: sum(row[key] or 0.0 for row in suppliers) for key in AGING_BUCKETS + ("total",)}
+    return {"as_of": today, "suppliers": suppliers, "totals": totals}
+
+
+def get_statement(db: Session, supplier_id: int, start_date: datetime.date = None, end_date: datetime.date = None):
+    """Purchases and payments for one supplier in date order, with a running balance."""
+    supplier = db.query(models.Supplier).filter(models.Supplier.id == supplier_id).first()
+    if supplier is None:
+        return None
+    start, end = date_ranges.between(start_date, end_date)
+
+    purchases = select(
+        literal("purchase").label("kind"),
+        models.Purchase.purchase_date.label("entry_date"),
+        models.Purchase.id.label("purchase_id"),
+        models.Purchase.invoice_number.label("reference"),
+        (models.Purchase.total_amount - func.coalesce(models.Purchase.invoice_discount, 0)).label("amount"),
+    ).where(
+        models.Purchase.supplier_id == supplier_id,
+        *date_ranges.predicates(models.Purchase.purchase_date, start, end)
+    )
+    payments = select(
+        literal("payment"),
+        models.SupplierPayment.payment_date,
+        models.SupplierPayment.purchase_id,
+        cast(models.SupplierPayment.note, String),
+        -models.SupplierPayment.amount,
+    ).where(
+        models.SupplierPayment.supplier_id == supplier_id,
+        *date_ranges.predicates(models.SupplierPayment.payment_date, start, end)
+    )
+    statement = union_all(purchases, payments).subquery()
+    rows = db.execute(
+        select(statement).order_by(statement.c.entry_date, statement.c.kind.desc(), statement.c.purchase_id)
+    ).all()
+
+    # Opening balance: everything before the requested range
+    running = 0.0
+    if start is not None:
+        purchased = db.query(func.sum(
+            models.Purchase.total_amount - func.coalesce(models.Purchase.invoice_discount, 0)
+        )).filter(models.Purchase.supplier_id == supplier_id, models.Purchase.purchase_date < start).scalar()
+        paid = db.query(func.sum(models.SupplierPayment.amount)).filter(
+            models.SupplierPayment.supplier_id == supplier_id, models.SupplierPayment.payment_date < start
+        ).scalar()
+        running = (purchased or 0.0) - (paid or 0.0)
+    opening_balance = running
+    entries = []
+    for kind, entry_date, purchase_id, reference, amount in rows:
+        running += amount or 0.0
+        entries.append({
+            "kind": kind,
+            "date": entry_date,
+            "purchase_id": purchase_id,
+            "reference": reference,
+            "amount": amount,
+            "running_balance": running
+        })
+    return {
+        "supplier_id": supplier.id,
+        "supplier_name": supplier.name,
+        "balance": supplier.balance or 0.0,
+        "start_date": start_date,
+        "end_date": end_date,
+        "opening_balance": opening_balance,
+        "entries": entries
+    }
@@ -0,0 +1,191 @@
+import bisect
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# In-process prefix index over medicine names for the POS autocomplete.
+# Lookups are a bisect into sorted arrays of (lowercase name, id) keys, brand
+# name first and then generic name, so they do not touch the database.
+# Medicine rows written through any Session are applied to the index when their transaction commits; a periodic full
+# rebuild picks up writes made by other worker processes. Only the first build
+# runs on the request path; later rebuilds run in a background thread (one at
+# a time) while the old index keeps serving, and changes committed during a
+# rebuild are replayed onto the new snapshot before it is swapped in.
+
+REFRESH_SECONDS = int(os.getenv("TYPEAHEAD_REFRESH_SECONDS", "300"))
+
+KEY_FIELDS = ("name", "generic_name")
+FIELDS = ("id", "name", "generic_name", "strength", "medicine_type", "manufacturer", "stock_quantity", "selling_price")
+
+
+def _entry(values):
+    entry = dict(zip(FIELDS, values))
+    entry["stock_quantity"] = entry["stock_quantity"] or 0
+    entry["selling_price"] = entry["selling_price"] or 0.0
+    return entry
+
+
+class TypeaheadIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()  # One build at a time
+        self._keys = {field: [] for field in KEY_FIELDS}  # Sorted (value_lower, id) per field
+        self._entries = {}  # id -> entry
+        self._built_at = None
+        self._journal = None  # Changes committed while a build is reading its snapshot
+        self._refreshing = False
+
+    def is_stale(self):
+        return self._built_at is None or time.monotonic() - self._built_at > REFRESH_SECONDS
+
+    def build(self, db: Session):
+        with self._build_lock:
+            self._build_locked(db)
+
+    def _build_locked(self, db: Session):
+        with self._lock:
+            self._journal = {}
+        try:
+            rows = db.query(*[getattr(models.Medicine, field) for field in FIELDS]).all()
+            entries = {row[0]: _entry(row) for row in rows}
+            keys = {
+                field: sorted((entry[field].lower(), medicine_id) for medicine_id, entry in entries.items() if entry[field])
+                for field in KEY_FIELDS
+            }
+        except Exception:
+            with self._lock:
+                self._journal = None
+            raise
+        with self._lock:
+            journal, self._journal = self._journal, None
+            self._entries = entries
+            self._keys = keys
+            # The snapshot may predate these commits
+            self._apply_locked(journal)
+            self._built_at = time.monotonic()
+
+    def ensure_current(self, db: Session):
+        """Build on first use; afterwards refresh a stale index in the background."""
+        if not self.is_stale():
+            return
+        if self._built_at is not None:
+            self.refresh_in_background()
+            return
+        with self._build_lock:
+            # Concurrent first requests wait here for a single build
+            if self._built_at is None:
+                self._build_locked(db)
+
+    def refresh_in_background(self):
+        """Start a rebuild thread unless one is already running; the current index keeps serving."""
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+        threading.Thread(target=self._background_build, name="typeahead-rebuild", daemon=True).start()
+        return True
+
+    def _background_build(self):
+        db = SessionLocal()
+        try:
+            self.build(db)
+        except Exception:
+            logger.exception("Typeahead index rebuild failed")
+        finally:
+            db.close()
+            with self._lock:
+                self._refreshing = False
+
+    def _remove_locked(self, medicine_id):
+        old = self._entries.pop(medicine_id, None)
+        if old is None:
+            return
+        for field in KEY_FIELDS:
+            if not old[field]:
+                continue
+            keys = self._keys[field]
+            key = (old[field].lower(), medicine_id)
+            i = bisect.bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+
+    def _apply_locked(self, changes):
+        for medicine_id, entry in changes.items():
+            self._remove_locked(medicine_id)
+            if entry is not None:
+                self._entries[medicine_id] = entry
+                for field in KEY_FIELDS:
+                    if entry[field]:
+                        bisect.insort(self._keys[field], (entry[field].lower(), medicine_id))
+
+    def apply(self, changes):
+        """Apply {medicine_id: entry or None (deleted)} from a committed transaction."""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.update(changes)
+            if self._built_at is not None:
+                self._apply_locked(changes)
+
+    def lookup(self, prefix: str, limit: int = 10):
+        prefix = prefix.lower()
+        results = []
+        seen = set()
+        with self._lock:
+            for field in KEY_FIELDS:
+                keys = self._keys[field]
+                i = bisect.bisect_left(keys, (prefix,))
+                while i < len(keys) and len(results) < limit:
+                    value, medicine_id = keys[i]
+                    if not value.startswith(prefix):
+                        break
+                    if medicine_id not in seen:
+                        seen.add(medicine_id)
+                        results.append(self._entries[medicine_id])
+                    i += 1
+        return results
+
+    def __len__(self):
+        return len(self._entries)
+
+
+medicine_index = TypeaheadIndex()
+
+
+def suggest(db: Session, q: str, limit: int = 10):
+    q = (q or "").strip()
+    if not q:
+        return []
+    medicine_index.ensure_current(db)
+    return medicine_index.lookup(q, limit)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_medicine_changes(session, flush_context):
+    pending = session.info.setdefault("typeahead_pending", {})
+    for obj in session.new.union(session.dirty):
+        if isinstance(obj, models.Medicine):
+            pending[obj.id] = _entry([getattr(obj, field) for field in FIELDS])
+    for obj in session.deleted:
+        if isinstance(obj, models.Medicine):
+            pending[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_medicine_changes(session):
+    pending = session.info.pop("typeahead_pending", None)
+    if pending:
+        medicine_index.apply(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_medicine_changes(session):
+    session.info.pop("typeahead_pending", None)
@@ -0,0 +1,77 @@
+"""Side-by-side throughput of the sync and async (ASYNC_DB=true) data layers.
+
+Start one server per mode, e.g.
+
+    uvicorn app.main:app --port 8000
+    ASYNC_DB=true uvicorn app.main:app --port 8001
+
+then run
+
+    python bench_db.py --email admin@example.com --password secret \\
+        --sync-url http://localhost:8000 --async-url http://localhost:8001
+
+Each hot endpoint is hit with --concurrency parallel clients for --duration
+seconds per server.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from bench_login import login, percentile
+
+HOT_PATHS = ["/api/medicines/?limit=50", "/api/sales/?limit=50", "/api/reports/summary/"]
+
+
+async def hammer(base_url, path, headers, concurrency, duration):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, errors
+
+
+async def run(args):
+    servers = [("sync", args.sync_url), ("async", args.async_url)]
+    tokens = {}
+    for label, url in servers:
+        async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+            tokens[label] = await login(client, args.email, args.password)
+
+    print(f"{'endpoint':<28} {'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for path in HOT_PATHS:
+        for label, url in servers:
+            headers = {"Authorization": f"Bearer {tokens[label]}"}
+            latencies, errors = await hammer(url, path, headers, args.concurrency, args.duration)
+            print(
+                f"{path:<28} {label:<6} {len(latencies) / args.duration:>8.1f} "
+                f"{statistics.median(latencies):>8.1f} {percentile(latencies, 99):>8.1f} {errors:>7}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sync-url", default="http://localhost:8000")
+    parser.add_argument("--async-url", default="http://localhost:8001")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
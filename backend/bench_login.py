@@ -0,0 +1,139 @@
+"""Login throughput while sale (checkout) traffic is running.
+
+Logs in --logins times (--login-concurrency at a time) while --sale-workers
+keep ringing up one-line sales (POST /api/sales/), and reports login
+throughput together with checkout latency before and during the logins.
+Sales are made against --medicine-id, or against a medicine this script
+stocks with a purchase invoice (so --email must be an admin). Run it against
+a live server:
+
+    python bench_login.py --email admin@example.com --password secret
+
+or against the app in-process (uses DATABASE_URL) with --in-process.
+"""
+import argparse
+import asyncio
+import datetime
+import statistics
+import time
+import uuid
+
+import httpx
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def login(client, email, password):
+    response = await client.post("/api/token", data={"username": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def stock_medicine(client, headers, quantity):
+    """Ingest a purchase invoice for a fresh bench medicine; returns its id."""
+    today = datetime.date.today()
+    name = f"Bench {uuid.uuid4().hex[:8]}"
+    unit = await client.post("/api/units/", json={"name": "pcs"}, headers=headers)
+    unit_id = unit.json()["id"] if unit.status_code == 200 else 1
+    response = await client.post("/api/add_purchase/", headers=headers, json={
+        "supplier_name": "Bench Supplier",
+        "invoice_number": f"BENCH-{uuid.uuid4().hex[:8]}",
+        "purchase_date": today.isoformat(),
+        "paid_amount": 0,
+        "items": [{
+            "medicine_name": name, "quantity": quantity, "unit_id": unit_id,
+            "expiry_date": (today + datetime.timedelta(days=365)).isoformat(),
+            "medicine_purchase_price": 1, "medicine_selling_price": 2
+        }]
+    })
+    response.raise_for_status()
+    for item in response.json()["items"]:
+        return item["medicine_id"]
+
+
+async def sale_worker(client, headers, medicine_id, stop, latencies, errors):
+    sale = {
+        "sale_date": datetime.date.today().isoformat(), "buyer_name": "Bench", "amount_paid": 2,
+        "items": [{"medicine_id": medicine_id, "quantity": 1}]
+    }
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.post("/api/sales/", json=sale, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+async def run(args):
+    if args.in_process:
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120)
+    else:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=120)
+
+    async with client:
+        token = await login(client, args.email, args.password)
+        headers = {"Authorization": f"Bearer {token}"}
+        medicine_id = args.medicine_id or await stock_medicine(client, headers, args.stock)
+
+        baseline, errors = [], []
+        stop = asyncio.Event()
+        workers = [
+            asyncio.create_task(sale_worker(client, headers, medicine_id, stop, baseline, errors))
+            for _ in range(args.sale_workers)
+        ]
+        await asyncio.sleep(args.warmup)
+        stop.set()
+        await asyncio.gather(*workers)
+
+        during = []
+        stop = asyncio.Event()
+        workers = [
+            asyncio.create_task(sale_worker(client, headers, medicine_id, stop, during, errors))
+            for _ in range(args.sale_workers)
+        ]
+        semaphore = asyncio.Semaphore(args.login_concurrency)
+
+        async def one_login():
+            async with semaphore:
+                await login(client, args.email, args.password)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[one_login() for _ in range(args.logins)])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*workers)
+
+    print(f"logins: {args.logins} in {elapsed:.2f}s ({args.logins / elapsed:.1f}/s)")
+    for label, values in (("sales idle", baseline), ("sales during logins", during)):
+        if values:
+            print(
+                f"{label}: {len(values)} checkouts, p50 {statistics.median(values):.1f} ms, "
+                f"p99 {percentile(values, 99):.1f} ms, max {max(values):.1f} ms"
+            )
+    if errors:
+        print(f"failed checkouts: {len(errors)} (status {sorted(set(errors))})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--login-concurrency", type=int, default=10)
+    parser.add_argument("--sale-workers", type=int, default=4)
+    parser.add_argument("--medicine-id", type=int, help="Medicine to sell; default: stock a new one")
+    parser.add_argument("--stock", type=int, default=100000, help="Units to stock when creating the bench medicine")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds of sale-only traffic for the baseline")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
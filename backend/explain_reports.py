@@ -0,0 +1,68 @@
+"""Check that the date-filtered report queries use their date indexes.
+
+    python explain_reports.py            # against DATABASE_URL
+    python explain_reports.py --verbose  # also print every plan
+
+Each report query is filtered on a sample month and run through EXPLAIN
+(EXPLAIN QUERY PLAN on SQLite). On PostgreSQL sequential scans are disabled
+for the check, so a small or empty table still shows whether the index can
+be used at all. Exits non-zero if any query does not use its index.
+"""
+import argparse
+import datetime
+import sys
+
+from sqlalchemy import select, text
+
+from app import date_ranges, exports, models, profit_loss
+from app.database import engine
+
+MONTH = dict(month=1, year=datetime.date.today().year)
+
+
+def checks():
+    start, end = date_ranges.resolve(**MONTH)
+    sales_page = select(models.Sale.id).where(
+        *date_ranges.predicates(models.Sale.sale_date, start, end)
+    ).order_by(models.Sale.sale_date.desc(), models.Sale.id.desc()).limit(100)
+    last_day = end - datetime.timedelta(days=1)
+    return [
+        ("sales list", sales_page, ["ix_sales_sale_date_id"]),
+        ("customer dues", exports.customer_dues_query(start, end), ["ix_sales_sale_date_id"]),
+        ("supplier dues", exports.supplier_dues_query(start, end), ["ix_purchases_purchase_date"]),
+        ("sales export", exports.sale_lines_query(start, last_day), ["ix_sales_sale_date_id"]),
+        (
+            "profit/loss", profit_loss.profit_loss_statement(start, last_day),
+            ["ix_sales_sale_date_id", "ix_employee_bills_payment_date", "ix_expenses_expense_date"]
+        ),
+    ]
+
+
+def explain(connection, statement):
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    if connection.dialect.name == "sqlite":
+        return "\n".join(row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    return "\n".join(row[0] for row in connection.execute(text(f"EXPLAIN {sql}")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    failed = False
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SET enable_seqscan = off"))
+        for name, statement, indexes in checks():
+            plan = explain(connection, statement)
+            missing = [index for index in indexes if index not in plan]
+            failed = failed or bool(missing)
+            print(f"{'FAIL' if missing else 'ok':<5} {name}" + (f" (not using {', '.join(missing)})" if missing else ""))
+            if args.verbose or missing:
+                print("      " + plan.replace("\n", "\n      "))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
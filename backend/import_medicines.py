@@ -0,0 +1,242 @@
+"""Load a medex catalog CSV (scraper output) into the medicines table.
+
+    python import_medicines.py ../bd_medicines_page_2_to_2.csv            # against DATABASE_URL
+    python import_medicines.py catalog.csv --dry-run --show 20             # diff only, nothing written
+    python import_medicines.py catalog.csv --insert-only                   # never touch existing rows
+
+The CSV (medicine_name, generic_name, manufacturer, strength, type, mrp) is
+streamed into a temporary staging table, with COPY on PostgreSQL and batched
+executemany elsewhere, and merged in one INSERT ... SELECT ... ON CONFLICT on
+_name_strength_mfg_uc. New medicines get the MRP as selling price and
+--cost-ratio of it as purchase price. Existing ones get the new generic name
+and MRP when those changed; their purchase price and stock are left alone.
+Missing text fields are stored as empty strings so that the unique key
+matches on the next load. When a key appears more than once in the CSV, the
+last row wins. Everything runs in one transaction.
+"""
+import argparse
+import csv
+import io
+import sys
+import time
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, and_, func, insert, literal, select
+
+from app import models
+from app.database import engine
+from app.summary import record_delta
+
+KEY_COLUMNS = ("name", "strength", "manufacturer", "medicine_type")
+STAGING_COLUMNS = KEY_COLUMNS + ("generic_name", "selling_price", "purchase_price")
+BATCH_ROWS = 5000
+COPY_CHUNK_BYTES = 1 << 20
+
+staging_metadata = MetaData()
+staging = Table(
+    "medicine_catalog_staging", staging_metadata,
+    Column("line", Integer, primary_key=True, autoincrement=False),
+    Column("name", String),
+    Column("strength", String),
+    Column("manufacturer", String),
+    Column("medicine_type", String),
+    Column("generic_name", String),
+    Column("selling_price", Float),
+    Column("purchase_price", Float),
+    prefixes=["TEMPORARY"],
+)
+
+
+def catalog_rows(path, cost_ratio, stats):
+    """Yield normalized staging rows from the CSV; rows without a name are counted as invalid."""
+    with open(path, newline="", encoding="utf-8") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            name = (row.get("medicine_name") or "").strip()
+            if not name:
+                stats["invalid"] += 1
+                continue
+            try:
+                mrp = float(row.get("mrp") or 0)
+            except ValueError:
+                mrp = 0.0
+            stats["rows"] += 1
+            yield {
+                "line": line,
+                "name": name,
+                "strength": (row.get("strength") or "").strip(),
+                "manufacturer": (row.get("manufacturer") or "").strip(),
+                "medicine_type": (row.get("type") or "").strip(),
+                "generic_name": (row.get("generic_name") or "").strip(),
+                "selling_price": mrp,
+                "purchase_price": round(mrp * cost_ratio, 2),
+            }
+
+
+class _CopySource:
+    """File-like view of the staging rows as CSV text, read by COPY ... FROM STDIN."""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._pending = ""
+
+    def read(self, size=-1):
+        while size < 0 or len(self._pending) < size:
+            chunk = [next(self._rows, None) for _ in range(BATCH_ROWS)]
+            chunk = [row for row in chunk if row is not None]
+            if not chunk:
+                break
+            self._writer.writerows([row["line"]] + [row[column] for column in STAGING_COLUMNS] for row in chunk)
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+        if size < 0:
+            data, self._pending = self._pending, ""
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+def load_staging(connection, rows):
+    staging.create(connection)
+    if connection.dialect.name == "postgresql":
+        cursor = connection.connection.cursor()
+        text_columns = ", ".join(KEY_COLUMNS + ("generic_name",))
+        # FORCE_NOT_NULL: an empty field is '' as on the executemany path, not NULL
+        copy_sql = (
+            f"COPY {staging.name} ({', '.join(('line',) + STAGING_COLUMNS)}) "
+            f"FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL ({text_columns}))"
+        )
+        source = _CopySource(rows)
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(copy_sql, source, size=COPY_CHUNK_BYTES)
+            return
+        if hasattr(cursor, "copy"):  # psycopg 3
+            with cursor.copy(copy_sql) as copy:
+                for data in iter(lambda: source.read(COPY_CHUNK_BYTES), ""):
+                    copy.write(data)
+            return
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_ROWS:
+            connection.execute(insert(staging), batch)
+            batch = []
+    if batch:
+        connection.execute(insert(staging), batch)
+
+
+def _latest_rows():
+    """Last staging row of every key, joined to the medicine it matches (if any)."""
+    latest_lines = select(func.max(staging.c.line)).group_by(*[staging.c[column] for column in KEY_COLUMNS])
+    medicines = models.Medicine.__table__
+    return select(staging, medicines.c.id.label("medicine_id")).select_from(
+        staging.outerjoin(medicines, and_(*[medicines.c[column] == staging.c[column] for column in KEY_COLUMNS]))
+    ).where(staging.c.line.in_(latest_lines))
+
+
+def _changed(incoming):
+    medicines = models.Medicine.__table__
+    return (
+        medicines.c.generic_name.is_distinct_from(incoming.generic_name)
+        | medicines.c.selling_price.is_distinct_from(incoming.selling_price)
+    )
+
+
+def diff(connection, insert_only, show=0):
+    """Counts (and up to ``show`` sample rows) of what the merge will insert and update."""
+    latest = _latest_rows().subquery()
+    medicines = models.Medicine.__table__
+    new = select(latest).where(latest.c.medicine_id == None)
+    changed = select(latest, medicines.c.generic_name.label("old_generic_name"), medicines.c.selling_price.label("old_selling_price")).join(
+        medicines, medicines.c.id == latest.c.medicine_id
+    ).where(_changed(latest.c))
+    counts = {
+        "keys": connection.execute(select(func.count()).select_from(latest)).scalar(),
+        "insert": connection.execute(select(func.count()).select_from(new.subquery())).scalar(),
+        "update": 0 if insert_only else connection.execute(select(func.count()).select_from(changed.subquery())).scalar(),
+    }
+    samples = {"insert": [], "update": []}
+    if show:
+        samples["insert"] = connection.execute(new.order_by(latest.c.line).limit(show)).mappings().all()
+        if not insert_only:
+            samples["update"] = connection.execute(changed.order_by(latest.c.line).limit(show)).mappings().all()
+    return counts, samples
+
+
+def merge(connection, insert_only):
+    medicines = models.Medicine.__table__
+    latest = select(
+        *[staging.c[column] for column in STAGING_COLUMNS], literal(0).label("stock_quantity")
+    ).where(staging.c.line.in_(
+        select(func.max(staging.c.line)).group_by(*[staging.c[column] for column in KEY_COLUMNS])
+    ))
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+        conflict = {"constraint": "_name_strength_mfg_uc"}
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert
+        conflict = {"index_elements": list(KEY_COLUMNS)}
+    statement = upsert(medicines).from_select(list(STAGING_COLUMNS) + ["stock_quantity"], latest)
+    if insert_only:
+        statement = statement.on_conflict_do_nothing(**conflict)
+    else:
+        statement = statement.on_conflict_do_update(
+            **conflict,
+            set_={"generic_name": statement.excluded.generic_name, "selling_price": statement.excluded.selling_price},
+            where=_changed(statement.excluded),
+        )
+    connection.execute(statement)
+
+
+def adjust_summary(connection, inserted):
+    # The bulk insert bypasses the session hooks in summary.py; new medicines have no stock
+    record_delta(connection, total_medicines=inserted, low_stock_count=inserted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv_file")
+    parser.add_argument("--dry-run", action="store_true", help="report the diff and roll back")
+    parser.add_argument("--show", type=int, default=0, metavar="N", help="print up to N new and N changed rows")
+    parser.add_argument("--insert-only", action="store_true", help="add new medicines, leave existing ones as they are")
+    parser.add_argument("--cost-ratio", type=float, default=0.88, help="purchase price of new medicines as a share of MRP")
+    args = parser.parse_args()
+
+    stats = {"rows": 0, "invalid": 0}
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            load_staging(connection, catalog_rows(args.csv_file, args.cost_ratio, stats))
+            counts, samples = diff(connection, args.insert_only, args.show)
+            if not args.dry_run:
+                merge(connection, args.insert_only)
+                adjust_summary(connection, counts["insert"])
+        except Exception:
+            transaction.rollback()
+            raise
+        if args.dry_run:
+            transaction.rollback()
+        else:
+            transaction.commit()
+
+    skipped = stats["invalid"] + (stats["rows"] - counts["keys"]) + (counts["keys"] - counts["insert"] - counts["update"])
+    for row in samples["insert"]:
+        print(f"+ {row['name']} {row['strength']} ({row['medicine_type']}, {row['manufacturer']}) mrp {row['selling_price']}")
+    for row in samples["update"]:
+        print(
+            f"~ {row['name']} {row['strength']} ({row['medicine_type']}, {row['manufacturer']}): "
+            f"mrp {row['old_selling_price']} -> {row['selling_price']}, generic {row['old_generic_name']!r} -> {row['generic_name']!r}"
+        )
+    print(
+        f"{'Would insert' if args.dry_run else 'Inserted'} {counts['insert']}, "
+        f"{'would update' if args.dry_run else 'updated'} {counts['update']}, skipped {skipped} "
+        f"({stats['invalid']} without a name, {stats['rows'] - counts['keys']} repeated in the file, "
+        f"{counts['keys'] - counts['insert'] - counts['update']} unchanged) "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
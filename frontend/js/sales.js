@@ -75,8 +75,13 @@ document.addEventListener("DOMContentLoaded", function() {
             v = v.trim();
             if (!v) { sug.style.display = 'none'; updateMonitor(null); return; }
             try {
-                const res = await fetchData(`medicines/?limit=10&search=${encodeURIComponent(v)}`);
-                const matches = res.items || [];
+                const matches = await fetchData(`medicines/autocomplete/?limit=10&q=${encodeURIComponent(v)}`) || [];
+                // The index only matches name prefixes; top up with the substring search
+                if (matches.length < 10) {
+                    const res = await fetchData(`medicines/?limit=10&search=${encodeURIComponent(v)}`);
+                    const seen = new Set(matches.map(m => m.id));
+                    (res.items || []).forEach(m => { if (matches.length < 10 && !seen.has(m.id)) matches.push(m); });
+                }
                 sug.innerHTML = "";
                 if (matches.length > 0) {
                     matches.forEach(m => {
@@ -123,6 +128,24 @@ document.addEventListener("DOMContentLoaded", function() {
         btn.onclick = () => saleItemsContainer.insertBefore(createRow(), btn); saleItemsContainer.appendChild(btn);
     }
 
+    // Counter lookup: show the customer's outstanding balance and fill in their details
+    const buyerMobileInput = document.getElementById('buyer_mobile'), buyerBalance = document.getElementById('buyer_balance');
+    if (buyerMobileInput && buyerBalance) {
+        const lookupCustomer = debounce(async function(v) {
+            v = v.trim();
+            if (v.replace(/\D/g, '').length < 6) { buyerBalance.innerHTML = ''; return; }
+            try {
+                const c = await fetchData(`customers/lookup/?mobile=${encodeURIComponent(v)}`);
+                if (buyerMobileInput.value.trim() !== v) return;
+                const nameIn = document.getElementById('buyer_name'), addressIn = document.getElementById('buyer_address');
+                if (c.name && !nameIn.value) nameIn.value = c.name;
+                if (c.address && !addressIn.value) addressIn.value = c.address;
+                buyerBalance.innerHTML = c.balance > 0 ? `<span class="text-danger fw-bold">Due: ${c.balance.toFixed(2)} ৳</span>` : '<span class="text-success">No dues</span>';
+            } catch (e) { if (buyerMobileInput.value.trim() === v) buyerBalance.innerHTML = '<span class="text-muted">New customer</span>'; }
+        }, 400);
+        buyerMobileInput.addEventListener('input', (e) => lookupCustomer(e.target.value));
+    }
+
     if (addSaleForm) {
         addSaleForm.addEventListener('submit', async (e) => {
             e.preventDefault(); const items = [];
@@ -0,0 +1,167 @@
+"""
+Parse cost per page: WebDriver element lookups vs. parsers.py on page_source
+
+Usage:
+    python bench_parse.py                        # parsers.py on the saved fixtures
+    python bench_parse.py --browser              # also the old element-by-element extraction in Chrome
+    python bench_parse.py --listing a.html --detail b.html --repeat 200
+
+Without --browser only the new parsers run, on the HTML in fixtures/. With
+--browser each fixture is opened in Chrome (file://) and parsed both ways.
+The old way is the per-field find_element(s) extraction that scrape_listing_page
+and scrape_medicine_detail used to do. The new way is one driver.page_source
+fetch plus parsers.py, so the timing includes that fetch.
+"""
+
+import argparse
+import pathlib
+import re
+import statistics
+import time
+
+import parsers
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+
+def timed(function, repeat: int) -> float:
+    """Median milliseconds per call"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+# ---- Old WebDriver extraction (as it was in scraper.py), for the --browser comparison ----
+
+def legacy_listing(driver) -> list:
+    from selenium.webdriver.common.by import By
+
+    medicines = []
+    for block in driver.find_elements(By.CSS_SELECTOR, "a.hoverable-block"):
+        data = {field: '' for field in parsers.FIELDS}
+        try:
+            data['medicine_name'] = block.find_element(By.CSS_SELECTOR, "div.data-row-top").text.strip()
+        except Exception:
+            pass
+        try:
+            data['strength'] = block.find_element(By.CSS_SELECTOR, "div.data-row-strength span.grey-ligten").text.strip()
+        except Exception:
+            pass
+        try:
+            data['type'] = block.find_element(By.CSS_SELECTOR, "img.dosage-icon").get_attribute('title') or ''
+        except Exception:
+            pass
+        col_divs = block.find_elements(By.CSS_SELECTOR, "div.col-xs-12")
+        if len(col_divs) >= 3:
+            data['generic_name'] = col_divs[2].text.strip()
+        if len(col_divs) >= 4:
+            try:
+                data['manufacturer'] = col_divs[3].find_element(By.CSS_SELECTOR, "span.data-row-company").text.strip()
+            except Exception:
+                data['manufacturer'] = col_divs[3].text.strip()
+        data['_link'] = block.get_attribute('href')
+        if data['medicine_name']:
+            medicines.append(data)
+    return medicines
+
+
+def _legacy_first_text(driver, selectors) -> str:
+    from selenium.webdriver.common.by import By
+
+    for selector in selectors:
+        try:
+            return driver.find_element(By.CSS_SELECTOR, selector).text.strip()
+        except Exception:
+            continue
+    return ''
+
+
+def legacy_detail(driver) -> dict:
+    from selenium.webdriver.common.by import By
+
+    data = {field: '' for field in parsers.FIELDS}
+    data['medicine_name'] = _legacy_first_text(driver, ["h1.page-heading-1", "h1", ".brand-name", ".drug-name"])
+    data['generic_name'] = _legacy_first_text(driver, ["a[href*='/generic/']"])
+    data['manufacturer'] = _legacy_first_text(driver, ["a[href*='/companies/']"])
+    data['strength'] = _legacy_first_text(driver, ["span.strength", "div.strength", ".drug-strength"])
+    if not data['strength'] and data['medicine_name']:
+        match = re.search(r'(\d+\.?\d*\s*(mg|ml|mcg|g|iu|%|gm|IU)[^a-zA-Z]*)', data['medicine_name'], re.I)
+        if match:
+            data['strength'] = match.group(1).strip()
+    try:
+        data['type'] = driver.find_element(By.CSS_SELECTOR, "a[href*='/dosage-forms/']").text.strip()
+    except Exception:
+        try:
+            img_elem = driver.find_element(By.CSS_SELECTOR, "img.dosage-icon")
+            data['type'] = img_elem.get_attribute('title') or img_elem.get_attribute('alt') or ''
+        except Exception:
+            pass
+    for selector in [".price", ".unit-price", ".mrp", "span.price", "[class*='price']", "[class*='unit-price']"]:
+        try:
+            match = re.search(r'([\d,]+\.?\d+)', driver.find_element(By.CSS_SELECTOR, selector).text.strip())
+        except Exception:
+            continue
+        if match:
+            data['mrp'] = match.group(1).replace(',', '')
+            break
+    if not data['mrp']:
+        page_text = driver.page_source
+        for pattern, flags in [
+            (r'৳[\s\u00a0]*(\d[\d,]*\.?\d*)', 0),
+            (r'(?:Unit\s*Price|MRP|Price)[:\s]*[\u09F3৳]?\s*([\d,]+\.?\d*)', re.I),
+            (r'(?:&#2547;|&#x09F3;|৳)\s*([\d,]+\.?\d+)', 0),
+        ]:
+            match = re.search(pattern, page_text, flags)
+            if match:
+                data['mrp'] = match.group(1).replace(',', '')
+                break
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--listing', type=pathlib.Path, default=FIXTURES / "listing.html")
+    parser.add_argument('--detail', type=pathlib.Path, default=FIXTURES / "detail.html")
+    parser.add_argument('--repeat', type=int, default=100, help="runs per measurement (median is reported)")
+    parser.add_argument('--browser', action='store_true', help="also time the old WebDriver extraction in Chrome")
+    args = parser.parse_args()
+
+    listing_html = args.listing.read_text(encoding='utf-8')
+    detail_html = args.detail.read_text(encoding='utf-8')
+    medicines = parsers.parse_listing(listing_html)
+    print(f"Listing fixture: {len(medicines)} medicines; detail fixture: {parsers.parse_detail(detail_html)}")
+
+    print(f"\n{'page':<10}{'parsers.py (ms)':>18}{'old, WebDriver (ms)':>22}{'new, incl. page_source (ms)':>30}")
+    results = {
+        'listing': [timed(lambda: parsers.parse_listing(listing_html), args.repeat)],
+        'detail': [timed(lambda: parsers.parse_detail(detail_html), args.repeat)],
+    }
+
+    if args.browser:
+        from scraper import setup_driver
+
+        driver = setup_driver()
+        try:
+            for name, path, legacy, parse in [
+                ('listing', args.listing, legacy_listing, lambda source: parsers.parse_listing(source)),
+                ('detail', args.detail, legacy_detail, parsers.parse_detail),
+            ]:
+                driver.get(path.resolve().as_uri())
+                # The old way makes an IPC round-trip per element, so it gets fewer runs
+                results[name].append(timed(lambda: legacy(driver), max(1, args.repeat // 10)))
+                results[name].append(timed(lambda: parse(driver.page_source), args.repeat))
+        finally:
+            driver.quit()
+
+    for name, timings in results.items():
+        columns = [f"{timings[0]:>18.2f}"]
+        if len(timings) == 3:
+            columns += [f"{timings[1]:>22.2f}", f"{timings[2]:>30.2f}"]
+        print(f"{name:<10}" + "".join(columns))
+
+
+if __name__ == "__main__":
+    main()
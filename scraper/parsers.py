@@ -0,0 +1,166 @@
+"""
+Page-source parsers for medex.com.bd
+
+Each function takes the HTML of one page (driver.page_source, or a saved
+file) and extracts every field from a single lxml tree with precompiled
+XPath expressions and regexes, instead of one WebDriver round-trip per
+field. They are pure functions, so they can be run and benchmarked on saved
+HTML (see bench_parse.py).
+"""
+
+import re
+from urllib.parse import urljoin
+
+from lxml import etree, html
+
+FIELDS = ['medicine_name', 'generic_name', 'manufacturer', 'strength', 'type', 'mrp']
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Listing page
+PAGE_LINKS = etree.XPath(f"//ul[{_has_class('pagination')}]//a[{_has_class('page-link')}]")
+LISTING_BLOCKS = etree.XPath(f"//a[{_has_class('hoverable-block')}]")
+BLOCK_NAME = etree.XPath(f".//div[{_has_class('data-row-top')}]")
+BLOCK_STRENGTH = etree.XPath(f".//div[{_has_class('data-row-strength')}]//span[{_has_class('grey-ligten')}]")
+BLOCK_DOSAGE_ICON = etree.XPath(f".//img[{_has_class('dosage-icon')}]")
+BLOCK_COLUMNS = etree.XPath(f".//div[{_has_class('col-xs-12')}]")
+BLOCK_COMPANY = etree.XPath(f".//span[{_has_class('data-row-company')}]")
+
+# Detail page, each list in order of preference
+DETAIL_NAME = [
+    etree.XPath(f"//h1[{_has_class('page-heading-1')}]"),
+    etree.XPath("//h1"),
+    etree.XPath(f"//*[{_has_class('brand-name')}]"),
+    etree.XPath(f"//*[{_has_class('drug-name')}]"),
+]
+DETAIL_GENERIC = etree.XPath("//a[contains(@href, '/generic/')]")
+DETAIL_COMPANY = etree.XPath("//a[contains(@href, '/companies/')]")
+DETAIL_STRENGTH = [
+    etree.XPath(f"//span[{_has_class('strength')}]"),
+    etree.XPath(f"//div[{_has_class('strength')}]"),
+    etree.XPath(f"//*[{_has_class('drug-strength')}]"),
+]
+DETAIL_DOSAGE_FORM = etree.XPath("//a[contains(@href, '/dosage-forms/')]")
+DETAIL_DOSAGE_ICON = etree.XPath(f"//img[{_has_class('dosage-icon')}]")
+DETAIL_PRICE = [
+    etree.XPath(f"//*[{_has_class('price')}]"),
+    etree.XPath(f"//*[{_has_class('unit-price')}]"),
+    etree.XPath(f"//*[{_has_class('mrp')}]"),
+    etree.XPath("//*[contains(@class, 'price')]"),
+]
+
+STRENGTH_IN_NAME = re.compile(r'(\d+\.?\d*\s*(mg|ml|mcg|g|iu|%|gm|IU)[^a-zA-Z]*)', re.I)
+PRICE_IN_TEXT = re.compile(r'([\d,]+\.?\d+)')
+# Fallbacks over the raw page source, tried in order
+PRICE_IN_SOURCE = [
+    re.compile(r'৳[\s\u00a0]*(\d[\d,]*\.?\d*)'),
+    re.compile(r'(?:Unit\s*Price|MRP|Price)[:\s]*[\u09F3৳]?\s*([\d,]+\.?\d*)', re.I),
+    re.compile(r'(?:&#2547;|&#x09F3;|৳)\s*([\d,]+\.?\d+)'),
+]
+
+
+def _text(element) -> str:
+    """Visible text of an element with whitespace collapsed, like WebElement.text"""
+    if element is None:
+        return ''
+    return ' '.join(element.text_content().split())
+
+
+def _first(xpath, node):
+    found = xpath(node)
+    return found[0] if found else None
+
+
+def _empty_record() -> dict:
+    return {field: '' for field in FIELDS}
+
+
+def parse_total_pages(page_source: str) -> int:
+    """Highest page number in the listing pagination (1 without pagination)"""
+    tree = html.fromstring(page_source)
+    numbers = [int(text) for text in (_text(link) for link in PAGE_LINKS(tree)) if text.isdigit()]
+    return max(numbers) if numbers else 1
+
+
+def parse_listing(page_source: str, base_url: str = '') -> list:
+    """Medicines on a listing page, each with its detail page link in '_link'"""
+    tree = html.fromstring(page_source)
+    medicines = []
+    for block in LISTING_BLOCKS(tree):
+        data = _empty_record()
+        data['medicine_name'] = _text(_first(BLOCK_NAME, block))
+        data['strength'] = _text(_first(BLOCK_STRENGTH, block))
+        icon = _first(BLOCK_DOSAGE_ICON, block)
+        if icon is not None:
+            data['type'] = (icon.get('title') or '').strip()
+
+        columns = BLOCK_COLUMNS(block)
+        if len(columns) >= 3:
+            data['generic_name'] = _text(columns[2])
+        if len(columns) >= 4:
+            company = _first(BLOCK_COMPANY, columns[3])
+            data['manufacturer'] = _text(company if company is not None else columns[3])
+
+        href = block.get('href')
+        data['_link'] = urljoin(base_url, href) if href else None
+
+        if data['medicine_name']:
+            medicines.append(data)
+    return medicines
+
+
+def parse_medicine_links(page_source: str, base_url: str = '') -> list:
+    """Detail page links on a listing page"""
+    tree = html.fromstring(page_source)
+    links = (urljoin(base_url, block.get('href') or '') for block in LISTING_BLOCKS(tree))
+    return [link for link in links if '/brand/' in link]
+
+
+def _parse_price(tree, page_source: str) -> str:
+    for xpath in DETAIL_PRICE:
+        match = PRICE_IN_TEXT.search(_text(_first(xpath, tree)))
+        if match:
+            return match.group(1).replace(',', '')
+    for pattern in PRICE_IN_SOURCE:
+        match = pattern.search(page_source)
+        if match:
+            return match.group(1).replace(',', '')
+    return ''
+
+
+def parse_detail(page_source: str) -> dict:
+    """Fields of a medicine detail page; missing ones are ''"""
+    tree = html.fromstring(page_source)
+    data = _empty_record()
+
+    for xpath in DETAIL_NAME:
+        name = _first(xpath, tree)
+        if name is not None:
+            data['medicine_name'] = _text(name)
+            break
+    data['generic_name'] = _text(_first(DETAIL_GENERIC, tree))
+    data['manufacturer'] = _text(_first(DETAIL_COMPANY, tree))
+
+    for xpath in DETAIL_STRENGTH:
+        strength = _first(xpath, tree)
+        if strength is not None:
+            data['strength'] = _text(strength)
+            break
+    if not data['strength'] and data['medicine_name']:
+        match = STRENGTH_IN_NAME.search(data['medicine_name'])
+        if match:
+            data['strength'] = match.group(1).strip()
+
+    dosage_form = _first(DETAIL_DOSAGE_FORM, tree)
+    if dosage_form is not None:
+        data['type'] = _text(dosage_form)
+    else:
+        icon = _first(DETAIL_DOSAGE_ICON, tree)
+        if icon is not None:
+            data['type'] = icon.get('title') or icon.get('alt') or ''
+
+    data['mrp'] = _parse_price(tree, page_source)
+    return data
@@ -7,28 +7,35 @@ Usage:
     python scraper.py                    # Scrape all pages
     python scraper.py 1 10               # Scrape pages 1 to 10
     python scraper.py 11 20              # Scrape pages 11 to 20
+    python scraper.py 1 100 --workers 4  # 4 browsers in parallel
+    python scraper.py 1 10 --delay 2     # At least 2s between page loads per browser
 """
 
+import argparse
 import csv
-import sys
+import multiprocessing
+import queue
 import time
-import re
 import logging
 import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
+
+from parsers import FIELDS, parse_detail, parse_listing, parse_medicine_links, parse_total_pages
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
 # Constants
 BASE_URL = "https://medex.com.bd/brands"
+WORKER_STAGGER_SECONDS = 5  # undetected-chromedriver patches its driver binary on start; don't race it
+MAX_PAGE_ATTEMPTS = 2
 
 
 def setup_driver():
@@ -44,23 +51,10 @@ def setup_driver():
 
 def get_total_pages(driver) -> int:
     """Get total number of pages"""
-    try:
-        pagination = driver.find_element(By.CSS_SELECTOR, "ul.pagination")
-        page_links = pagination.find_elements(By.CSS_SELECTOR, "a.page-link")
-        
-        page_numbers = []
-        for link in page_links:
-            text = link.text.strip()
-            if text.isdigit():
-                page_numbers.append(int(text))
-        
-        if page_numbers:
-            return max(page_numbers)
-        
-        return 1
-    except NoSuchElementException:
+    total_pages = parse_total_pages(driver.page_source)
+    if total_pages == 1:
         logger.warning("Pagination not found")
-        return 1
+    return total_pages
 
 
 def wait_for_page_load(driver, timeout=15):
@@ -76,28 +70,16 @@ def wait_for_page_load(driver, timeout=15):
 
 def get_medicine_links(driver) -> list:
     """Get all medicine detail page links from current listing page"""
-    links = []
     try:
-        medicine_blocks = driver.find_elements(By.CSS_SELECTOR, "a.hoverable-block")
-        for block in medicine_blocks:
-            href = block.get_attribute('href')
-            if href and '/brand/' in href:
-                links.append(href)
+        return parse_medicine_links(driver.page_source, driver.current_url)
     except Exception as e:
         logger.error(f"Error getting links: {e}")
-    return links
+        return []
 
 
 def scrape_medicine_detail(driver, url: str) -> dict:
     """Scrape medicine details from individual medicine page"""
-    data = {
-        'medicine_name': '',
-        'generic_name': '',
-        'manufacturer': '',
-        'strength': '',
-        'type': '',
-        'mrp': ''
-    }
+    data = {field: '' for field in FIELDS}
     
     try:
         driver.get(url)
@@ -111,113 +93,8 @@ def scrape_medicine_detail(driver, url: str) -> dict:
         # Additional wait for price to load (often loaded via AJAX)
         time.sleep(2)
         
-        # Medicine name - from page title or h1
-        try:
-            # Try multiple selectors for medicine name
-            name_elem = None
-            for selector in ["h1.page-heading-1", "h1", ".brand-name", ".drug-name"]:
-                try:
-                    name_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                    if name_elem:
-                        break
-                except:
-                    continue
-            
-            if name_elem:
-                data['medicine_name'] = name_elem.text.strip()
-        except:
-            pass
-        
-        # Generic name
-        try:
-            generic_elem = driver.find_element(By.CSS_SELECTOR, "a[href*='/generic/']")
-            data['generic_name'] = generic_elem.text.strip()
-        except:
-            pass
-        
-        # Manufacturer
-        try:
-            mfr_elem = driver.find_element(By.CSS_SELECTOR, "a[href*='/companies/']")
-            data['manufacturer'] = mfr_elem.text.strip()
-        except:
-            pass
-        
-        # Strength - look for it in various places
-        try:
-            # Try to find strength in the page
-            strength_patterns = [
-                "span.strength",
-                "div.strength", 
-                ".drug-strength"
-            ]
-            for pattern in strength_patterns:
-                try:
-                    elem = driver.find_element(By.CSS_SELECTOR, pattern)
-                    if elem:
-                        data['strength'] = elem.text.strip()
-                        break
-                except:
-                    continue
-            
-            # If not found, try to extract from medicine name
-            if not data['strength'] and data['medicine_name']:
-                match = re.search(r'(\d+\.?\d*\s*(mg|ml|mcg|g|iu|%|gm|IU)[^a-zA-Z]*)', data['medicine_name'], re.I)
-                if match:
-                    data['strength'] = match.group(1).strip()
-        except:
-            pass
-        
-        # Type / Dosage form
-        try:
-            type_elem = driver.find_element(By.CSS_SELECTOR, "a[href*='/dosage-forms/']")
-            data['type'] = type_elem.text.strip()
-        except:
-            # Try to get from img
-            try:
-                img_elem = driver.find_element(By.CSS_SELECTOR, "img.dosage-icon")
-                data['type'] = img_elem.get_attribute('title') or img_elem.get_attribute('alt') or ''
-            except:
-                pass
-        
-        # MRP / Price - look for price on the page
-        try:
-            # Try finding price elements first (more reliable)
-            price_selectors = [
-                ".price", ".unit-price", ".mrp", "span.price",
-                "[class*='price']", "[class*='unit-price']"
-            ]
-            for sel in price_selectors:
-                try:
-                    price_elem = driver.find_element(By.CSS_SELECTOR, sel)
-                    price_text = price_elem.text.strip()
-                    price_match = re.search(r'([\d,]+\.?\d+)', price_text)
-                    if price_match:
-                        data['mrp'] = price_match.group(1).replace(',', '')
-                        break
-                except:
-                    continue
-            
-            # If not found via elements, try page source regex
-            if not data['mrp']:
-                page_text = driver.page_source
-                
-                # Pattern 1: ৳ symbol followed by number (allow HTML entities and whitespace)
-                price_match = re.search(r'৳[\s\u00a0]*(\d[\d,]*\.?\d*)', page_text)
-                if price_match:
-                    data['mrp'] = price_match.group(1).replace(',', '')
-                else:
-                    # Pattern 2: "Unit Price" or "MRP" followed by number
-                    price_match = re.search(r'(?:Unit\s*Price|MRP|Price)[:\s]*[\u09F3৳]?\s*([\d,]+\.?\d*)', page_text, re.I)
-                    if price_match:
-                        data['mrp'] = price_match.group(1).replace(',', '')
-                    else:
-                        # Pattern 3: Look for "৳" HTML entity (&#2547; or &#x09F3;)
-                        price_match = re.search(r'(?:&#2547;|&#x09F3;|৳)\s*([\d,]+\.?\d+)', page_text)
-                        if price_match:
-                            data['mrp'] = price_match.group(1).replace(',', '')
-                        
-        except Exception as e:
-            logger.debug(f"Error getting price: {e}")
+        # One page_source fetch; every field is parsed from it (see parsers.py)
+        data = parse_detail(driver.page_source)
         
     except Exception as e:
         logger.error(f"Error scraping {url}: {e}")
@@ -226,64 +103,185 @@ def scrape_medicine_detail(driver, url: str) -> dict:
 
 
 def scrape_listing_page(driver) -> list:
-    """Scrape basic info from listing page (faster, no MRP)"""
-    medicines = []
-    
+    """Scrape basic info from listing page (faster, no MRP); raises if it cannot be read"""
+    return parse_listing(driver.page_source, driver.current_url)
+
+
+class RateLimiter:
+    """Minimum interval between page loads for one browser"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next = 0.0
+
+    def wait(self):
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = time.monotonic() + self.interval
+
+
+def scrape_page(driver, page: int, limiter: RateLimiter) -> list:
+    """Scrape one listing page and the detail page (for MRP) of every medicine on it"""
+    url = f"{BASE_URL}?page={page}"
+    limiter.wait()
+    driver.get(url)
+    time.sleep(2)
+    if not wait_for_page_load(driver, timeout=10):
+        # Raised rather than returning no medicines, so the page is retried
+        raise TimeoutException(f"Page {page}: timed out waiting for the listing")
+
+    # Get basic info and links from listing
+    page_medicines = scrape_listing_page(driver)
+    logger.info(f"Page {page}: found {len(page_medicines)} medicines")
+
+    # Visit each medicine page to get MRP
+    for i, med in enumerate(page_medicines):
+        link = med.get('_link', '')
+        if not link:
+            continue
+        limiter.wait()
+        detail = scrape_medicine_detail(driver, link)
+
+        # Update MRP
+        med['mrp'] = detail.get('mrp', '')
+
+        # Also update any missing fields
+        for key in ['generic_name', 'manufacturer', 'strength', 'type']:
+            if not med.get(key) and detail.get(key):
+                med[key] = detail[key]
+
+        logger.info(f"  Page {page} [{i+1}/{len(page_medicines)}] {med['medicine_name'][:30]}... MRP: {med['mrp'] or 'N/A'}")
+
+    return page_medicines
+
+
+def open_listing(driver, timeout=30) -> bool:
+    """Load the first listing page (and get past the bot check)"""
+    driver.get(BASE_URL)
+    time.sleep(6)
+    return wait_for_page_load(driver, timeout=timeout)
+
+
+def worker_main(worker_id: int, pages, results, delay: float, current):
+    """Worker process: one browser taking page numbers from the shared queue until it gets None
+
+    ``current[worker_id]`` holds the page being scraped (0 when idle). It is
+    shared memory rather than a queue message, so the parent still sees it if
+    this process is killed before the queue's feeder thread flushes.
+    """
+    time.sleep(worker_id * WORKER_STAGGER_SECONDS)
+    driver = None
     try:
-        medicine_blocks = driver.find_elements(By.CSS_SELECTOR, "a.hoverable-block")
-        
-        for block in medicine_blocks:
+        driver = setup_driver()
+        if not open_listing(driver):
+            results.put(('worker_failed', worker_id, 'Timeout waiting for content'))
+            return
+        limiter = RateLimiter(delay)
+        while True:
+            page = pages.get()
+            if page is None:
+                break
+            current[worker_id] = page
             try:
-                data = {
-                    'medicine_name': '',
-                    'generic_name': '',
-                    'manufacturer': '',
-                    'strength': '',
-                    'type': '',
-                    'mrp': ''
-                }
-                
-                try:
-                    name_div = block.find_element(By.CSS_SELECTOR, "div.data-row-top")
-                    data['medicine_name'] = name_div.text.strip()
-                except:
-                    pass
-                
-                try:
-                    strength_elem = block.find_element(By.CSS_SELECTOR, "div.data-row-strength span.grey-ligten")
-                    data['strength'] = strength_elem.text.strip()
-                except:
-                    pass
-                
-                try:
-                    img_elem = block.find_element(By.CSS_SELECTOR, "img.dosage-icon")
-                    data['type'] = img_elem.get_attribute('title') or ''
-                except:
-                    pass
-                
-                col_divs = block.find_elements(By.CSS_SELECTOR, "div.col-xs-12")
-                if len(col_divs) >= 3:
-                    data['generic_name'] = col_divs[2].text.strip()
-                if len(col_divs) >= 4:
-                    try:
-                        mfr_elem = col_divs[3].find_element(By.CSS_SELECTOR, "span.data-row-company")
-                        data['manufacturer'] = mfr_elem.text.strip()
-                    except:
-                        data['manufacturer'] = col_divs[3].text.strip()
-                
-                # Get link for detail page
-                data['_link'] = block.get_attribute('href')
-                
-                if data['medicine_name']:
-                    medicines.append(data)
-                    
+                results.put(('page', page, scrape_page(driver, page, limiter)))
             except Exception as e:
-                continue
-                    
+                logger.exception(f"Page {page} failed")
+                results.put(('page_failed', page, str(e)))
+            current[worker_id] = 0
+    except KeyboardInterrupt:
+        pass
     except Exception as e:
-        logger.error(f"Error scraping listing: {e}")
-    
-    return medicines
+        logger.exception("Worker error")
+        results.put(('worker_failed', worker_id, str(e)))
+    finally:
+        if driver:
+            driver.quit()
+        results.put(('done', worker_id, None))
+
+
+def merge_pages(by_page: dict) -> list:
+    """Medicines of all finished pages in page order (copies, so saving doesn't alter them)"""
+    return [dict(med) for page in sorted(by_page) for med in by_page[page]]
+
+
+def scrape_parallel(start_page: int, end_page: int, workers: int, delay: float, by_page: dict, on_progress=None):
+    """Scrape pages across ``workers`` browser processes into ``by_page`` (page -> medicines).
+
+    Pages are handed out from one shared queue, so a worker that finishes early
+    takes the next page instead of idling on a fixed shard. A failed page is
+    retried on whichever worker is free, up to MAX_PAGE_ATTEMPTS times. So is
+    the page a worker was on if its process dies without reporting (browser
+    crash, OOM kill).
+    """
+    context = multiprocessing.get_context('spawn')
+    pages = context.Queue()
+    results = context.Queue()
+    pending = set(range(start_page, end_page + 1))
+    attempts = {page: 1 for page in pending}
+    for page in sorted(pending):
+        pages.put(page)
+
+    current = context.Array('i', workers, lock=False)
+    processes = [
+        context.Process(target=worker_main, args=(i, pages, results, delay, current), name=f"worker-{i+1}", daemon=True)
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    finished = set()  # workers that reported 'done' or died
+
+    def retry(page, reason):
+        if page not in pending:
+            return
+        if attempts[page] < MAX_PAGE_ATTEMPTS:
+            attempts[page] += 1
+            pages.put(page)
+        else:
+            logger.error(f"Giving up on page {page}: {reason}")
+            pending.discard(page)
+
+    def reap_dead_workers():
+        for worker_id, process in enumerate(processes):
+            if worker_id not in finished and not process.is_alive():
+                finished.add(worker_id)
+                if process.exitcode:
+                    logger.error(f"Worker {worker_id + 1} died (exit code {process.exitcode})")
+                if current[worker_id]:
+                    retry(current[worker_id], f"worker {worker_id + 1} died")
+
+    try:
+        while pending and len(finished) < len(processes):
+            reap_dead_workers()
+            try:
+                kind, key, payload = results.get(timeout=5)
+            except queue.Empty:
+                continue
+            if kind == 'page':
+                if key not in pending:
+                    continue  # sent by a worker that died before clearing its page, so already re-queued
+                pending.discard(key)
+                by_page[key] = payload
+                if on_progress:
+                    on_progress(key)
+            elif kind == 'page_failed':
+                retry(key, payload)
+            elif kind == 'worker_failed':
+                logger.error(f"Worker {key + 1} stopped: {payload}")
+            elif kind == 'done':
+                finished.add(key)
+    finally:
+        for _ in processes:
+            pages.put(None)
+        for process in processes:
+            process.join(timeout=30)
+            if process.is_alive():
+                process.terminate()
+
+    if pending:
+        logger.warning(f"Pages not scraped: {sorted(pending)}")
+    return by_page
 
 
 def save_to_csv(medicines: list, filename: str):
@@ -292,7 +290,7 @@ def save_to_csv(medicines: list, filename: str):
         logger.warning("No medicines to save")
         return False
     
-    fieldnames = ['medicine_name', 'generic_name', 'manufacturer', 'strength', 'type', 'mrp']
+    fieldnames = FIELDS
     
     # Remove internal link field
     for med in medicines:
@@ -310,14 +308,20 @@ def save_to_csv(medicines: list, filename: str):
 
 def main():
     """Main scraper function"""
+    parser = argparse.ArgumentParser(description="Scrape medex.com.bd brands into a CSV")
+    parser.add_argument('pages', nargs='*', type=int, help="[START] END page (default: all pages)")
+    parser.add_argument('--workers', type=int, default=1, help="browsers to run in parallel (default 1)")
+    parser.add_argument('--delay', type=float, default=1.0, help="minimum seconds between page loads per browser")
+    args = parser.parse_args()
+
     start_page = 1
     end_page = None
     
-    if len(sys.argv) >= 3:
-        start_page = int(sys.argv[1])
-        end_page = int(sys.argv[2])
-    elif len(sys.argv) == 2:
-        end_page = int(sys.argv[1])
+    if len(args.pages) >= 2:
+        start_page, end_page = args.pages[0], args.pages[1]
+    elif len(args.pages) == 1:
+        end_page = args.pages[0]
+    workers = max(1, args.workers)
     
     print("=" * 60)
     print("Bangladesh Medicine Scraper (with MRP)")
@@ -330,23 +334,26 @@ def main():
         print(f"\nScraping all pages starting from {start_page}")
     
     print("Note: Fetching MRP requires visiting each medicine page.")
-    print("      This is slower (~30 medicines/minute)")
+    print(f"      This is slower (~30 medicines/minute per browser, {workers} browser(s))")
     print("\nUsing undetected-chromedriver to bypass captcha...\n")
     
     driver = None
-    all_medicines = []
+    by_page = {}  # page -> medicines, merged in page order when saving
+    
+    def save_progress(page):
+        # Save periodically
+        if len(by_page) % 5 == 0:
+            temp_filename = f'bd_medicines_page_{start_page}_to_{end_page}_temp.csv'
+            save_to_csv(merge_pages(by_page), temp_filename)
+            print(f"  (Saved progress to {temp_filename})")
     
     try:
         print("Starting browser...")
         driver = setup_driver()
         
         print(f"Loading {BASE_URL}...")
-        driver.get(BASE_URL)
-        
         print("Waiting for page to load...")
-        time.sleep(6)
-        
-        if not wait_for_page_load(driver, timeout=30):
+        if not open_listing(driver, timeout=30):
             print("⚠ Timeout waiting for content.")
             return
         
@@ -358,60 +365,41 @@ def main():
             end_page = total_pages
         else:
             end_page = min(end_page, total_pages)
+        workers = min(workers, end_page - start_page + 1)
         
         print(f"\nTotal pages available: {total_pages}")
         print(f"Scraping pages: {start_page} to {end_page}")
         
         medicines_per_page = 30
         total_medicines = (end_page - start_page + 1) * medicines_per_page
-        est_time = total_medicines * 2  # ~2 seconds per medicine
+        est_time = total_medicines * 2 // workers  # ~2 seconds per medicine per browser
         print(f"Estimated medicines: ~{total_medicines}")
         print(f"Estimated time: ~{est_time // 60} minutes")
         print()
         
-        # Scrape each page
-        for page in range(start_page, end_page + 1):
-            url = f"{BASE_URL}?page={page}"
-            
-            print(f"\n--- Page {page}/{end_page} ---")
-            driver.get(url)
-            time.sleep(2)
-            wait_for_page_load(driver, timeout=10)
-            
-            # Get basic info and links from listing
-            page_medicines = scrape_listing_page(driver)
-            print(f"Found {len(page_medicines)} medicines on this page")
-            
-            # Visit each medicine page to get MRP
-            for i, med in enumerate(page_medicines):
-                link = med.get('_link', '')
-                if link:
-                    print(f"  [{i+1}/{len(page_medicines)}] {med['medicine_name'][:30]}...", end=' ')
-                    
-                    # Get MRP from detail page
-                    detail = scrape_medicine_detail(driver, link)
-                    
-                    # Update MRP
-                    med['mrp'] = detail.get('mrp', '')
-                    
-                    # Also update any missing fields
-                    for key in ['generic_name', 'manufacturer', 'strength', 'type']:
-                        if not med.get(key) and detail.get(key):
-                            med[key] = detail[key]
-                    
-                    print(f"MRP: {med['mrp'] or 'N/A'}")
-                    
-                    time.sleep(1)
-            
-            all_medicines.extend(page_medicines)
-            print(f"Total scraped: {len(all_medicines)} medicines")
-            
-            # Save periodically
-            if page % 5 == 0:
-                temp_filename = f'bd_medicines_page_{start_page}_to_{end_page}_temp.csv'
-                save_to_csv(all_medicines.copy(), temp_filename)
-                print(f"  (Saved progress to {temp_filename})")
+        if workers > 1:
+            # Each worker starts its own browser; this one was only needed for the page count
+            driver.quit()
+            driver = None
+            print(f"Starting {workers} workers...")
+            scrape_parallel(start_page, end_page, workers, args.delay, by_page, on_progress=save_progress)
+        else:
+            limiter = RateLimiter(args.delay)
+            # Scrape each page
+            for page in range(start_page, end_page + 1):
+                print(f"\n--- Page {page}/{end_page} ---")
+                for attempt in range(1, MAX_PAGE_ATTEMPTS + 1):
+                    try:
+                        by_page[page] = scrape_page(driver, page, limiter)
+                        break
+                    except Exception as e:
+                        logger.error(f"Page {page} failed (attempt {attempt}/{MAX_PAGE_ATTEMPTS}): {e}")
+                if page not in by_page:
+                    continue
+                print(f"Total scraped: {sum(len(meds) for meds in by_page.values())} medicines")
+                save_progress(page)
         
+        all_medicines = merge_pages(by_page)
         print(f"\n{'='*60}")
         print(f"Scraping complete!")
         print(f"{'='*60}")
@@ -426,6 +414,7 @@ def main():
             
     except KeyboardInterrupt:
         print("\n\n⚠ Scraping interrupted by user!")
+        all_medicines = merge_pages(by_page)
         if all_medicines:
             filename = f'bd_medicines_partial_{start_page}_to_{end_page}.csv'
             save_to_csv(all_medicines, filename)
@@ -435,6 +424,7 @@ def main():
         print(f"\n✗ Error: {e}")
         logger.exception("Scraper error")
         
+        all_medicines = merge_pages(by_page)
         if all_medicines:
             filename = f'bd_medicines_partial_{start_page}_to_{end_page}.csv'
             save_to_csv(all_medicines, filename)